@@ -2,6 +2,8 @@ import openai
 import os
 from dotenv import load_dotenv
 
+from shared import trim_messages
+
 load_dotenv()
 
 client=openai.Client(api_key=os.getenv("OPENAI_API_KEY"))
@@ -18,7 +20,7 @@ while True:
 
     response=client.chat.completions.create(
         model="gpt-5-nano",
-        messages=messages
+        messages=trim_messages(messages, "gpt-5-nano")
     )
 
     reply=response.choices[0].message.content
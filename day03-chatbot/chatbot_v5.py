@@ -2,6 +2,8 @@ import openai
 import os, sys
 from dotenv import load_dotenv
 
+from shared import trim_messages
+
 load_dotenv()
 
 try:
@@ -31,7 +33,7 @@ while True:
 
     response=client.chat.completions.create(
         model="gpt-5-nano",
-        messages=messages
+        messages=trim_messages(messages, "gpt-5-nano")
     )
 
     reply=response.choices[0].message.content
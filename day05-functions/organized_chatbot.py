@@ -1,7 +1,8 @@
 from file_functions import read_text_file, save_text_file
 
-from shared import (display_response, get_ai_response, get_user_file,
-                    get_user_input, load_config, save_chat_log, setup_api)
+from shared import (ChatLogWriter, SummaryMemory, context_budget,
+                    display_response, get_ai_response, get_user_file,
+                    get_user_input, load_config, setup_api)
 
 
 def main():
@@ -11,11 +12,16 @@ def main():
 
     # 2. File to read
     filename = get_user_file()
-    messages= []
     file_content = read_text_file(filename)
     if file_content:
         print(f"---- Loaded content from {filename}----")
-        messages.append({"role":"system", "content": file_content})
+    # The file is the system prompt, so budget for the model's whole window
+    # rather than the default 16k cap
+    model = config.get("model", "gpt-4.1-nano")
+    memory = SummaryMemory(client, system_prompt=file_content or None, model=model,
+                           max_tokens=context_budget(model, max_input_tokens=None))
+    chat_log = ChatLogWriter()
+    chat_log.write_many(memory.transcript)
 
     
 
@@ -27,19 +33,21 @@ def main():
         
         #4. Exitting the bot
         if user_input.lower()=="quit":
-            print("Saving chat log...")
-            save_name = input("Enter filename to save log: ")
-            save_chat_log(messages, save_name)
+            chat_log.close()
+            print(f"Chat log saved to {chat_log.path}")
+            memory.close()
             break
         
         
         ## Code continues
-        messages.append({"role":"user", "content": user_input})
+        memory.add_user(user_input)
+        chat_log.write(memory.transcript[-1])
 
         
-        reply = get_ai_response(client, messages, config)
+        reply = get_ai_response(client, memory.messages(), config)
 
-        messages.append({"role":"assistant", "content":reply})
+        memory.add_assistant(reply)
+        chat_log.write(memory.transcript[-1])
         display_response(reply)
 if __name__=="__main__":
     main()
\ No newline at end of file
@@ -4,8 +4,9 @@ from pathlib import Path
 from vector_store import initialize_chroma_collection, ingest_document, query_database
 
 from shared import  (load_config, setup_api, get_user_input, 
-                                get_user_file, save_chat_log,
-                                get_ai_response,  display_response)
+                                get_user_file, ChatLogWriter,
+                                get_ai_response,  display_response,
+                                memoized_rewrite, rewrite_stats)
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,14 +25,17 @@ def rewrite_query(messages:list[dict], current_query:str, client) ->str:
     rewriter_prompt.extend(recent_history)
     rewriter_prompt.append({"role":"user", "content": f"{current_query}"})
 
-    response = client.chat.completions.create(
-        model ="gpt-4o-mini",
-        messages = rewriter_prompt,
-        temperature = 0,
-        max_tokens = 100
-    )
-
-    reply=response.choices[0].message.content
+    def call_rewriter():
+        response = client.chat.completions.create(
+            model ="gpt-4o-mini",
+            messages = rewriter_prompt,
+            temperature = 0,
+            max_tokens = 100
+        )
+        return response.choices[0].message.content
+
+    # Skips the call on the first turn / for standalone questions, reuses repeats
+    reply=memoized_rewrite(recent_history, current_query, call_rewriter)
     return reply
 
 
@@ -51,6 +55,9 @@ def main():
 
     print(f"\n Great! Accessing {file}")
 
+    chat_log = ChatLogWriter()
+    chat_log.write_many(messages)
+
     empty_collection =initialize_chroma_collection("DEFAULT_COLLECTION_NAME")
     full_collection =ingest_document(file_path, empty_collection)
 
@@ -58,9 +65,9 @@ def main():
     while True:
         user_input=get_user_input()
         if user_input.lower()=="quit":
-            print("Saving chat log...")
-            save_name = input("Enter filename to save log: ")
-            save_chat_log(messages, save_name)
+            chat_log.close()
+            print(f"Chat log saved to {chat_log.path}")
+            print(f"Rewrite calls: {rewrite_stats}")
             break
         
         rewritten_query = rewrite_query(messages, user_input, client)
@@ -85,6 +92,7 @@ def main():
 
         messages.append({"role":"user", "content": user_input})
         messages.append({"role":"assistant", "content":reply})
+        chat_log.write_many(messages[-2:])
         
 
         display_response(reply)
@@ -1,3 +1,4 @@
+import logging
 import sys
 from pathlib import Path
 
@@ -6,18 +7,18 @@ november_challenge = Path(__file__).parent.parent
 sys.path.insert(0, str(november_challenge))
 import enable_imports
 
-from count_token import num_tokens_from_string
+from shared import count_tokens, count_tokens_many
 from refactored_chatbot import (
     setup_api,
     get_user_input,
     load_config,
-    get_ai_response,
     display_response,
 )
 
+logger = logging.getLogger(__name__)
 
-def calculate_cost(input_tokens:int , output_tokens: int, model_name:str) -> float:
-    TOKEN_PRICES = {
+
+TOKEN_PRICES = {
     "gpt-5.1": {"input": 1.25, "output": 10.00},
     "gpt-5": {"input": 1.25, "output": 10.00},
     "gpt-5-chat": {"input": 1.25, "output": 10.00},
@@ -31,8 +32,15 @@ def calculate_cost(input_tokens:int , output_tokens: int, model_name:str) -> flo
     "gpt-4.1-nano": {"input": 0.10, "output": 0.40},
     "gpt-4o": {"input": 2.50, "output": 10.00},
     "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-    }
+}
+
+# Chat format overhead (OpenAI cookbook): each message is wrapped in a few
+# tokens, and every reply is primed with a few more.
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
 
+def calculate_cost(input_tokens:int , output_tokens: int, model_name:str) -> float:
     if model_name not in TOKEN_PRICES:
         raise ValueError(f"Unknown model: {model_name}")
     
@@ -48,47 +56,138 @@ def calculate_cost(input_tokens:int , output_tokens: int, model_name:str) -> flo
 
     # Return cost in dollars
     
-def track_conversation_cost(messages) -> float: 
-    running_total = 0
-    input_content = ""
-    output_content = ""
+def track_conversation_cost(messages, model: str = "gpt-4.1-nano") -> float: 
+    input_tokens = 0
+    output_tokens = 0
+
+    # Per-message counts are memoized, so calling this every turn only
+    # tokenizes the newest messages
+    counts = count_tokens_many([msg["content"] for msg in messages], model)
 
-    for msg in messages:
+    for msg, tokens in zip(messages, counts):
         if msg["role"] in ["user", "system", "developer"]:
-            input_content += " " + msg["content"]
+            input_tokens += tokens
         if msg["role"] in ["assistant"]:
-            output_content += " " + msg["content"]
-    input_tokens = num_tokens_from_string(input_content)
-    output_tokens = num_tokens_from_string(output_content)
+            output_tokens += tokens
 
     running_total = calculate_cost(input_tokens, output_tokens, model)
     return running_total
     # Track running total  
 
 
+class ConversationLedger:
+    """
+    Running token and cost totals for one chat session.
+
+    Each message is tokenized once, when it is appended, and the size of the
+    history is kept as a running sum - so a turn costs O(1) no matter how long
+    the conversation gets. Every API call is billed for the WHOLE history it
+    re-sends as input, not just the newest message.
+
+    Usage:
+        ledger = ConversationLedger("gpt-4.1-nano")
+        ledger.append({"role": "user", "content": "hi"})
+        response = client.chat.completions.create(model=..., messages=ledger.messages)
+        ledger.record_call(response)          # uses response.usage when present
+        ledger.append(response.choices[0].message)
+        print(ledger.total_cost)
+    """
+
+    def __init__(self, model: str = "gpt-4.1-nano", messages: list[dict] = None):
+        self.model = model
+        self.messages = []
+        self.token_counts = []
+        self.history_tokens = 0
+        self.totals = {}    # model -> {"calls", "input_tokens", "output_tokens", "cost", "estimated_calls"}
+
+        for msg in messages or []:
+            self.append(msg)
+
+    def append(self, message) -> int:
+        """Add a message (dict or SDK message object); returns its token count."""
+        if not isinstance(message, dict):
+            message = {"role": message.role, "content": message.content or ""}
+
+        tokens = count_tokens(message["content"] or "", self.model) + TOKENS_PER_MESSAGE
+        self.messages.append(message)
+        self.token_counts.append(tokens)
+        self.history_tokens += tokens
+        return tokens
+
+    def record_call(self, response=None, model: str = None, reply: str = None) -> float:
+        """
+        Bill one API call made with the current history as its prompt.
+
+        Real usage from `response.usage` is used when available; otherwise the
+        prompt is the cached history size and the completion is counted from
+        `reply` (or the response text). Returns the cost of this call; a model
+        missing from TOKEN_PRICES is still counted, at zero cost.
+        """
+        model = model or getattr(response, "model", None) or self.model
+        if model not in TOKEN_PRICES:
+            # API reports dated names like gpt-4.1-nano-2025-04-14
+            known = [name for name in TOKEN_PRICES if model.startswith(name)]
+            if known:
+                model = max(known, key=len)
+
+        usage = getattr(response, "usage", None)
+        estimated = usage is None
+        if usage is not None:
+            input_tokens = usage.prompt_tokens
+            output_tokens = usage.completion_tokens
+        else:
+            if reply is None and response is not None:
+                reply = response.choices[0].message.content
+            input_tokens = self.history_tokens + TOKENS_PER_REPLY
+            output_tokens = count_tokens(reply or "", model)
+
+        if model in TOKEN_PRICES:
+            cost = calculate_cost(input_tokens, output_tokens, model)
+        else:
+            logger.warning(f"No price for model {model!r}; recording this call at $0")
+            cost = 0.0
+
+        totals = self.totals.setdefault(model, {
+            "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0, "estimated_calls": 0
+        })
+        totals["calls"] += 1
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        totals["cost"] += cost
+        totals["estimated_calls"] += estimated
+        return cost
+
+    @property
+    def total_cost(self) -> float:
+        return sum(t["cost"] for t in self.totals.values())
+
+    def summary(self) -> dict:
+        return {
+            "messages": len(self.messages),
+            "history_tokens": self.history_tokens,
+            "total_cost": self.total_cost,
+            "by_model": self.totals,
+        }
+
+
 if __name__ == "__main__":
     config = load_config()
     client = setup_api()
 
-    messages=[{"role":"system", "content":"You are a diva"}]
-
-
-    model = "gpt-4.1-nano"
+    model = config.get("model", "gpt-4.1-nano")
+    ledger = ConversationLedger(model, [{"role":"system", "content":"You are a diva"}])
 
     while True:
         user_input=get_user_input()
         if user_input=="quit":
-            messages.append({"role":"user", "content": user_input})
             break
-        messages.append({"role":"user", "content": user_input})
+        ledger.append({"role":"user", "content": user_input})
 
-        reply= get_ai_response(client, messages, config)
+        response = client.chat.completions.create(**config, messages=ledger.messages)
+        reply = response.choices[0].message.content
 
-        messages.append({"role":"assistant", "content":reply})
+        cost = ledger.record_call(response)
+        ledger.append({"role":"assistant", "content":reply})
 
         display_response(reply)
-        print(f"Cost so far : ${track_conversation_cost(messages)}")
-
-
-
-
+        print(f"This turn: ${cost:.6f} | Cost so far : ${ledger.total_cost:.6f} | History: {ledger.history_tokens} tokens")
@@ -1,17 +1,15 @@
 import sys
-import tiktoken
 from pathlib import Path
 
 
-from shared import  ( get_user_input)
+from shared import  ( get_user_input, count_tokens, MAX_CONTEXT_WINDOW)
 
 # config = load_config()
 # client = setup_api()
 
 def num_tokens_from_string(string:str, model:str ="gpt-5-nano") -> int:
-    encoding = tiktoken.encoding_for_model(f"{model}")
-    num_tokens = len(encoding.encode(string))
-    return num_tokens
+    # Encoder is resolved once per model and repeated strings are memoized
+    return count_tokens(string, model)
 
 def cost_estimate(model_name: str, tokens:int)-> float:
     """
@@ -49,19 +47,6 @@ def check_token_limit(model_name: str, input_tokens: int) -> bool:
     Raises error if model is unknown.
     """
 
-    MAX_CONTEXT_WINDOW = {
-    "gpt-5": 400_000,
-    "gpt-5.1": 400_000,
-    "gpt-5-mini": 400_000,
-    "gpt-5-nano": 400_000,
-    "gpt-5-pro": 400_000,
-    "gpt-4.1": 1_000_000,
-    "gpt-4.1-mini": 1_000_000,
-    "gpt-4.1-nano": 1_000_000,
-    "gpt-4o": 128_000,          
-    "gpt-4o-mini": 128_000,
-    }
-
     if model_name not in MAX_CONTEXT_WINDOW:
         raise ValueError(f"Unknown model: {model_name}")
 
@@ -71,19 +56,6 @@ def check_token_limit(model_name: str, input_tokens: int) -> bool:
 def assert_token_limit(model_name: str, input_tokens: int):
     """
     """
-    MAX_CONTEXT_WINDOW = {
-    "gpt-5": 400_000,
-    "gpt-5.1": 400_000,
-    "gpt-5-mini": 400_000,
-    "gpt-5-nano": 400_000,
-    "gpt-5-pro": 400_000,
-    "gpt-4.1": 1_000_000,
-    "gpt-4.1-mini": 1_000_000,
-    "gpt-4.1-nano": 1_000_000,
-    "gpt-4o": 128_000,          
-    "gpt-4o-mini": 128_000,
-    }
-
     if not check_token_limit(model_name, input_tokens):
         max_limit = MAX_CONTEXT_WINDOW[model_name]
         raise ValueError(
@@ -3,7 +3,7 @@ from ai_weather_bot import get_weather
 from news_api import get_news
 from shared import (setup_logging, load_config, setup_api,
                     get_user_input, response_with_retry,
-                    display_response)
+                    display_response, cassette_from_env)
 from pathlib import Path
 
 log_file = setup_logging()
@@ -13,7 +13,8 @@ logger.info(f"{Path(sys.argv[0]).stem} STARTED")
 logger.info(f"Logging to : {log_file}")
 logger.info("="*60)
 
-
+# Record/replay OpenAI, weather and news traffic when $CASSETTE is set
+cassette_from_env()
 
 
 
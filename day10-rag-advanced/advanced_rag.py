@@ -1,33 +1,48 @@
-import os, re
+import os, re, time
 from pathlib import Path
 from openai import OpenAI
 import chromadb
 from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from dotenv import load_dotenv
-from unstructured.partition.auto import partition 
 
 
 from shared import (
+    fixed_size_chunks,
     overlap_chunks,
     sentence_chunks,
     paragraph_chunks,
+    read_document,
+    read_elements,
+    assemble_context,
+    mmr_select,
+    distances_to_similarity,
+    SemanticAnswerCache,
+    collection_stats,
+    count_tokens_many,
 )
 
 load_dotenv()
 
+# Paraphrased questions that retrieve the same chunks reuse the earlier answer
+answer_cache = SemanticAnswerCache(threshold=0.95)
+
+# Collection name -> the embedding function get_collection() gave it
+_embedding_functions = {}
+
 
 # =============================================================================
 # Setup
 # =============================================================================
 def read_document_with_metadata(file_path: str) -> dict:
-    elements = partition(filename=file_path)
+    # Fast readers for txt/md/csv/json/pdf, unstructured's partition for the rest
+    elements = read_elements(file_path)
     
     return {
         "filename": Path(file_path).name,
         "elements": [
             {
-                "text": str(el),
-                "page": el.metadata.page_number if hasattr(el, 'metadata') and hasattr(el.metadata, 'page_number') else None
+                "text": el["text"],
+                "page": el["page"]
             }
             for el in elements
         ]
@@ -46,9 +61,15 @@ def get_collection(collection_name: str = "rag_documents"):
         name=collection_name,
         embedding_function=openai_ef
     )
+    _embedding_functions[collection_name] = openai_ef
     
     return collection
 
+
+def embed_query(collection, text: str):
+    """Embed a query with the same embedding function the collection was created with."""
+    return _embedding_functions[collection.name]([text])[0]
+
 def auto_select_chunker(text: str) -> list[str]:
     """
     Auto-select chunking strategy based on text structure.
@@ -135,45 +156,45 @@ def auto_select_chunker(text: str) -> list[str]:
 #     return overlap_chunks(text, chunk_size=500, overlap=50)
 
 
-# def chunk_text(text: str, strategy: str = "auto", **kwargs) -> list[str]:
-#     """
-#     Chunk text with specified or auto strategy.
+def chunk_text(text: str, strategy: str = "auto", **kwargs) -> list[str]:
+    """
+    Chunk text with specified or auto strategy.
     
-#     Args:
-#         text: Text to chunk
-#         strategy: "auto", "paragraph", "sentence", "overlap", "fixed"
-#         **kwargs: chunk_size, overlap for relevant strategies
+    Args:
+        text: Text to chunk
+        strategy: "auto", "paragraph", "sentence", "overlap", "fixed"
+        **kwargs: chunk_size, overlap for relevant strategies
     
-#     Returns:
-#         List of text chunks
-#     """
-#     if strategy == "auto":
-#         chunks = auto_select_chunker(text)
-#     elif strategy == "paragraph":
-#         print("  📄 Strategy: Paragraph Chunking")
-#         chunks = paragraph_chunks(text)
-#     elif strategy == "sentence":
-#         print("  📃 Strategy: Sentence Chunking")
-#         chunks = sentence_chunks(text)
-#     elif strategy == "overlap":
-#         chunk_size = kwargs.get("chunk_size", 500)
-#         overlap = kwargs.get("overlap", 50)
-#         print(f"  🔄 Strategy: Overlap Chunks ({chunk_size}/{overlap})")
-#         chunks = overlap_chunks(text, chunk_size=chunk_size, overlap=overlap)
-#     elif strategy == "fixed":
-#         chunk_size = kwargs.get("chunk_size", 100)
-#         print(f"  📏 Strategy: Fixed Size ({chunk_size} words)")
-#         chunks = fixed_size_chunks(text, chunk_size=chunk_size)
-#     else:
-#         raise ValueError(f"Unknown strategy: {strategy}")
-    
-#     # Filter empty chunks
-#     chunks = [c.strip() for c in chunks if c.strip()]
-    
-#     # Filter very small chunks (less than 10 characters)
-#     chunks = [c for c in chunks if len(c) >= 10]
-    
-#     return chunks
+    Returns:
+        List of text chunks
+    """
+    if strategy == "auto":
+        chunks = auto_select_chunker(text)
+    elif strategy == "paragraph":
+        print("  📄 Strategy: Paragraph Chunking")
+        chunks = paragraph_chunks(text)
+    elif strategy == "sentence":
+        print("  📃 Strategy: Sentence Chunking")
+        chunks = sentence_chunks(text)
+    elif strategy == "overlap":
+        chunk_size = kwargs.get("chunk_size", 500)
+        overlap = kwargs.get("overlap", 50)
+        print(f"  🔄 Strategy: Overlap Chunks ({chunk_size}/{overlap})")
+        chunks = overlap_chunks(text, chunk_size=chunk_size, overlap=overlap)
+    elif strategy == "fixed":
+        chunk_size = kwargs.get("chunk_size", 100)
+        print(f"  📏 Strategy: Fixed Size ({chunk_size} words)")
+        chunks = fixed_size_chunks(text, chunk_size=chunk_size)
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    
+    # Filter empty chunks
+    chunks = [c.strip() for c in chunks if c.strip()]
+    
+    # Filter very small chunks (less than 10 characters)
+    chunks = [c for c in chunks if len(c) >= 10]
+    
+    return chunks
 
 
 # =============================================================================
@@ -217,16 +238,24 @@ def ingest_file(
     # Create unique IDs using filename to avoid collisions
     file_id = path.stem.replace(" ", "_").replace("-", "_")[:20]
     
+    # Load the stats before touching the collection, or a first load would
+    # rescan and already count the chunks this call is about to record
+    stats = collection_stats(collection)
+    
     # Check for existing chunks from this file and remove them
     try:
-        existing = collection.get(where={"source": filename})
+        existing = collection.get(where={"source": filename}, include=[])
         if existing and existing["ids"]:
             collection.delete(ids=existing["ids"])
+            answer_cache.invalidate_chunks(existing["ids"])
+            stats.remove_source(filename)
             print(f"  🔄 Replaced {len(existing['ids'])} existing chunks")
     except Exception:
         pass  # Collection might be empty
     
     ids = [f"{file_id}_chunk_{i}" for i in range(len(chunks))]
+    answer_cache.invalidate_chunks(ids)
+    token_counts = count_tokens_many(chunks)
     
     metadatas = [
         {
@@ -236,6 +265,7 @@ def ingest_file(
             "chunk_index": i,
             "total_chunks": len(chunks),
             "char_count": len(chunks[i]),
+            "token_count": token_counts[i],
         }
         for i in range(len(chunks))
     ]
@@ -246,6 +276,7 @@ def ingest_file(
         ids=ids,
         metadatas=metadatas
     )
+    stats.record_ingest(filename, path.suffix.lower(), len(chunks), sum(token_counts))
     
     print(f"  ✅ Added {len(chunks)} chunks")
     return len(chunks)
@@ -329,7 +360,11 @@ def retrieve(
     query: str, 
     collection, 
     n_results: int = 5,
-    filter_source: str = None
+    filter_source: str = None,
+    mmr: bool = False,
+    fetch_k: int = 20,
+    lambda_mult: float = 0.5,
+    query_embedding=None
 ) -> list[dict]:
     """
     Retrieve relevant chunks with metadata.
@@ -339,17 +374,30 @@ def retrieve(
         collection: ChromaDB collection
         n_results: Number of results to return
         filter_source: Optional filename to filter by
+        mmr: Rerank with Maximal Marginal Relevance (fewer near-duplicate chunks)
+        fetch_k: Candidates fetched for MMR to choose from
+        lambda_mult: MMR trade-off, 1.0 = relevance only, 0.0 = diversity only
+        query_embedding: Already-embedded query (skips embedding it again)
     
     Returns:
-        List of {content, source, chunk_index, distance, metadata}
+        List of {id, content, source, chunk_index, distance, metadata}
     """
     # Build where clause if filtering
     where = {"source": filter_source} if filter_source else None
     
+    include = ["documents", "metadatas", "distances"]
+    if mmr:
+        include.append("embeddings")
+    
+    if query_embedding is not None:
+        search = {"query_embeddings": [query_embedding]}
+    else:
+        search = {"query_texts": [query]}
+    
     results = collection.query(
-        query_texts=[query],
-        n_results=n_results,
-        include=["documents", "metadatas", "distances"],
+        **search,
+        n_results=max(n_results, fetch_k) if mmr else n_results,
+        include=include,
         where=where
     )
     
@@ -357,10 +405,18 @@ def retrieve(
     if not results["documents"] or not results["documents"][0]:
         return []
     
+    order = range(len(results["documents"][0]))
+    if mmr:
+        # Stored embeddings + Chroma's distances: nothing gets re-embedded
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        relevance = distances_to_similarity(results["distances"][0], space)
+        order = mmr_select(relevance, results["embeddings"][0], n_results, lambda_mult)
+    
     retrieved = []
     
-    for i in range(len(results["documents"][0])):
+    for i in order:
         retrieved.append({
+            "id": results["ids"][0][i],
             "content": results["documents"][0][i],
             "source": results["metadatas"][0][i]["source"],
             "chunk_index": results["metadatas"][0][i]["chunk_index"],
@@ -372,76 +428,159 @@ def retrieve(
     return retrieved
 
 
-def format_context_with_sources(retrieved: list[dict]) -> str:
+def _chunk_header(n: int, block: dict) -> str:
+    """[Source n: file (chunk 3/10)] - or (chunks 3-4/10) for merged neighbours."""
+    total = block["item"].get("total_chunks", "?")
+    if block["first"] is None or block["first"] == block["last"]:
+        index = block["item"]["chunk_index"] if block["first"] is None else block["first"]
+        return f"[Source {n}: {block['source']} (chunk {index + 1}/{total})]"
+    return f"[Source {n}: {block['source']} (chunks {block['first'] + 1}-{block['last'] + 1}/{total})]"
+
+
+def assemble_sources(retrieved: list[dict], max_tokens: int = 3000) -> dict:
+    """
+    Merge overlapping/adjacent chunks and fit them into max_tokens.
+    
+    Returns assemble_context()'s dict: {context, citations, used_tokens, saved_tokens, dropped}
+    where citations maps each [Source N] to the indices in `retrieved` it covers.
+    """
+    return assemble_context(retrieved, budget_tokens=max_tokens, header=_chunk_header)
+
+
+def format_context_with_sources(retrieved: list[dict], max_tokens: int = 3000) -> str:
     """Format retrieved chunks with source labels for the prompt."""
     
     if not retrieved:
         return "No relevant context found."
     
-    context_parts = []
-    
-    for i, item in enumerate(retrieved, 1):
-        source = item["source"]
-        chunk_idx = item["chunk_index"]
-        total = item["total_chunks"]
-        content = item["content"]
-        
-        header = f"[Source {i}: {source} (chunk {chunk_idx + 1}/{total})]"
-        context_parts.append(f"{header}\n{content}")
-    
-    return "\n\n---\n\n".join(context_parts)
+    return assemble_sources(retrieved, max_tokens)["context"]
 
 
 # =============================================================================
 # Answer Generation with Citations
 # =============================================================================
 
-def generate_answer(
-    query: str, 
-    collection, 
-    n_results: int = 5,
-    model: str = "gpt-4o-mini"
-) -> dict:
-    """
-    Generate answer with source citations.
+INSUFFICIENT_ANSWER = "I don't have sufficient information about this in the provided documents."
+
+# Pre-generation gate: below these, the LLM would only say INSUFFICIENT_ANSWER
+MIN_CONFIDENCE = 0.25
+MAX_BEST_DISTANCE = 1.4
+# A jump this large between neighbouring distances ends the useful results
+DISTANCE_GAP = 0.25
+
+
+def retrieval_confidence(retrieved: list[dict]) -> float:
+    """Confidence from Chroma distances (0 = identical, higher = less similar)."""
+    avg_distance = sum(r["distance"] for r in retrieved) / len(retrieved)
+    min_distance = min(r["distance"] for r in retrieved)
     
-    Returns:
-        {
-            answer: str,
-            sources: list[str],
-            retrieved: list[dict],
-            confidence: float,
-            tokens_used: int
-        }
-    """
-    client = OpenAI()
+    # Convert to confidence (rough heuristic)
+    # Distance of 0.5 or less is usually good, 1.0+ is poor
+    confidence = max(0, min(1, 1 - (avg_distance / 2)))
     
-    # Retrieve relevant chunks
-    retrieved = retrieve(query, collection, n_results)
+    # Boost confidence if best match is very close
+    if min_distance < 0.3:
+        confidence = min(1, confidence + 0.1)
     
-    if not retrieved:
-        return {
-            "answer": "I don't have any relevant information in the loaded documents to answer this question.",
-            "sources": [],
-            "retrieved": [],
-            "confidence": 0.0,
-            "tokens_used": 0
-        }
+    return confidence
+
+
+def trim_at_distance_gap(retrieved: list[dict], gap: float = DISTANCE_GAP) -> list[dict]:
+    """
+    Drop results after the first sharp jump in distance.
     
-    # Format context with sources
-    context = format_context_with_sources(retrieved)
+    [0.31, 0.35, 0.92, 0.95] -> first two: the rest are a different topic
+    and would only cost prompt tokens.
     
-    # Build prompt
-    system_prompt = """You are a helpful assistant that answers questions based ONLY on the provided context.
+    The gap is found on the distances in sorted order, so results in MMR
+    pick order are trimmed the same way; the kept ones keep their order.
+    """
+    distances = sorted(r["distance"] for r in retrieved)
+    for i in range(1, len(distances)):
+        if distances[i] - distances[i - 1] > gap:
+            cutoff = distances[i - 1]
+            return [r for r in retrieved if r["distance"] <= cutoff]
+    return retrieved
+
+
+SYSTEM_PROMPT = f"""You are a helpful assistant that answers questions based ONLY on the provided context.
 
 IMPORTANT RULES:
 1. ONLY use information from the provided sources - never use outside knowledge
 2. Cite sources using [Source N] format when you use information from them
-3. If the context doesn't contain enough information, say "I don't have sufficient information about this in the provided documents."
+3. If the context doesn't contain enough information, say "{INSUFFICIENT_ANSWER}"
 4. Be accurate and concise
 5. If sources conflict, mention the discrepancy
 6. Never make up or infer information not explicitly in the sources"""
 
+
+def _prepare_answer(
+    query: str,
+    collection,
+    n_results: int,
+    context_tokens: int,
+    mmr: bool,
+    use_cache: bool,
+    min_confidence: float,
+    max_best_distance: float,
+    distance_gap: float
+) -> dict:
+    """
+    Everything before the completion call: retrieve, gate, cache lookup, prompt.
+    
+    Returns {"result": ...} when no LLM call is needed, otherwise
+    {"result": None, "messages", "retrieved", "sources", "citations",
+     "confidence", "query_embedding", "chunk_ids"}.
+    """
+    # Embed once: used for both the search and the answer cache lookup
+    query_embedding = embed_query(collection, query)
+    
+    # Retrieve relevant chunks
+    retrieved = retrieve(query, collection, n_results, mmr=mmr, query_embedding=query_embedding)
+    
+    if not retrieved:
+        return {"result": {
+            "answer": "I don't have any relevant information in the loaded documents to answer this question.",
+            "sources": [],
+            "retrieved": [],
+            "citations": {},
+            "confidence": 0.0,
+            "tokens_used": 0,
+            "cached": False,
+            "early_exit": True
+        }}
+    
+    # Only the results before a sharp relevance drop go into the prompt
+    if distance_gap is not None:
+        retrieved = trim_at_distance_gap(retrieved, distance_gap)
+    confidence = retrieval_confidence(retrieved)
+    
+    # Gate before paying for a completion that can only say "not enough information"
+    best_distance = min(r["distance"] for r in retrieved)
+    if ((max_best_distance is not None and best_distance > max_best_distance)
+            or (min_confidence is not None and confidence < min_confidence)):
+        return {"result": {
+            "answer": INSUFFICIENT_ANSWER,
+            "sources": [],
+            "retrieved": retrieved,
+            "citations": {},
+            "confidence": confidence,
+            "tokens_used": 0,
+            "cached": False,
+            "early_exit": True
+        }}
+    
+    # Same chunks + paraphrased question -> the earlier answer still holds
+    chunk_ids = [r["id"] for r in retrieved]
+    if use_cache:
+        cached = answer_cache.lookup(query_embedding, chunk_ids)
+        if cached is not None:
+            return {"result": {**cached, "tokens_used": 0, "cached": True, "early_exit": False}}
+    
+    # Format context with sources (overlapping neighbours merged, within budget)
+    assembled = assemble_sources(retrieved, context_tokens)
+    context = assembled["context"]
+    
     user_prompt = f"""Context from documents:
 
 {context}
@@ -451,41 +590,169 @@ IMPORTANT RULES:
 Question: {query}
 
 Provide an answer based ONLY on the context above. Cite your sources using [Source N] format."""
+    
+    return {
+        "result": None,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        "retrieved": retrieved,
+        # List unique sources
+        "sources": list(dict.fromkeys(r["source"] for r in retrieved)),  # Preserves order
+        "citations": assembled["citations"],
+        "confidence": confidence,
+        "query_embedding": query_embedding,
+        "chunk_ids": chunk_ids
+    }
+
 
+def generate_answer(
+    query: str, 
+    collection, 
+    n_results: int = 5,
+    model: str = "gpt-4o-mini",
+    context_tokens: int = 3000,
+    mmr: bool = False,
+    use_cache: bool = True,
+    min_confidence: float = MIN_CONFIDENCE,
+    max_best_distance: float = MAX_BEST_DISTANCE,
+    distance_gap: float = DISTANCE_GAP
+) -> dict:
+    """
+    Generate answer with source citations.
+    
+    Weak retrieval (best distance > max_best_distance or confidence <
+    min_confidence) returns INSUFFICIENT_ANSWER without calling the LLM.
+    Results after a sharp distance jump (> distance_gap) are left out of
+    the prompt. Pass None to turn either off.
+    
+    Returns:
+        {
+            answer: str,
+            sources: list[str],
+            retrieved: list[dict],
+            citations: dict,       # [Source N] -> indices into retrieved
+            confidence: float,
+            tokens_used: int,
+            cached: bool,          # answer reused from answer_cache
+            early_exit: bool       # weak retrieval, no LLM call
+        }
+    """
+    prepared = _prepare_answer(query, collection, n_results, context_tokens, mmr, use_cache,
+                               min_confidence, max_best_distance, distance_gap)
+    if prepared["result"] is not None:
+        return prepared["result"]
+    
+    client = OpenAI()
+    
     # Generate response
     response = client.chat.completions.create(
         model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
+        messages=prepared["messages"],
         temperature=0.1  # Low temperature for factual answers
     )
     
-    answer = response.choices[0].message.content
+    result = {
+        "answer": response.choices[0].message.content,
+        "sources": prepared["sources"],
+        "retrieved": prepared["retrieved"],
+        "citations": prepared["citations"],
+        "confidence": prepared["confidence"],
+        "tokens_used": response.usage.total_tokens,
+        "cached": False,
+        "early_exit": False
+    }
     
-    # Calculate confidence based on relevance (lower distance = more relevant)
-    # ChromaDB distance: 0 = identical, higher = less similar
-    avg_distance = sum(r["distance"] for r in retrieved) / len(retrieved)
-    min_distance = min(r["distance"] for r in retrieved)
+    if use_cache:
+        answer_cache.store(query, prepared["query_embedding"], prepared["chunk_ids"], result)
+    return result
+
+
+def stream_answer(
+    query: str,
+    collection,
+    n_results: int = 5,
+    model: str = "gpt-4o-mini",
+    context_tokens: int = 3000,
+    mmr: bool = False,
+    use_cache: bool = True,
+    min_confidence: float = MIN_CONFIDENCE,
+    max_best_distance: float = MAX_BEST_DISTANCE,
+    distance_gap: float = DISTANCE_GAP
+):
+    """
+    Streaming generate_answer: sources are available before the first token.
     
-    # Convert to confidence (rough heuristic)
-    # Distance of 0.5 or less is usually good, 1.0+ is poor
-    confidence = max(0, min(1, 1 - (avg_distance / 2)))
+    Yields events in order:
+        {"type": "sources", "sources", "retrieved", "citations", "confidence"}
+        {"type": "delta", "text"}                     # one per streamed chunk
+        {"type": "usage", "answer", "tokens_used", "cached", "early_exit"}
     
-    # Boost confidence if best match is very close
-    if min_distance < 0.3:
-        confidence = min(1, confidence + 0.1)
+    Cached and gated answers arrive as a single delta.
+    """
+    prepared = _prepare_answer(query, collection, n_results, context_tokens, mmr, use_cache,
+                               min_confidence, max_best_distance, distance_gap)
+    done = prepared["result"] or prepared
+    
+    yield {
+        "type": "sources",
+        "sources": done["sources"],
+        "retrieved": done["retrieved"],
+        "citations": done["citations"],
+        "confidence": done["confidence"]
+    }
+    
+    if prepared["result"] is not None:
+        result = prepared["result"]
+        yield {"type": "delta", "text": result["answer"]}
+        yield {
+            "type": "usage",
+            "answer": result["answer"],
+            "tokens_used": result["tokens_used"],
+            "cached": result["cached"],
+            "early_exit": result["early_exit"]
+        }
+        return
     
-    # List unique sources
-    sources_used = list(dict.fromkeys(r["source"] for r in retrieved))  # Preserves order
+    client = OpenAI()
     
-    return {
+    stream = client.chat.completions.create(
+        model=model,
+        messages=prepared["messages"],
+        temperature=0.1,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    
+    parts = []
+    tokens_used = 0
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield {"type": "delta", "text": chunk.choices[0].delta.content}
+        if chunk.usage:
+            tokens_used = chunk.usage.total_tokens
+    
+    answer = "".join(parts)
+    if use_cache:
+        answer_cache.store(query, prepared["query_embedding"], prepared["chunk_ids"], {
+            "answer": answer,
+            "sources": prepared["sources"],
+            "retrieved": prepared["retrieved"],
+            "citations": prepared["citations"],
+            "confidence": prepared["confidence"],
+            "tokens_used": tokens_used,
+            "cached": False,
+            "early_exit": False
+        })
+    
+    yield {
+        "type": "usage",
         "answer": answer,
-        "sources": sources_used,
-        "retrieved": retrieved,
-        "confidence": confidence,
-        "tokens_used": response.usage.total_tokens
+        "tokens_used": tokens_used,
+        "cached": False,
+        "early_exit": False
     }
 
 
@@ -493,11 +760,18 @@ def query(
     question: str, 
     collection, 
     n_results: int = 5,
-    verbose: bool = True
+    verbose: bool = True,
+    stream: bool = False
 ) -> dict:
     """
     Main query function - retrieve and generate answer.
+    
+    stream=True prints sources and confidence as soon as retrieval is done,
+    then the answer as it is generated.
     """
+    if stream:
+        return _stream_query(question, collection, n_results, verbose)
+    
     result = generate_answer(question, collection, n_results)
     
     if verbose:
@@ -507,7 +781,36 @@ def query(
         print(f"\n💡 Answer:\n{result['answer']}")
         print(f"\n📚 Sources: {', '.join(result['sources']) if result['sources'] else 'None'}")
         print(f"📊 Confidence: {result['confidence']:.0%}")
-        print(f"🔤 Tokens: {result['tokens_used']}")
+        note = " (cached answer)" if result["cached"] else " (weak retrieval, no LLM call)" if result["early_exit"] else ""
+        print(f"🔤 Tokens: {result['tokens_used']}{note}")
+    
+    return result
+
+
+def _stream_query(question: str, collection, n_results: int, verbose: bool) -> dict:
+    """query(stream=True): same result dict, printed while it streams."""
+    result = {}
+    
+    for event in stream_answer(question, collection, n_results):
+        if event["type"] == "sources":
+            result.update(sources=event["sources"], retrieved=event["retrieved"],
+                          citations=event["citations"], confidence=event["confidence"])
+            if verbose:
+                print(f"\n{'─'*60}")
+                print(f"❓ Question: {question}")
+                print(f"{'─'*60}")
+                print(f"\n📚 Sources: {', '.join(event['sources']) if event['sources'] else 'None'}")
+                print(f"📊 Confidence: {event['confidence']:.0%}")
+                print(f"\n💡 Answer:")
+        elif event["type"] == "delta":
+            if verbose:
+                print(event["text"], end="", flush=True)
+        else:
+            result.update(answer=event["answer"], tokens_used=event["tokens_used"],
+                          cached=event["cached"], early_exit=event["early_exit"])
+            if verbose:
+                note = " (cached answer)" if event["cached"] else " (weak retrieval, no LLM call)" if event["early_exit"] else ""
+                print(f"\n\n🔤 Tokens: {event['tokens_used']}{note}")
     
     return result
 
@@ -587,29 +890,16 @@ def test_with_questions(collection, questions: list[str] = None) -> list[dict]:
 
 
 def get_collection_stats(collection) -> dict:
-    """Get stats about what's in the collection."""
-    
-    count = collection.count()
-    
-    if count == 0:
-        return {"total_chunks": 0, "sources": [], "by_type": {}}
-    
-    # Get all metadata
-    all_data = collection.get(include=["metadatas"])
-    
-    sources = set()
-    by_type = {}
+    """
+    Get stats about what's in the collection.
     
-    for meta in all_data["metadatas"]:
-        sources.add(meta.get("source", "unknown"))
-        file_type = meta.get("file_type", "unknown")
-        by_type[file_type] = by_type.get(file_type, 0) + 1
+    Read from the incrementally updated sidecar (see shared.collection_stats),
+    so this doesn't scan the collection.
     
-    return {
-        "total_chunks": count,
-        "sources": sorted(sources),
-        "by_type": by_type
-    }
+    Returns:
+        {total_chunks, sources, by_type, by_source, total_tokens, last_ingest}
+    """
+    return collection_stats(collection).snapshot()
 
 
 # =============================================================================
@@ -660,6 +950,10 @@ def main():
             continue
         
         if question.lower() == 'quit':
+            cache = answer_cache.summary()
+            if cache["lookups"]:
+                print(f"🗃️  Answer cache: {cache['hits']}/{cache['lookups']} hits, "
+                      f"{cache['tokens_saved']} tokens saved")
             print("👋 Goodbye!")
             break
         
@@ -678,9 +972,12 @@ def main():
             print(f"   Total chunks: {stats['total_chunks']}")
             print(f"   Sources ({len(stats['sources'])}): {', '.join(stats['sources'])}")
             print(f"   By type: {stats['by_type']}")
+            print(f"   Tokens: {stats['total_tokens']:,}")
+            if stats["last_ingest"]:
+                print(f"   Last ingest: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats['last_ingest']))}")
             continue
         
-        query(question, collection)
+        query(question, collection, stream=True)
 
 
 if __name__ == "__main__":
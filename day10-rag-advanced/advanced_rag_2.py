@@ -1,33 +1,36 @@
-import os, logging
+import os, logging, time
 from pathlib import Path
 import chromadb
 from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from shared import (load_config, setup_api, get_user_input, setup_logging,
-                    save_chat_log, get_ai_response,  display_response)
+                    ChatLogWriter, get_ai_response,  display_response,
+                    pack_context, speculative_retrieve, read_elements,
+                    RetrievalCache, bump_collection_version,
+                    memoized_rewrite, cached_rewrite, rewrite_stats, rewrite_calls_avoided,
+                    merge_chunks)
 from dotenv import load_dotenv
-from unstructured.partition.auto import partition 
 
 
 
 load_dotenv()
 
+# Repeated/rephrased questions skip the embedding call and the Chroma query
+retrieval_cache = RetrievalCache(max_entries=256, ttl=600)
+
 
 def read_document_with_metadata(file_path: str) -> dict:
     """Read document, return elements with page tracking."""
-    elements = partition(filename=file_path)
+    # Fast readers for txt/md/csv/json/pdf, unstructured's partition for the rest
+    elements = read_elements(file_path)
     path = Path(file_path)
     
     parsed = []
     for el in elements:
-        text = str(el).strip()
+        text = el["text"].strip()
         if not text:
             continue
         
-        page = None
-        if hasattr(el, 'metadata') and hasattr(el.metadata, 'page_number'):
-            page = el.metadata.page_number
-        
-        parsed.append({"text": text, "page": page})
+        parsed.append({"text": text, "page": el["page"]})
     
     return {
         "filename": path.name,
@@ -173,38 +176,60 @@ def ingest_chunks(collection, chunks):
         for c in chunks
     ]
 )
+    bump_collection_version(collection)
     return collection
 
-def query_rag(question: str, collection, n_results: int = 10) -> list[dict]:
+def query_rag(question: str, collection, n_results: int = 10, where: dict = None) -> list[dict]:
     """
     Query and return relevant chunks with metadata.
     
+    Results are cached per (normalized question, n_results, where) until the
+    collection changes - see retrieval_cache. Overlapping chunks from the
+    same source are merged so the repeated words are only sent once.
+    
     Returns:
         [
             {"text": str, "source": str, "page": int},
             ...
         ]
     """
+    cached = retrieval_cache.get(collection, question, n_results, where)
+    if cached is not None:
+        return cached
+    
+    start = time.perf_counter()
     results = collection.query(
         query_texts=[question],
         n_results=n_results,
+        where=where,
         include=["documents", "metadatas"]
     )
     
     if not results["documents"][0]:
+        retrieval_cache.put(collection, question, n_results, [], time.perf_counter() - start, where)
         return []
     
+    items = [
+        {
+            "content": text,
+            "source": meta.get("source", "Unknown"),
+            "page": meta.get("page") or None,
+        }
+        for text, meta in zip(results["documents"][0], results["metadatas"][0])
+    ]
+    
     chunks = []
-    for i in range(len(results["documents"][0])):
-        text = results["documents"][0][i]
-        source = results["metadatas"][0][i].get("source", "Unknown")
-        page = results["metadatas"][0][i].get("page")
+    for block in merge_chunks(items):
+        source = block["source"]
+        text = block["text"]
         
-        if page:
-            chunks.append(f"[{source}, Page {page}]\n{text}")
+        if block["pages"]:
+            pages = ", ".join(str(p) for p in block["pages"])
+            chunks.append(f"[{source}, Page {pages}]\n{text}")
         else:
             chunks.append(f"[{source}]\n{text}")
     
+    retrieval_cache.put(collection, question, n_results, chunks, time.perf_counter() - start, where)
     return chunks
 
 def rewrite_query(messages:list[dict], current_query:str, client) ->str:
@@ -232,14 +257,17 @@ Examples:
     rewriter_prompt.extend(recent_history)
     rewriter_prompt.append({"role": "user", "content": current_query})
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=rewriter_prompt,
-        temperature=0,
-        max_tokens=100
-    )
+    def call_rewriter():
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=rewriter_prompt,
+            temperature=0,
+            max_tokens=100
+        )
+        return response.choices[0].message.content
 
-    return response.choices[0].message.content
+    # speculative_retrieve already skipped standalone questions; reuse repeats
+    return memoized_rewrite(recent_history, current_query, call_rewriter, check_standalone=False)
 
 
 def main():
@@ -323,6 +351,7 @@ def main():
                     for c in chunks
                 ]
             )
+            bump_collection_version(collection)
             total_chunks += len(chunks)
             logger.info(f"   Done!")
             
@@ -333,45 +362,65 @@ def main():
 
     # Query loop
     query_count = 0
+    chat_log = ChatLogWriter()
+    chat_log.write_many(messages)
     
     while True:
         user_input = get_user_input()
         
         if user_input.lower() == "quit":
-            logger.info("Saving chat log...")
-            save_name = input("Enter filename to save log: ")
-            save_chat_log(messages, save_name)
+            chat_log.close()
+            logger.info(f"Chat log saved to {chat_log.path}")
             logger.info(f"Session ended. {query_count} queries processed.")
+            logger.info(f"Retrieval cache: {retrieval_cache.summary()}")
+            logger.info(f"Rewrite calls avoided: {rewrite_calls_avoided()} ({rewrite_stats})")
             break
         
         query_count += 1
         logger.info(f"Query #{query_count}: {user_input}")
         
-        rewritten_query = rewrite_query(messages, user_input, client)
-        logger.info(f"Rewritten: {rewritten_query}")
-        
-        context = query_rag(rewritten_query, collection, n_results=5)
-        logger.info(f"Retrieved {len(context)} chunks")
-        
-        context = " ".join(context)
+        # Search the raw question while the rewrite runs; skip the rewrite
+        # entirely when the question is already standalone
+        retrieval = speculative_retrieve(
+            user_input,
+            rewrite=lambda q: rewrite_query(messages, q, client),
+            retrieve=lambda q: query_rag(q, collection, n_results=5),
+            has_history=len(messages) > 1,
+            k=5,
+            cached=lambda q: cached_rewrite(messages[-6:], q),
+        )
+        context = retrieval["results"]
+        timings = retrieval["timings"]
+        logger.info(f"Rewritten: {retrieval['search_query']}" if retrieval["rewritten"] else "Rewrite skipped (standalone question)")
+        logger.info(f"Retrieved {len(context)} chunks in {timings['total']:.2f}s "
+                    f"(rewrite={timings['rewrite']:.2f}s raw_search={timings['raw_search']:.2f}s "
+                    f"rewritten_search={timings['rewritten_search']:.2f}s saved~{timings['saved']:.2f}s)")
 
-        temp_messages = [
-            {"role": "system", "content": f"""Answer based on this context only:
+        # Fit system prompt, chunks and history to the model's token budget
+        packed = pack_context(
+            messages[0]["content"],
+            user_input,
+            history=messages[1:],
+            chunks=context,
+            model=config.get("model", "gpt-4.1-nano"),
+            context_template="""Answer based on this context only:
                 {context}
                 
                 If the context doesn't answer the question, respond with: I don't have
-                information about that in the document"""}
-        ]
-
-        for msg in messages[-8:]:
-            temp_messages.append(msg)
-        
-        temp_messages.append({"role": "user", "content": user_input})
+                information about that in the document""",
+            chunk_separator=" ",
+        )
+        temp_messages = packed["messages"]
+        dropped = packed["dropped"]
+        logger.info(f"Prompt: {packed['used_tokens']}/{packed['budget']} tokens, "
+                    f"dropped {len(dropped['history'])} history msgs ({dropped['history_tokens']} tokens) "
+                    f"and {len(dropped['chunks'])} chunks ({dropped['chunk_tokens']} tokens)")
 
         reply = get_ai_response(client, temp_messages, config)
 
         messages.append({"role": "user", "content": user_input})
         messages.append({"role": "assistant", "content": reply})
+        chat_log.write_many(messages[-2:])
 
         display_response(reply)
 
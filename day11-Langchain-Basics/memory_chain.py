@@ -1,8 +1,9 @@
 from langchain_anthropic import ChatAnthropic
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_core.chat_history import InMemoryChatMessageHistory
 from dotenv import load_dotenv
+
+from shared import SessionHistoryStore
 load_dotenv()
 
 # Setup
@@ -16,11 +17,15 @@ prompt = ChatPromptTemplate.from_messages([
 
 chain = prompt | model
 
-store = {}
-def get_session_history(session_id: str):
-    if session_id not in store:
-        store[session_id] = InMemoryChatMessageHistory()
-    return store[session_id]
+# Bounded per-session histories: LRU + 30 min idle TTL, 40 messages each,
+# evicted sessions spill to SQLite and come back when the user returns
+store = SessionHistoryStore(
+    max_sessions=1000,
+    ttl=30 * 60,
+    max_messages=40,
+    spill_path="logs/chat_sessions.db",
+)
+get_session_history = store.get_session_history
 
 chatbot = RunnableWithMessageHistory(
     chain,
@@ -38,6 +43,8 @@ while True:
     user_input = input("You: ")
     
     if user_input.lower() == 'quit':
+        print(f"Session store: {store.metrics()}")
+        store.close()
         break
     
     response = chatbot.invoke({"input": user_input}, config=config)
@@ -30,6 +30,8 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_community.chat_message_histories import ChatMessageHistory
 from dotenv import load_dotenv
 
+from shared import stream_ingest
+
 load_dotenv()
 
 
@@ -42,6 +44,7 @@ CONFIG = {
     # Document processing
     "chunk_size": 500,
     "chunk_overlap": 50,
+    "window_pages": 8,          # pages parsed + embedded per batch
     
     # Models
     "embedding_model": "text-embedding-3-small",
@@ -113,48 +116,50 @@ def save_uploaded_file(uploaded_file) -> str:
     return temp_path
 
 
-def load_and_chunk_pdf(file_path: str) -> list:
+def create_vector_store() -> Chroma:
     """
-    Load PDF and split into chunks.
-    
-    Input:  file_path (str)
-    Output: chunks (List[Document])
+    Create an empty vector store for the uploaded document.
     
-    FLOW: PDF file → Pages (List[Document]) → Chunks (List[Document])
+    Output: vector_store (Chroma)
     """
-    # Load PDF into pages
-    loader = PyPDFLoader(file_path)
-    pages = loader.load()
+    embeddings = OpenAIEmbeddings(model=CONFIG["embedding_model"])
     
-    # Split pages into chunks
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CONFIG["chunk_size"],
-        chunk_overlap=CONFIG["chunk_overlap"],
-        add_start_index=True,
+    vector_store = Chroma(
+        collection_name="uploaded_document",
+        embedding_function=embeddings,
     )
-    chunks = splitter.split_documents(pages)
     
-    return chunks
+    return vector_store
 
 
-def create_vector_store(chunks: list) -> Chroma:
+def load_and_chunk_pdf(file_path: str, vector_store: Chroma, on_window=None) -> dict:
     """
-    Create embeddings and store in vector database.
+    Stream a PDF into the vector store, a few pages at a time.
     
-    Input:  chunks (List[Document])
-    Output: vector_store (Chroma)
+    Input:  file_path (str), vector_store (Chroma)
+    Output: stats {pages, chunks, windows, first_searchable_s, total_s}
     
-    FLOW: Chunks → Embeddings (via OpenAI) → Stored in ChromaDB
+    FLOW: PDF file → page window (lazy_load) → Chunks → Embeddings → ChromaDB → next window
+    
+    WHY: loader.load() holds every page in memory before anything is
+            embedded. Windows keep memory flat and the first pages are
+            searchable before the last ones are parsed.
     """
-    embeddings = OpenAIEmbeddings(model=CONFIG["embedding_model"])
+    loader = PyPDFLoader(file_path)
     
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        collection_name="uploaded_document",
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CONFIG["chunk_size"],
+        chunk_overlap=CONFIG["chunk_overlap"],
+        add_start_index=True,
     )
     
-    return vector_store
+    return stream_ingest(
+        loader,
+        splitter,
+        vector_store,
+        window_pages=CONFIG["window_pages"],
+        on_window=on_window,
+    )
 
 
 # ╔═══════════════════════════════════════════════════════════════════════════╗
@@ -232,7 +237,7 @@ def create_rag_chain(vector_store: Chroma):
 
 def process_document(uploaded_file) -> bool:
     """
-    Full pipeline: Upload → Save → Load → Chunk → Embed → Store → Chain
+    Full pipeline: Upload → Save → (Load → Chunk → Embed → Store, per page window) → Chain
     
     Input:  uploaded_file (Streamlit UploadedFile)
     Output: success (bool)
@@ -247,14 +252,16 @@ def process_document(uploaded_file) -> bool:
             status.write("📁 Saving file...")
             file_path = save_uploaded_file(uploaded_file)
             
-            # Step 2: Load and chunk
-            status.write("📄 Loading and splitting PDF...")
-            chunks = load_and_chunk_pdf(file_path)
-            status.write(f"   Created {len(chunks)} chunks")
-            
-            # Step 3: Create vector store
-            status.write("🧮 Creating embeddings...")
-            vector_store = create_vector_store(chunks)
+            # Step 2 + 3: Load, chunk and embed, a page window at a time
+            status.write("📄 Loading, splitting and embedding PDF...")
+            vector_store = create_vector_store()
+            progress = status.empty()
+            stats = load_and_chunk_pdf(
+                file_path,
+                vector_store,
+                on_window=lambda s: progress.write(f"   {s['pages']} pages → {s['chunks']} chunks"),
+            )
+            progress.write(f"   Created {stats['chunks']} chunks from {stats['pages']} pages")
             
             # Step 4: Create RAG chain
             status.write("🔗 Building RAG chain...")
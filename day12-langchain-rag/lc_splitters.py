@@ -1,8 +1,12 @@
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter, CharacterTextSplitter, TokenTextSplitter
 
+from shared.stream_ingest import iter_page_windows
+
 loader = PyPDFLoader("./docs/12mb.pdf")
-doc = loader.load()
+# Only the first page window is needed to compare splitters; no need to
+# parse all 12 MB with loader.load()
+doc = next(iter_page_windows(loader))
 
 
 # print(doc[0].page_content[:100])
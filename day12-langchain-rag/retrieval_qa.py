@@ -6,6 +6,8 @@ from langchain_classic.chains.retrieval import create_retrieval_chain
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain 
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+
+from shared import stream_ingest
 load_dotenv()
 
 
@@ -33,7 +35,6 @@ llm = ChatOpenAI(temperature=0.2, model="gpt-5.2", streaming=True)
 # )
 
 loader = PyPDFLoader("./docs/2601.20452v1.pdf")
-doc = loader.load()
 
 
 
@@ -54,18 +55,8 @@ vector_store = Chroma(
     embedding_function= embeddings
 )
 
-chunks = text_splitter.split_documents(doc)
-
-
-# for doc in loader.lazy_load():
-#     chunks = text_splitter.split_documents([doc])
-
-
-#     vector_store.add_documents(
-#         documents= chunks
-#     )
-
-vector_store.add_documents(documents=chunks)
+# Pages are loaded, split and embedded a window at a time (lazy_load)
+stream_ingest(loader, text_splitter, vector_store)
 
 question_answer_chain = create_stuff_documents_chain(llm, prompt)
 rag_chain = create_retrieval_chain(vector_store.as_retriever(), question_answer_chain)
@@ -8,11 +8,12 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 import os
+
+from shared import stream_ingest
 load_dotenv()
 
 
 loader = PyPDFLoader(file_path= r"./books/Antifragile (Nassim Nicholas Taleb) (Z-Library).pdf")
-doc = loader.load()
 
 
 
@@ -20,9 +21,9 @@ embedding = OpenAIEmbeddings(model= 'text-embedding-3-small')
 
 splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap = 200)
 
-chunks = splitter.split_documents(doc)
-
-vector_store = Chroma.from_documents(documents=chunks, embedding= embedding)
+# Whole book: stream it in page windows instead of loader.load()
+vector_store = Chroma(embedding_function= embedding)
+stream_ingest(loader, splitter, vector_store)
 
 llm = ChatAnthropic(model ="claude-3-haiku-20240307", temperature=0.2)
 
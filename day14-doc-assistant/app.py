@@ -10,9 +10,13 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone
 from langchain_experimental.text_splitter import SemanticChunker
-import uuid, os, json, asyncio, time
+import uuid, os, asyncio, time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from dotenv import load_dotenv
 
+from shared import speculative_retrieve_async, ParentStore
+
 load_dotenv()
 
 
@@ -53,12 +57,34 @@ log = logging.getLogger("doc_assistant")
 DOCS_DIR = Path(__file__).parent / "docs"
 INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "doc-assistant")
 MAX_RECENT_PAIRS = 3
+SEARCH_TIMEOUT = 10      # seconds per vector search
+SEARCH_WORKERS = 8       # blocking searches allowed in flight at once
+PARENT_STORE_PATH = "parent_store.db"
+PARENT_STORE_BUILD_PATH = "parent_store.db.building"   # ingest writes here, then swaps it in
+LEGACY_PARENT_STORE = "parent_store.json"   # imported once if the .db doesn't exist yet
 
 # _______ Shared Tools _______
 
 embedding = OpenAIEmbeddings(model="text-embedding-3-small")
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.3)
 
+# The Pinecone client is blocking. Searches run on a bounded pool so the
+# event loop (and other sessions in the same process) keeps moving.
+search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+
+
+async def search_children(vectorstore, query, k=10, timeout=SEARCH_TIMEOUT):
+    """Similarity search off the event loop. Returns [] if it takes longer than `timeout`."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(search_pool, partial(vectorstore.similarity_search, query, k=k)),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        log.warning(f"Vector search timed out after {timeout}s: \"{query[:80]}\"")
+        return []
+
 
 # _______ Ingest _______
 
@@ -86,92 +112,107 @@ async def ingest():
         min_chunk_size=50
     )
 
-    parent_store = {}
+    # Parents go to disk as they're made; nothing keeps them all in memory.
+    # They're built in a separate file that replaces PARENT_STORE_PATH only
+    # once the upload succeeds, so a failed ingest leaves the old store intact.
+    parent_store = ParentStore(PARENT_STORE_BUILD_PATH)
+    parent_store.clear()
+    parent_count = 0
     all_children = []
     available_docs = set()
-
-    for doc in loader.lazy_load():
-        source = Path(doc.metadata.get("source", "unknown")).name
-        doc.metadata["source"] = source
-        available_docs.add(source)
-
-        doc_start = time.time()
-        doc_children = 0
-
-        parent_chunks = parent_splitter.split_documents([doc])
-        log.debug(f"{source}: {len(parent_chunks)} parent chunks created")
-
-        for parent_chunk in parent_chunks:
-            parent_id = str(uuid.uuid4())
-
-            parent_store[parent_id] = {
-                "content": parent_chunk.page_content,
-                "metadata": parent_chunk.metadata
-            }
-
-            try:
-                child_chunks = child_splitter.split_documents([parent_chunk])
-            except Exception as e:
-                log.warning(f"Semantic chunking failed for parent {parent_id[:8]}: {e}")
-                continue
-
-            for i, child in enumerate(child_chunks):
-                child.metadata["parent_id"] = parent_id
-                child.metadata["child_index"] = i
-                all_children.append(child)
-                doc_children += 1
-
-        doc_time = time.time() - doc_start
-        log.info(f"✅ {source}: {len(parent_chunks)} parents, {doc_children} children, {doc_time:.1f}s")
-
-    log.info(f"Total parents: {len(parent_store)}")
-    log.info(f"Total children: {len(all_children)}")
-
-    if not all_children:
-        log.error("No children created. Nothing to upload.")
-        return parent_store, available_docs
-
-    # Clear old vectors
-    pc = Pinecone()
-    index = pc.Index(INDEX_NAME)
-    index.delete(delete_all=True)
-    log.info("Cleared old vectors from Pinecone")
-
-    # Async upload
-    log.info("Uploading to Pinecone...")
-    upload_start = time.time()
-
-    BATCH_SIZE = 100
-    batches = [all_children[i:i + BATCH_SIZE] for i in range(0, len(all_children), BATCH_SIZE)]
-
-    async def upload_batch(batch, batch_num):
-        batch_start = time.time()
-        await PineconeVectorStore.afrom_documents(
-            batch,
-            embedding,
-            index_name=INDEX_NAME
-        )
-        batch_time = time.time() - batch_start
-        log.debug(f"Batch {batch_num + 1}/{len(batches)}: {len(batch)} chunks in {batch_time:.1f}s")
-
-    CONCURRENT_LIMIT = 5
-    for i in range(0, len(batches), CONCURRENT_LIMIT):
-        concurrent_batches = batches[i:i + CONCURRENT_LIMIT]
-        tasks = [
-            upload_batch(batch, i + j)
-            for j, batch in enumerate(concurrent_batches)
-        ]
-        await asyncio.gather(*tasks)
+    vectors_cleared = False
+
+    try:
+        for doc in loader.lazy_load():
+            source = Path(doc.metadata.get("source", "unknown")).name
+            doc.metadata["source"] = source
+            available_docs.add(source)
+
+            doc_start = time.time()
+            doc_children = 0
+
+            parent_chunks = parent_splitter.split_documents([doc])
+            log.debug(f"{source}: {len(parent_chunks)} parent chunks created")
+
+            for parent_chunk in parent_chunks:
+                parent_id = str(uuid.uuid4())
+
+                parent_store.put(parent_id, parent_chunk.page_content, parent_chunk.metadata)
+                parent_count += 1
+
+                try:
+                    child_chunks = child_splitter.split_documents([parent_chunk])
+                except Exception as e:
+                    log.warning(f"Semantic chunking failed for parent {parent_id[:8]}: {e}")
+                    continue
+
+                for i, child in enumerate(child_chunks):
+                    child.metadata["parent_id"] = parent_id
+                    child.metadata["child_index"] = i
+                    all_children.append(child)
+                    doc_children += 1
+
+            parent_store.commit()
+            doc_time = time.time() - doc_start
+            log.info(f"✅ {source}: {len(parent_chunks)} parents, {doc_children} children, {doc_time:.1f}s")
+
+        log.info(f"Total parents: {parent_count}")
+        log.info(f"Total children: {len(all_children)}")
+
+        if not all_children:
+            log.error("No children created. Nothing to upload; keeping the existing parent store.")
+            parent_store.discard()
+            return ParentStore(PARENT_STORE_PATH), available_docs
+
+        # Clear old vectors
+        pc = Pinecone()
+        index = pc.Index(INDEX_NAME)
+        index.delete(delete_all=True)
+        vectors_cleared = True
+        log.info("Cleared old vectors from Pinecone")
+
+        # Async upload
+        log.info("Uploading to Pinecone...")
+        upload_start = time.time()
+
+        BATCH_SIZE = 100
+        batches = [all_children[i:i + BATCH_SIZE] for i in range(0, len(all_children), BATCH_SIZE)]
+
+        async def upload_batch(batch, batch_num):
+            batch_start = time.time()
+            await PineconeVectorStore.afrom_documents(
+                batch,
+                embedding,
+                index_name=INDEX_NAME
+            )
+            batch_time = time.time() - batch_start
+            log.debug(f"Batch {batch_num + 1}/{len(batches)}: {len(batch)} chunks in {batch_time:.1f}s")
+
+        CONCURRENT_LIMIT = 5
+        for i in range(0, len(batches), CONCURRENT_LIMIT):
+            concurrent_batches = batches[i:i + CONCURRENT_LIMIT]
+            tasks = [
+                upload_batch(batch, i + j)
+                for j, batch in enumerate(concurrent_batches)
+            ]
+            await asyncio.gather(*tasks)
+    except BaseException:
+        if vectors_cleared:
+            # The old children are gone; whatever did upload points at the new parents
+            log.error("Upload failed part way; publishing the new parent store for the uploaded children")
+            parent_store.publish(PARENT_STORE_PATH)
+        else:
+            parent_store.discard()
+        raise
 
     upload_time = time.time() - upload_start
     total_time = time.time() - start_time
     log.info(f"Upload complete: {len(all_children)} chunks in {upload_time:.1f}s")
     log.info(f"Total ingest time: {total_time:.1f}s")
 
-    # Save parent store
-    with open("parent_store.json", "w") as f:
-        json.dump(parent_store, f)
-    log.info(f"Saved parent_store.json ({len(parent_store)} parents)")
+    parent_store.publish(PARENT_STORE_PATH)
+    parent_store = ParentStore(PARENT_STORE_PATH)
+    log.info(f"Saved {parent_count} parents to {PARENT_STORE_PATH}")
 
     # Log summary stats
     sizes = [len(c.page_content) for c in all_children]
@@ -183,7 +224,7 @@ async def ingest():
 # _______ Chat _______
 
 async def chat(parent_store):
-    log.info(f"Starting chat with {len(parent_store)} parents")
+    log.info(f"Starting chat with parent store {parent_store.path}")
 
     vectorstore = PineconeVectorStore.from_existing_index(
         index_name=INDEX_NAME,
@@ -235,23 +276,45 @@ Updated summary:""")
     answer_chain = answer_prompt | llm | StrOutputParser()
     summary_chain = summary_prompt | llm | StrOutputParser()
 
+    async def summarize(old_summary, messages):
+        start = time.time()
+        new_summary = await summary_chain.ainvoke({
+            "old_summary": old_summary or "No previous summary.",
+            "new_messages": "\n".join(
+                f"{'Human' if m['role'] == 'human' else 'AI'}: {m['content']}"
+                for m in messages
+            ),
+        })
+        return new_summary, time.time() - start
+
     # ── Memory ──
     summary = ""
     recent_messages = []
     turn_count = 0
+    # Summarization runs in the background while the user types. Until it
+    # finishes, the messages it is folding are still sent verbatim.
+    summary_task = None
+    folding = []
 
     print("\n✅ Document Assistant Ready")
     print("Commands: 'quit' to exit, 'clear' to reset memory, 'debug' to see memory\n")
 
     while True:
-        query = input("Human: ")
+        # In a thread, so a background summary can progress while we wait
+        query = await asyncio.to_thread(input, "Human: ")
 
         if not query.strip():
             continue
         if query.lower() in ["quit", "exit", "q"]:
+            if summary_task:
+                summary_task.cancel()
             log.info(f"Chat ended after {turn_count} turns")
             break
         if query.lower() == "clear":
+            if summary_task:
+                summary_task.cancel()
+            summary_task = None
+            folding = []
             summary = ""
             recent_messages = []
             turn_count = 0
@@ -260,8 +323,9 @@ Updated summary:""")
             continue
         if query.lower() == "debug":
             print(f"\nSummary: {summary or '(empty)'}")
-            print(f"Recent: {len(recent_messages)} messages")
-            for msg in recent_messages:
+            print(f"Recent: {len(recent_messages)} messages"
+                  + (f" (+{len(folding)} being summarized)" if folding else ""))
+            for msg in folding + recent_messages:
                 print(f"  {msg['role']}: {msg['content'][:80]}...")
             print()
             continue
@@ -271,32 +335,57 @@ Updated summary:""")
 
         log.info(f"Turn {turn_count}: \"{query[:80]}\"")
 
+        # ── Pick up a finished background summary (never wait for one) ──
+        summarize_time = None
+        if summary_task and summary_task.done():
+            try:
+                summary, summarize_time = summary_task.result()
+                log.info(f"Memory summarized in {summarize_time:.2f}s (background). Summary: {len(summary)} chars. Recent: {len(recent_messages)} msgs.")
+                print(f"  📝 Memory summarized.")
+            except Exception as e:
+                # Keep the messages verbatim; they're folded again next time
+                log.warning(f"Background summarization failed: {e}")
+                recent_messages = folding + recent_messages
+            summary_task = None
+            folding = []
+
         # ── Format recent messages ──
         recent_str = ""
-        if recent_messages:
+        if folding or recent_messages:
             recent_str = "\n".join(
                 f"{'Human' if m['role'] == 'human' else 'AI'}: {m['content']}"
-                for m in recent_messages
+                for m in folding + recent_messages
             )
 
-        # ── Step 1: Reformulate ──
-        reform_start = time.time()
-        if summary or recent_messages:
-            search_query = await reformulation_chain.ainvoke({
-                "question": query,
+        # ── Steps 1+2: Reformulate and search children, overlapped ──
+        # The raw query is searched while reformulation runs; a standalone
+        # question skips reformulation altogether
+        async def reformulate(question):
+            return await reformulation_chain.ainvoke({
+                "question": question,
                 "summary": summary or "No previous conversation.",
                 "recent_messages": recent_str or "No recent messages.",
             })
-        else:
-            search_query = query
-        reform_time = time.time() - reform_start
-        log.debug(f"Reformulated in {reform_time:.2f}s: \"{search_query[:80]}\"")
 
-        # ── Step 2: Search children ──
-        search_start = time.time()
-        child_results = vectorstore.similarity_search(search_query, k=10)
-        search_time = time.time() - search_start
-        log.debug(f"Search returned {len(child_results)} children in {search_time:.2f}s")
+        retrieval = await speculative_retrieve_async(
+            query,
+            rewrite=reformulate,
+            retrieve=lambda search_text: search_children(vectorstore, search_text, k=10),
+            has_history=bool(summary or recent_str),
+            k=10,
+            key=lambda doc: doc.page_content,
+        )
+        search_query = retrieval["search_query"]
+        child_results = retrieval["results"]
+        timings = retrieval["timings"]
+        reform_time = timings["rewrite"]
+        search_time = max(timings["raw_search"], timings["rewritten_search"])
+        retrieval_time = timings["total"]
+        if retrieval["rewritten"]:
+            log.debug(f"Reformulated in {reform_time:.2f}s: \"{search_query[:80]}\"")
+        else:
+            log.debug("Reformulation skipped (standalone question)")
+        log.debug(f"Search returned {len(child_results)} children in {retrieval_time:.2f}s (saved ~{timings['saved']:.2f}s)")
 
         # ── Step 3: Get parents ──
         parent_ids = []
@@ -307,11 +396,13 @@ Updated summary:""")
                 parent_ids.append(pid)
                 seen_pids.add(pid)
 
+        # One indexed lookup for just the parents this turn needs
+        parents = parent_store.get_many(parent_ids)
         parent_texts = []
         missing_parents = 0
         for pid in parent_ids:
-            if pid in parent_store:
-                parent_texts.append(parent_store[pid]["content"])
+            if pid in parents:
+                parent_texts.append(parents[pid]["content"])
             else:
                 missing_parents += 1
                 log.warning(f"Parent {pid[:8]} not found in parent_store")
@@ -345,30 +436,20 @@ Updated summary:""")
         recent_messages.append({"role": "human", "content": query})
         recent_messages.append({"role": "ai", "content": answer})
 
-        # ── Step 7: Summarize if needed ──
-        if len(recent_messages) > MAX_RECENT_PAIRS * 2:
-            summarize_start = time.time()
-
-            to_summarize = recent_messages[:-(MAX_RECENT_PAIRS * 2)]
-            to_keep = recent_messages[-(MAX_RECENT_PAIRS * 2):]
-
-            new_messages_str = "\n".join(
-                f"{'Human' if m['role'] == 'human' else 'AI'}: {m['content']}"
-                for m in to_summarize
-            )
-
-            summary = await summary_chain.ainvoke({
-                "old_summary": summary or "No previous summary.",
-                "new_messages": new_messages_str,
-            })
-
-            recent_messages = to_keep
-            summarize_time = time.time() - summarize_start
-            log.info(f"Memory summarized in {summarize_time:.2f}s. Summary: {len(summary)} chars. Recent: {len(recent_messages)} msgs.")
-            print(f"  📝 Memory summarized.")
+        # ── Step 7: Summarize in the background if needed ──
+        if len(recent_messages) > MAX_RECENT_PAIRS * 2 and summary_task is None:
+            folding = recent_messages[:-(MAX_RECENT_PAIRS * 2)]
+            recent_messages = recent_messages[-(MAX_RECENT_PAIRS * 2):]
+            summary_task = asyncio.create_task(summarize(summary, folding))
+            log.debug(f"Summarizing {len(folding)} messages in the background")
 
         # ── Log turn summary ──
-        log.info(f"Turn {turn_count} complete: reform={reform_time:.2f}s search={search_time:.2f}s answer={answer_time:.2f}s total={total_time:.2f}s parents={len(parent_texts)}")
+        # summary = background summarization that finished since the last turn (not part of total)
+        if summarize_time is not None:
+            summary_status = f"{summarize_time:.2f}s"
+        else:
+            summary_status = "pending" if summary_task else "-"
+        log.info(f"Turn {turn_count} complete: reform={reform_time:.2f}s search={search_time:.2f}s retrieval={retrieval_time:.2f}s saved={timings['saved']:.2f}s answer={answer_time:.2f}s total={total_time:.2f}s parents={len(parent_texts)} summary={summary_status}")
 
         print()
 
@@ -376,7 +457,10 @@ Updated summary:""")
 # _______ Main _______
 
 if __name__ == "__main__":
-    with open("parent_store.json", "r") as f:
-                parent_store = json.load(f)
-    print(f"📂 Loaded {len(parent_store)} parents")
-    asyncio.run(chat(parent_store))
\ No newline at end of file
+    first_open = not Path(PARENT_STORE_PATH).exists()
+    with ParentStore(PARENT_STORE_PATH) as parent_store:
+        if first_open and Path(LEGACY_PARENT_STORE).exists():
+            count = parent_store.import_json(LEGACY_PARENT_STORE)
+            print(f"📦 Moved {count} parents from {LEGACY_PARENT_STORE} to {PARENT_STORE_PATH}")
+        print(f"📂 Opened parent store {PARENT_STORE_PATH}")
+        asyncio.run(chat(parent_store))
\ No newline at end of file
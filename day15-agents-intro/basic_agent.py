@@ -4,7 +4,10 @@ from langchain.chat_models import init_chat_model
 from langchain.tools import tool
 from rich import inspect
 
+from shared import cassette_from_env
+
 load_dotenv()
+cassette_from_env()  # record/replay when $CASSETTE is set
 
 llm = init_chat_model(model= "gpt-4o-mini")
 
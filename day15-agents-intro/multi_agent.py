@@ -11,7 +11,10 @@ from math_agent import (calculator, distance_converter, temp_converter,
 # from rich import inspect
 from search_agent import search_web, search_wiki
 
+from shared import cassette_from_env
+
 load_dotenv()
+cassette_from_env()  # record/replay when $CASSETTE is set
 
 model = init_chat_model("claude-haiku-4-5")
 
@@ -9,7 +9,10 @@ from langchain_community.tools import DuckDuckGoSearchResults
 from langgraph.checkpoint.memory import InMemorySaver
 from rich import inspect
 
+from shared import cassette_from_env
+
 load_dotenv()
+cassette_from_env()  # record/replay when $CASSETTE is set
 
 model = init_chat_model(model='gpt-5.2')
 
@@ -11,9 +11,12 @@ from langgraph.checkpoint.memory import InMemorySaver
 from tavily import TavilyClient
 from tradingview_screener import Query
 
+from shared import cassette_from_env
+
 # from rich import inspect
 
 load_dotenv()
+cassette_from_env()  # record/replay when $CASSETTE is set
 
 model = init_chat_model(model='gpt-5-mini')
 
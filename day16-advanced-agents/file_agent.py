@@ -7,11 +7,12 @@ from langchain.chat_models import init_chat_model
 from langchain.tools import tool
 from langgraph.checkpoint.memory import InMemorySaver
 
-from shared import read_document
+from shared import cassette_from_env, read_document
 
 # from rich import inspect
 
 load_dotenv()
+cassette_from_env()  # record/replay when $CASSETTE is set
 
 model = init_chat_model(model='gpt-5-mini')
 
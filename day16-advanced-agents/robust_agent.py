@@ -15,9 +15,12 @@ from langgraph.checkpoint.memory import InMemorySaver
 from tavily import TavilyClient
 from tradingview_screener import Query
 
+from shared import cassette_from_env
+
 # from rich import inspect
 
 load_dotenv()
+cassette_from_env()  # record/replay when $CASSETTE is set
 
 # ---------------------------------------------------------------------------
 # Logging Setup
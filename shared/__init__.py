@@ -1,14 +1,34 @@
 from shared.refactored_chatbot import  (load_config, setup_api,
                                         get_user_input,save_chat_log, get_user_file,
                                         get_ai_response, display_response)
+from shared.chat_log import ChatLogWriter, replay_chat_log
 
 from shared.rate_limits import response_with_retry
+from shared.load_harness import run_load
+from shared.rag_eval import run_eval, compare_reports, HashingEmbeddingFunction
+from shared.stub_server import start_stub_server
+from shared.cassette import Cassette, use_cassette, cassette_from_env
+from shared.token_counter import get_encoder, count_tokens, count_tokens_many, MAX_CONTEXT_WINDOW
+from shared.context_packer import pack_context, trim_messages, context_budget
+from shared.context_assembly import assemble_context, merge_chunks
+from shared.mmr import mmr_select, distances_to_similarity
+from shared.answer_cache import SemanticAnswerCache
+from shared.collection_stats import collection_stats, CollectionStats
+from shared.summary_memory import SummaryMemory
+from shared.session_store import SessionHistoryStore
+from shared.parent_store import ParentStore
+from shared.retrieval_cache import RetrievalCache, bump_collection_version
+from shared.rewrite_memo import memoized_rewrite, cached_rewrite, rewrite_stats, rewrite_calls_avoided
+from shared.speculative_retrieval import speculative_retrieve, speculative_retrieve_async, needs_rewrite
 from shared.logging_config_prod import setup_logging
-from shared.split_text import split_into_chunks, text_handler
+from shared.split_text import (split_into_chunks, text_handler, iter_text_windows,
+                               iter_words, TextReadError)
 from shared.chunking_strategies import ( fixed_size_chunks,
                                         overlap_chunks, sentence_chunks,
                                         sentence_chunks_legacy, paragraph_chunks)
 
-from shared.read_document import read_document
+from shared.read_document import read_document, read_elements, register_reader
+from shared.element_cache import clear_element_cache
+from shared.stream_ingest import stream_ingest
 from shared.vector_store import initialize_chroma_collection
 from shared.inspector import params, full_inspect, p, fi
\ No newline at end of file
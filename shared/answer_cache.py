@@ -0,0 +1,152 @@
+"""
+Semantic answer cache.
+
+Lots of questions are paraphrases of earlier ones ("what's the refund
+policy?" / "how do refunds work?"). RetrievalCache only catches exact
+repeats; SemanticAnswerCache reuses the whole answer when:
+
+1. the new question's embedding is within `threshold` cosine similarity
+   of a cached question, and
+2. retrieval returned the same set of chunk ids
+
+so the answer was generated from exactly the context the new question
+would get. No LLM call on a hit.
+
+Re-ingesting a document changes its chunks without changing their ids,
+so ingest code calls invalidate_chunks(ids): every answer built from any
+of those chunks is dropped.
+
+    cache = SemanticAnswerCache(threshold=0.95)
+    hit = cache.lookup(embedding, chunk_ids)
+    if hit is None:
+        result = ...generate...
+        cache.store(question, embedding, chunk_ids, result)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by question embedding + retrieved chunk ids.
+
+    Args:
+        threshold:   Min cosine similarity between questions for a hit.
+        max_entries: Answers kept (least recently used evicted first).
+        ttl:         Seconds an answer stays valid (None = until evicted/invalidated).
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512, ttl: float = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()     # entry id -> {question, chunk_ids, result, stored_at}
+        self._by_chunk = {}               # chunk id -> {entry ids}
+        self._ids = []                    # row order of _matrix
+        self._matrix = None               # unit question embeddings, one row per entry
+        self._next_id = count()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidated": 0, "tokens_saved": 0}
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _rebuild(self) -> None:
+        self._ids = list(self._entries)
+        self._matrix = (
+            np.stack([self._entries[i]["embedding"] for i in self._ids]) if self._ids else None
+        )
+
+    def _remove(self, entry_id) -> None:
+        entry = self._entries.pop(entry_id)
+        for chunk_id in entry["chunk_ids"]:
+            ids = self._by_chunk.get(chunk_id)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._by_chunk[chunk_id]
+
+    def lookup(self, embedding, chunk_ids):
+        """The cached result for a similar question with the same chunks, or None."""
+        chunk_set = frozenset(chunk_ids)
+        with self._lock:
+            if self._matrix is None:
+                self.stats["misses"] += 1
+                return None
+
+            similarities = self._matrix @ self._unit(embedding)
+            for row in np.argsort(-similarities):
+                if similarities[row] < self.threshold:
+                    break
+                entry_id = self._ids[row]
+                entry = self._entries[entry_id]
+                if entry["chunk_ids"] != chunk_set:
+                    continue
+                if self.ttl is not None and time.time() - entry["stored_at"] > self.ttl:
+                    continue
+
+                self._entries.move_to_end(entry_id)
+                self.stats["hits"] += 1
+                self.stats["tokens_saved"] += entry["result"].get("tokens_used", 0)
+                logger.debug(f"Answer cache hit ({similarities[row]:.3f}): {entry['question']!r}")
+                return dict(entry["result"])
+
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, question: str, embedding, chunk_ids, result: dict) -> None:
+        with self._lock:
+            entry_id = next(self._next_id)
+            chunk_set = frozenset(chunk_ids)
+            self._entries[entry_id] = {
+                "question": question,
+                "embedding": self._unit(embedding),
+                "chunk_ids": chunk_set,
+                "result": dict(result),
+                "stored_at": time.time(),
+            }
+            for chunk_id in chunk_set:
+                self._by_chunk.setdefault(chunk_id, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._rebuild()
+
+    def invalidate_chunks(self, chunk_ids) -> int:
+        """Drop every answer that used any of these chunks. Returns how many."""
+        with self._lock:
+            stale = set()
+            for chunk_id in chunk_ids:
+                stale |= self._by_chunk.get(chunk_id, set())
+            for entry_id in stale:
+                self._remove(entry_id)
+            if stale:
+                self._rebuild()
+            self.stats["invalidated"] += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_chunk.clear()
+            self._rebuild()
+
+    def summary(self) -> dict:
+        hits, misses = self.stats["hits"], self.stats["misses"]
+        return {
+            "lookups": hits + misses,
+            "hits": hits,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "tokens_saved": self.stats["tokens_saved"],
+            "invalidated": self.stats["invalidated"],
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,514 @@
+"""
+Record/replay cassettes for HTTP traffic (OpenAI, LangChain models, requests).
+
+Record a real session once, then replay it offline - at the recorded pace
+(including streamed token timing) or instantly - to benchmark agent and RAG
+flows repeatably.
+
+Every library we use talks HTTP through httpx (openai, anthropic, langchain)
+or requests (weather, news, telegram), so hooking those two covers it all.
+
+Usage:
+    with use_cassette("cassettes/agent.jsonl.gz", mode="record"):
+        agent.invoke(...)
+
+    with use_cassette("cassettes/agent.jsonl.gz", latency="instant"):
+        agent.invoke(...)      # no network, same answers
+
+Or, for scripts with a module-level chat loop, one line near the top:
+    cassette_from_env()        # CASSETTE=path CASSETTE_MODE=record|replay|auto
+                               # CASSETTE_LATENCY=recorded|instant
+
+Or inject explicitly:
+    client = setup_api(http_client=cassette.httpx_client())
+    model = init_chat_model("gpt-5-mini", http_client=cassette.httpx_client(),
+                            http_async_client=cassette.async_httpx_client())
+
+File format: gzip-compressed JSON lines, one interaction per line. Bodies are
+base64 and request headers are never stored (they carry API keys).
+"""
+
+import asyncio
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+# Query params that hold secrets: scrubbed on disk and ignored when matching
+DEFAULT_IGNORE_QUERY = ("key", "apiKey", "api_key", "token")
+
+# (pattern, replacement) applied to URLs before storing/matching
+DEFAULT_REDACT = ((r"/bot[^/]+/", "/bot<redacted>/"),)  # telegram bot token
+
+# Response headers not worth keeping
+_DROP_RESPONSE_HEADERS = {"set-cookie", "date", "x-request-id", "openai-organization", "cf-ray"}
+
+
+class CassetteMiss(LookupError):
+    """Replay mode got a request that isn't in the cassette."""
+
+
+class Cassette:
+    """
+    Store of recorded HTTP interactions.
+
+    Args:
+        path:           Cassette file (.jsonl.gz).
+        mode:           "record" (always hit the network, overwrite the file),
+                        "replay" (never hit the network, raise CassetteMiss)
+                        or "auto" (replay if recorded, otherwise record).
+        latency:        "recorded" to reproduce original timings,
+                        "instant" to return immediately.
+        match_on:       Request parts that must match: any of
+                        "method", "host", "path", "query", "body".
+        ignore_query:   Query params dropped before matching/storing.
+        ignore_body:    Top-level JSON body fields ignored when matching.
+        redact:         (regex, replacement) pairs applied to URLs.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        latency: str = "recorded",
+        match_on: tuple = ("method", "host", "path", "query", "body"),
+        ignore_query: tuple = DEFAULT_IGNORE_QUERY,
+        ignore_body: tuple = (),
+        redact: tuple = DEFAULT_REDACT,
+    ):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode: {mode}. Use 'record', 'replay' or 'auto'")
+        if latency not in ("recorded", "instant"):
+            raise ValueError(f"Unknown latency: {latency}. Use 'recorded' or 'instant'")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.match_on = tuple(match_on)
+        self.ignore_query = set(ignore_query)
+        self.ignore_body = set(ignore_body)
+        self.redact = [(re.compile(p), r) for p, r in redact]
+
+        self.interactions = []
+        self._by_key = {}
+        self._cursor = {}
+        self._lock = threading.Lock()
+        self.stats = {"replayed": 0, "recorded": 0, "missed": 0}
+
+        if mode != "record" and self.path.exists():
+            self.load()
+
+    # ── Storage ──
+
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {self.path}: {header.get('version')}")
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+        logger.info(f"Loaded {len(self.interactions)} interactions from {self.path}")
+
+    def save(self) -> None:
+        """Write every interaction to disk (no-op when nothing was recorded)."""
+        with self._lock:
+            if not self.stats["recorded"]:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.path, "wt", encoding="utf-8") as f:
+                f.write(json.dumps({"version": CASSETTE_VERSION, "count": len(self.interactions)}) + "\n")
+                for interaction in self.interactions:
+                    f.write(json.dumps(interaction, separators=(",", ":")) + "\n")
+        logger.info(f"Saved {len(self.interactions)} interactions to {self.path}")
+
+    def _index(self, interaction: dict) -> None:
+        self.interactions.append(interaction)
+        self._by_key.setdefault(interaction["key"], []).append(interaction)
+
+    # ── Matching ──
+
+    def scrub_url(self, url: str) -> str:
+        """URL as stored: secret query params removed, redactions applied."""
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in self.ignore_query]
+        url = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(query)), ""))
+        for pattern, replacement in self.redact:
+            url = pattern.sub(replacement, url)
+        return url
+
+    def request_key(self, method: str, url: str, body: bytes | str | None) -> str:
+        """Hash of the request parts named in match_on."""
+        parts = urlsplit(self.scrub_url(url))
+        fields = {
+            "method": method.upper(),
+            "host": parts.netloc,
+            "path": parts.path,
+            "query": parts.query,
+            "body": self._normalize_body(body),
+        }
+        raw = "\n".join(f"{name}={fields[name]}" for name in self.match_on)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+    def _normalize_body(self, body) -> str:
+        if not body:
+            return ""
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", errors="replace")
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError:
+            return body
+        if isinstance(data, dict):
+            data = {k: v for k, v in data.items() if k not in self.ignore_body}
+        return json.dumps(data, sort_keys=True)
+
+    def next_match(self, key: str) -> dict | None:
+        """Recorded response for this key. Repeats replay in recorded order, then stick to the last."""
+        with self._lock:
+            found = self._by_key.get(key)
+            if not found:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            self.stats["replayed"] += 1
+            return found[min(i, len(found) - 1)]
+
+    def _lookup(self, method: str, url: str, key: str) -> dict | None:
+        if self.mode == "record":
+            return None
+        found = self.next_match(key)
+        if found is None:
+            with self._lock:
+                self.stats["missed"] += 1
+            if self.mode == "replay":
+                logger.warning(f"Cassette miss: {method} {self.scrub_url(url)}")
+                raise CassetteMiss(f"No recording for {method} {self.scrub_url(url)} in {self.path}")
+        return found
+
+    def _record(self, interaction: dict) -> None:
+        with self._lock:
+            self._index(interaction)
+            self.stats["recorded"] += 1
+
+    def _new_interaction(self, kind, method, url, key, status, headers, ttfb) -> dict:
+        return {
+            "kind": kind,
+            "method": method.upper(),
+            "url": self.scrub_url(url),
+            "key": key,
+            "status": status,
+            "headers": [[k, v] for k, v in headers if k.lower() not in _DROP_RESPONSE_HEADERS],
+            "ttfb": round(ttfb, 4),
+            "chunks": [],
+        }
+
+    # ── httpx ──
+
+    def handle_httpx(self, request: httpx.Request, send) -> httpx.Response:
+        """Sync httpx hook. `send(request)` performs the real call."""
+        request.read()
+        key = self.request_key(request.method, str(request.url), request.content)
+        found = self._lookup(request.method, str(request.url), key)
+        if found is not None:
+            if self.latency == "recorded":
+                time.sleep(found["ttfb"])
+            return self._replay_httpx(found, request)
+
+        start = time.perf_counter()
+        response = send(request)
+        interaction = self._new_interaction(
+            "httpx", request.method, str(request.url), key,
+            response.status_code, response.headers.multi_items(), time.perf_counter() - start,
+        )
+        response.stream = _RecordingStream(response.stream, interaction, start, self._record)
+        return response
+
+    async def handle_httpx_async(self, request: httpx.Request, send) -> httpx.Response:
+        """Async httpx hook. `await send(request)` performs the real call."""
+        await request.aread()
+        key = self.request_key(request.method, str(request.url), request.content)
+        found = self._lookup(request.method, str(request.url), key)
+        if found is not None:
+            if self.latency == "recorded":
+                await asyncio.sleep(found["ttfb"])
+            return self._replay_httpx(found, request)
+
+        start = time.perf_counter()
+        response = await send(request)
+        interaction = self._new_interaction(
+            "httpx", request.method, str(request.url), key,
+            response.status_code, response.headers.multi_items(), time.perf_counter() - start,
+        )
+        response.stream = _RecordingStream(response.stream, interaction, start, self._record)
+        return response
+
+    def _replay_httpx(self, interaction: dict, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            interaction["status"],
+            headers=interaction["headers"],
+            stream=_ReplayStream(interaction, paced=self.latency == "recorded"),
+            request=request,
+        )
+
+    def httpx_client(self, **kwargs) -> httpx.Client:
+        """httpx.Client routed through this cassette (for http_client=...)."""
+        return httpx.Client(transport=CassetteTransport(self), **kwargs)
+
+    def async_httpx_client(self, **kwargs) -> httpx.AsyncClient:
+        """httpx.AsyncClient routed through this cassette (for http_async_client=...)."""
+        return httpx.AsyncClient(transport=AsyncCassetteTransport(self), **kwargs)
+
+    # ── requests ──
+
+    def handle_requests(self, request: requests.PreparedRequest, send) -> requests.Response:
+        """requests hook. `send(request)` performs the real call."""
+        key = self.request_key(request.method, request.url, request.body)
+        found = self._lookup(request.method, request.url, key)
+        if found is not None:
+            if self.latency == "recorded":
+                time.sleep(found["ttfb"])
+            return self._replay_requests(found, request)
+
+        start = time.perf_counter()
+        response = send(request)
+        content = response.content  # requests has already decoded gzip here
+        headers = [
+            (k, v) for k, v in response.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        interaction = self._new_interaction(
+            "requests", request.method, request.url, key,
+            response.status_code, headers, time.perf_counter() - start,
+        )
+        interaction["chunks"] = [[interaction["ttfb"], base64.b64encode(content).decode("ascii")]]
+        self._record(interaction)
+        return response
+
+    def _replay_requests(self, interaction: dict, request: requests.PreparedRequest) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(dict(interaction["headers"]))
+        response._content = b"".join(base64.b64decode(data) for _, data in interaction["chunks"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        return response
+
+    def requests_session(self) -> requests.Session:
+        """requests.Session routed through this cassette."""
+        session = requests.Session()
+        adapter = CassetteAdapter(self)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+# =============================================================================
+# Streams
+# =============================================================================
+
+class _RecordingStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Passes a live response body through, noting when each chunk arrived."""
+
+    def __init__(self, stream, interaction: dict, start: float, on_done):
+        self._stream = stream
+        self._interaction = interaction
+        self._start = start
+        self._on_done = on_done
+        self._done = False
+
+    def _note(self, chunk: bytes) -> None:
+        self._interaction["chunks"].append(
+            [round(time.perf_counter() - self._start, 4), base64.b64encode(chunk).decode("ascii")]
+        )
+
+    def _finish(self) -> None:
+        if not self._done:
+            self._done = True
+            self._on_done(self._interaction)
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._note(chunk)
+            yield chunk
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._note(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._finish()
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._finish()
+
+
+class _ReplayStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Recorded body, optionally paced to the original chunk timings."""
+
+    def __init__(self, interaction: dict, paced: bool):
+        self._chunks = [(t, base64.b64decode(data)) for t, data in interaction["chunks"]]
+        self._ttfb = interaction["ttfb"]
+        self._paced = paced
+
+    def _delays(self):
+        previous = self._ttfb
+        for t, chunk in self._chunks:
+            yield (max(0.0, t - previous) if self._paced else 0.0), chunk
+            previous = t
+
+    def __iter__(self):
+        for delay, chunk in self._delays():
+            if delay:
+                time.sleep(delay)
+            yield chunk
+
+    async def __aiter__(self):
+        for delay, chunk in self._delays():
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+# =============================================================================
+# Transports / adapters for explicit injection
+# =============================================================================
+
+class CassetteTransport(httpx.BaseTransport):
+    def __init__(self, cassette: Cassette, wrapped: httpx.BaseTransport = None):
+        self.cassette = cassette
+        self.wrapped = wrapped or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        return self.cassette.handle_httpx(request, self.wrapped.handle_request)
+
+    def close(self):
+        self.wrapped.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette: Cassette, wrapped: httpx.AsyncBaseTransport = None):
+        self.cassette = cassette
+        self.wrapped = wrapped or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        return await self.cassette.handle_httpx_async(request, self.wrapped.handle_async_request)
+
+    async def aclose(self):
+        await self.wrapped.aclose()
+
+
+class CassetteAdapter(HTTPAdapter):
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        return self.cassette.handle_requests(request, lambda r: super(CassetteAdapter, self).send(r, **kwargs))
+
+
+# =============================================================================
+# Global install (covers clients created at import time)
+# =============================================================================
+
+_originals = {}
+
+
+def install_cassette(cassette: Cassette) -> None:
+    """Route every httpx and requests call in the process through `cassette`."""
+    if _originals:
+        raise RuntimeError("A cassette is already installed")
+
+    _originals["httpx"] = httpx.HTTPTransport.handle_request
+    _originals["httpx_async"] = httpx.AsyncHTTPTransport.handle_async_request
+    _originals["requests"] = HTTPAdapter.send
+    _originals["cassette"] = cassette
+
+    def handle_request(self, request):
+        return cassette.handle_httpx(request, lambda r: _originals["httpx"](self, r))
+
+    async def handle_async_request(self, request):
+        return await cassette.handle_httpx_async(request, lambda r: _originals["httpx_async"](self, r))
+
+    def send(self, request, **kwargs):
+        if isinstance(self, CassetteAdapter):
+            return _originals["requests"](self, request, **kwargs)
+        return cassette.handle_requests(request, lambda r: _originals["requests"](self, r, **kwargs))
+
+    httpx.HTTPTransport.handle_request = handle_request
+    httpx.AsyncHTTPTransport.handle_async_request = handle_async_request
+    HTTPAdapter.send = send
+
+
+def uninstall_cassette() -> None:
+    if not _originals:
+        return
+    httpx.HTTPTransport.handle_request = _originals.pop("httpx")
+    httpx.AsyncHTTPTransport.handle_async_request = _originals.pop("httpx_async")
+    HTTPAdapter.send = _originals.pop("requests")
+    _originals.pop("cassette")
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = "replay", latency: str = "recorded", **kwargs):
+    """Install a cassette for the duration of the block and save it on exit."""
+    cassette = Cassette(path, mode=mode, latency=latency, **kwargs)
+    install_cassette(cassette)
+    try:
+        yield cassette
+    finally:
+        uninstall_cassette()
+        cassette.save()
+        logger.info(f"Cassette {path}: {cassette.stats}")
+
+
+def cassette_from_env() -> Cassette | None:
+    """
+    Install a cassette if $CASSETTE is set; it is saved at interpreter exit.
+
+    CASSETTE_MODE picks record/replay/auto (default replay) and
+    CASSETTE_LATENCY picks recorded/instant (default recorded).
+    """
+    path = os.getenv("CASSETTE")
+    if not path:
+        return None
+    if _originals:
+        return _originals["cassette"]  # already installed by an imported module
+
+    cassette = Cassette(
+        path,
+        mode=os.getenv("CASSETTE_MODE", "replay"),
+        latency=os.getenv("CASSETTE_LATENCY", "recorded"),
+    )
+    install_cassette(cassette)
+    atexit.register(cassette.save)
+    logger.info(f"Cassette {path} active ({cassette.mode}, {cassette.latency})")
+    return cassette
@@ -0,0 +1,173 @@
+"""
+Append-only JSONL chat logs.
+
+save_chat_log() writes the whole transcript once, at quit - a crash loses the
+session and long transcripts take a while to dump. ChatLogWriter appends
+each message as it happens instead:
+
+- one JSON record per line: {"ts": ..., "role": ..., "content": ...}
+- every write is flushed to the OS right away, so a crashed or killed
+  process loses nothing that was written
+- fsync (which also survives power loss / an OS crash) runs on a write once
+  `fsync_interval` seconds have passed since the last one, and on close
+- size-based rotation like logging's RotatingFileHandler (log.jsonl.1, .2, ...)
+- replay_chat_log() reads a log (and its rotated parts) back into `messages`
+
+Usage:
+    chat_log = ChatLogWriter()                 # logs/chat_<script>_<timestamp>.jsonl
+    chat_log.write({"role": "user", "content": user_input})
+    ...
+    chat_log.close()
+
+    messages = replay_chat_log("logs/chat_app_20250101_120000.jsonl")
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def default_log_path() -> str:
+    """logs/chat_<script>_<timestamp>.jsonl, next to the other run logs."""
+    script_name = Path(sys.argv[0]).stem or "session"
+    return f"logs/chat_{script_name}_{datetime.now():%Y%m%d_%H%M%S}.jsonl"
+
+
+class ChatLogWriter:
+    """
+    Buffered, append-only JSONL writer for chat messages.
+
+    Args:
+        path:           Log file (default: default_log_path()). Appended to if it exists.
+        max_bytes:      Rotate once the file passes this size (0 = never).
+        backup_count:   Rotated files to keep.
+        fsync_interval: Min seconds between fsyncs (0 = every write). Flushing
+                        to the OS happens on every write regardless.
+        buffer_size:    Write buffer in bytes (batches write_many()).
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 3,
+        fsync_interval: float = 2.0,
+        buffer_size: int = 64 * 1024,
+    ):
+        self.path = Path(path or default_log_path())
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fsync_interval = fsync_interval
+        self.buffer_size = buffer_size
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = None
+        self._size = 0
+        self._last_sync = time.monotonic()
+        self._open()
+
+    def _open(self) -> None:
+        self._file = open(self.path, "ab", buffering=self.buffer_size)
+        self._size = self._file.tell()
+
+    def write(self, message: dict) -> None:
+        """Append one {"role", "content"} message (other keys are kept too)."""
+        self._append(message)
+        self._flush()
+
+    def write_many(self, messages: list[dict]) -> None:
+        """Append several messages, e.g. the system prompt and first turn."""
+        for message in messages:
+            self._append(message)
+        self._flush()
+
+    def _append(self, message: dict) -> None:
+        record = {"ts": time.time(), **message}
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        if self.max_bytes and self._size and self._size + len(line) > self.max_bytes:
+            self._rotate()
+
+        self._file.write(line)
+        self._size += len(line)
+
+    def _flush(self) -> None:
+        """Hand records to the OS now; fsync only when the interval has passed."""
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        else:
+            self._file.flush()
+
+    def sync(self) -> None:
+        """Push buffered records to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self.sync()
+        self._file.close()
+
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+        logger.info(f"Rotated chat log {self.path}")
+        self._open()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay_chat_log(path: str, include_rotated: bool = True) -> list[dict]:
+    """
+    Read a chat log back into a `messages` list (oldest first).
+
+    Rotated parts (path.N ... path.1) are read before path itself. A torn
+    last line from a crash is skipped with a warning.
+    """
+    path = Path(path)
+    files = []
+    if include_rotated:
+        i = 1
+        while path.with_name(f"{path.name}.{i}").exists():
+            files.insert(0, path.with_name(f"{path.name}.{i}"))
+            i += 1
+    if path.exists():
+        files.append(path)
+
+    messages = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable line {line_no} in {file}")
+                    continue
+                record.pop("ts", None)
+                messages.append(record)
+    return messages
@@ -2,7 +2,7 @@ def fixed_size_chunks(text, chunk_size=100):
 
     chunks = []
     current_chunk = []
-    words = text.split()
+    words = text.split() if isinstance(text, str) else text   # or iter_words(path)
 
     for word in words:
         current_chunk.append(word)
@@ -16,7 +16,7 @@ def fixed_size_chunks(text, chunk_size=100):
 def overlap_chunks(text, chunk_size=100, overlap=20):
     chunks = []
     current_chunk = []
-    words = text.split()
+    words = text.split() if isinstance(text, str) else text   # or iter_words(path)
 
     for word in words:
         current_chunk.append(word)
@@ -0,0 +1,148 @@
+"""
+Incrementally maintained collection statistics.
+
+Counting sources and file types with collection.get(include=["metadatas"])
+pulls every chunk's metadata into Python - fine for ten files, slow for ten
+thousand. CollectionStats keeps the numbers in a small JSON sidecar instead
+and ingest/delete code updates them as it goes:
+
+    stats = collection_stats(collection)
+    stats.remove_source("report.pdf")                    # before re-ingesting it
+    stats.record_ingest("report.pdf", ".pdf", chunks=42, tokens=9100)
+    stats.snapshot()   # {total_chunks, sources, by_type, by_source, total_tokens, last_ingest}
+
+Reading stats never touches the collection beyond count(). If the sidecar
+and collection.count() disagree (in-memory client restarted, someone added
+chunks elsewhere) the sidecar is rebuilt with one full scan.
+
+Sidecars live in STATS_DIR (.cache/collection_stats by default, override
+with COLLECTION_STATS_DIR), one <collection name>.json per collection.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+STATS_DIR = Path(os.getenv("COLLECTION_STATS_DIR", ".cache/collection_stats"))
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _empty() -> dict:
+    return {"total_chunks": 0, "total_tokens": 0, "by_source": {}, "by_type": {}, "last_ingest": None}
+
+
+class CollectionStats:
+    """
+    Per-source chunk/token counts for one collection, kept in a JSON sidecar.
+
+    Args:
+        collection: The Chroma collection the numbers describe.
+        path:       Sidecar file (default STATS_DIR/<collection name>.json).
+    """
+
+    def __init__(self, collection, path=None):
+        self.collection = collection
+        self.path = Path(path) if path else STATS_DIR / f"{collection.name}.json"
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            data = _empty()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable stats sidecar {self.path}, rebuilding: {e}")
+            data = None
+
+        if data is None or data.get("total_chunks") != self.collection.count():
+            data = self._scan()
+            self._save(data)
+        return data
+
+    def _scan(self) -> dict:
+        """One-off full scan - only when the sidecar is missing or out of date."""
+        data = _empty()
+        if self.collection.count() == 0:
+            return data
+
+        logger.info(f"Rebuilding stats for '{self.collection.name}' from a full scan")
+        for meta in self.collection.get(include=["metadatas"])["metadatas"]:
+            source = meta.get("source", "unknown")
+            file_type = meta.get("file_type", "unknown")
+            tokens = meta.get("token_count", 0)
+            entry = data["by_source"].setdefault(source, {"chunks": 0, "tokens": 0, "file_type": file_type})
+            entry["chunks"] += 1
+            entry["tokens"] += tokens
+            data["by_type"][file_type] = data["by_type"].get(file_type, 0) + 1
+            data["total_chunks"] += 1
+            data["total_tokens"] += tokens
+        return data
+
+    def _save(self, data: dict) -> None:
+        """Write the sidecar atomically. A read-only disk only costs a rescan next time."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write stats sidecar: {e}")
+
+    def record_ingest(self, source: str, file_type: str, chunks: int, tokens: int = 0) -> None:
+        """Count chunks just added for `source`."""
+        with self._lock:
+            data = self._data
+            entry = data["by_source"].setdefault(source, {"chunks": 0, "tokens": 0, "file_type": file_type})
+            entry["chunks"] += chunks
+            entry["tokens"] += tokens
+            data["by_type"][file_type] = data["by_type"].get(file_type, 0) + chunks
+            data["total_chunks"] += chunks
+            data["total_tokens"] += tokens
+            data["last_ingest"] = time.time()
+            self._save(data)
+
+    def remove_source(self, source: str) -> int:
+        """Uncount every chunk of `source` (after deleting them). Returns chunks removed."""
+        with self._lock:
+            data = self._data
+            entry = data["by_source"].pop(source, None)
+            if entry is None:
+                return 0
+            file_type = entry["file_type"]
+            data["by_type"][file_type] = data["by_type"].get(file_type, 0) - entry["chunks"]
+            if data["by_type"][file_type] <= 0:
+                del data["by_type"][file_type]
+            data["total_chunks"] -= entry["chunks"]
+            data["total_tokens"] -= entry["tokens"]
+            self._save(data)
+            return entry["chunks"]
+
+    def snapshot(self) -> dict:
+        """Current numbers - no collection scan."""
+        with self._lock:
+            data = self._data
+            return {
+                "total_chunks": data["total_chunks"],
+                "sources": sorted(data["by_source"]),
+                "by_type": dict(data["by_type"]),
+                "by_source": {s: e["chunks"] for s, e in data["by_source"].items()},
+                "total_tokens": data["total_tokens"],
+                "last_ingest": data["last_ingest"],
+            }
+
+
+def collection_stats(collection) -> CollectionStats:
+    """The shared CollectionStats for a collection (one per collection name)."""
+    with _instances_lock:
+        stats = _instances.get(collection.name)
+        if stats is None or stats.collection is not collection:
+            stats = _instances[collection.name] = CollectionStats(collection)
+        return stats
@@ -0,0 +1,225 @@
+"""
+De-overlapped, token-budgeted context assembly for retrieved chunks.
+
+Overlap chunking repeats up to `overlap` words between neighbouring chunks,
+and retrieval often returns several neighbours at once - so the same words
+get paid for two or three times per prompt. assemble_context():
+
+1. merges chunks from the same source that are adjacent (consecutive
+   chunk_index) or whose text overlaps, cutting the repeated span
+2. drops chunks whose text is already contained in an earlier one
+3. numbers the merged blocks [Source 1], [Source 2], ... in rank order
+4. adds blocks until the token budget is reached
+
+Each [Source N] maps back to the retrieved items it was built from
+(`citations`), so answers can still be traced to chunks.
+
+Items are dicts like advanced_rag.retrieve() returns:
+    {"content": str, "source": str, "chunk_index": int (optional), "page": ... (optional)}
+"""
+
+import re
+
+from .token_counter import count_tokens_many
+
+MIN_OVERLAP_WORDS = 5       # shorter matches are treated as coincidence
+MAX_OVERLAP_WORDS = 200
+DEFAULT_SEPARATOR = "\n\n---\n\n"
+
+_WORD = re.compile(r"\S+")
+
+
+def _overlap_words(a_words: list[str], b_words: list[str], max_k: int = MAX_OVERLAP_WORDS) -> int:
+    """Largest k such that the last k words of a are the first k words of b."""
+    for k in range(min(len(a_words), len(b_words), max_k), 0, -1):
+        if a_words[-k:] == b_words[:k]:
+            return k
+    return 0
+
+
+def _drop_words(text: str, k: int) -> str:
+    """text without its first k words (original spacing kept for the rest)."""
+    if k == 0:
+        return text
+    for i, match in enumerate(_WORD.finditer(text), 1):
+        if i == k:
+            return text[match.end():].lstrip()
+    return ""
+
+
+def _add_page(block: dict, page) -> None:
+    for p in page if isinstance(page, list) else [page]:
+        if p is not None and p not in block["pages"]:
+            block["pages"].append(p)
+
+
+def _join(first: str, second: str, min_overlap: int) -> str | None:
+    """first + second with the repeated span removed, or None if they don't overlap."""
+    k = _overlap_words(first.split(), second.split())
+    if k < min_overlap:
+        return None
+    rest = _drop_words(second, k)
+    return f"{first} {rest}" if rest else first
+
+
+def _try_merge(block: dict, item_text: str, index, min_overlap: int) -> bool:
+    """Merge an item into a block if adjacent or overlapping. Updates block in place."""
+    if index is not None and block["first"] is not None:
+        if index == block["last"] + 1:
+            block["text"] = _join(block["text"], item_text, 1) or f"{block['text']}\n{item_text}"
+            block["last"] = index
+            return True
+        if index == block["first"] - 1:
+            block["text"] = _join(item_text, block["text"], 1) or f"{item_text}\n{block['text']}"
+            block["first"] = index
+            return True
+        return False
+
+    merged = _join(block["text"], item_text, min_overlap)
+    if merged is None:
+        merged = _join(item_text, block["text"], min_overlap)
+    if merged is None:
+        return False
+    block["text"] = merged
+    return True
+
+
+def merge_chunks(items: list[dict], text_key: str = "content", min_overlap: int = MIN_OVERLAP_WORDS) -> list[dict]:
+    """
+    Merge adjacent/overlapping items from the same source.
+
+    Returns blocks in rank order (rank of their best item):
+        [{"source", "pages", "first", "last", "text", "members": [item indices],
+          "item": best-ranked item}]
+    """
+    blocks = []
+    for i, item in enumerate(items):
+        text = item[text_key].strip()
+        index = item.get("chunk_index")
+        source = item.get("source")
+
+        for block in blocks:
+            if block["source"] != source:
+                continue
+            if text in block["text"] or _try_merge(block, text, index, min_overlap):
+                block["members"].append(i)
+                _add_page(block, item.get("page"))
+                break
+        else:
+            block = _single_block(item)
+            block["text"] = text
+            block["members"].append(i)
+            blocks.append(block)
+
+    # A later chunk can bridge two earlier blocks (chunks 3 and 5, then 4)
+    merged_any = True
+    while merged_any:
+        merged_any = False
+        for a in range(len(blocks)):
+            for b in range(a + 1, len(blocks)):
+                x, y = blocks[a], blocks[b]
+                if x["source"] != y["source"]:
+                    continue
+                if y["first"] is not None and x["first"] is not None:
+                    if y["first"] == x["last"] + 1:
+                        x["text"] = _join(x["text"], y["text"], 1) or f"{x['text']}\n{y['text']}"
+                        x["last"] = y["last"]
+                    elif y["last"] == x["first"] - 1:
+                        x["text"] = _join(y["text"], x["text"], 1) or f"{y['text']}\n{x['text']}"
+                        x["first"] = y["first"]
+                    else:
+                        continue
+                elif not _try_merge(x, y["text"], None, min_overlap):
+                    continue
+                x["members"].extend(y["members"])
+                _add_page(x, y["pages"])
+                del blocks[b]
+                merged_any = True
+                break
+            if merged_any:
+                break
+
+    return blocks
+
+
+def _single_block(item: dict) -> dict:
+    index = item.get("chunk_index")
+    block = {"source": item.get("source"), "pages": [], "first": index, "last": index, "members": [], "item": item}
+    _add_page(block, item.get("page"))
+    return block
+
+
+def default_header(n: int, block: dict) -> str:
+    header = f"[Source {n}: {block['source']}"
+    if block["pages"]:
+        header += f", page {', '.join(str(p) for p in block['pages'])}"
+    return header + "]"
+
+
+def assemble_context(
+    items: list[dict],
+    budget_tokens: int = 3000,
+    model: str = "gpt-4o-mini",
+    text_key: str = "content",
+    header=default_header,
+    separator: str = DEFAULT_SEPARATOR,
+    min_overlap: int = MIN_OVERLAP_WORDS,
+) -> dict:
+    """
+    Build the context string for a prompt from ranked retrieved items.
+
+    Args:
+        items:         Retrieved chunks, most relevant first.
+        budget_tokens: Max tokens for the whole context (None = no limit).
+        model:         For token counting.
+        text_key:      Key holding each item's text.
+        header:        fn(n, block) -> "[Source n: ...]" label for a block.
+        separator:     Between blocks.
+
+    Returns:
+        {
+            context: str,
+            citations: {n: [item indices]},   # what [Source n] was built from
+            used_tokens: int,
+            saved_tokens: int,                # vs. concatenating items verbatim
+            dropped: [item indices],          # didn't fit the budget
+        }
+    """
+    blocks = merge_chunks(items, text_key, min_overlap)
+    sections = [f"{header(n, block)}\n{block['text']}" for n, block in enumerate(blocks, 1)]
+    # What the old one-section-per-item formatting would have sent
+    verbatim = [
+        f"{header(n, _single_block(item))}\n{item[text_key].strip()}"
+        for n, item in enumerate(items, 1)
+    ]
+
+    counts = count_tokens_many(sections + [separator] + verbatim, model)
+    section_tokens = counts[:len(sections)]
+    separator_tokens = counts[len(sections)]
+    verbatim_tokens = sum(counts[len(sections) + 1:]) + max(0, len(items) - 1) * separator_tokens
+
+    kept = []
+    dropped = []
+    used = 0
+    for i, tokens in enumerate(section_tokens):
+        cost = tokens + (separator_tokens if kept else 0)
+        if budget_tokens is not None and used + cost > budget_tokens:
+            dropped.extend(blocks[i]["members"])
+            continue
+        kept.append(i)
+        used += cost
+
+    # Renumber so the kept sources are [Source 1..n] with no gaps
+    context_parts = []
+    citations = {}
+    for n, i in enumerate(kept, 1):
+        context_parts.append(f"{header(n, blocks[i])}\n{blocks[i]['text']}")
+        citations[n] = sorted(blocks[i]["members"])
+
+    return {
+        "context": separator.join(context_parts),
+        "citations": citations,
+        "used_tokens": used,
+        "saved_tokens": max(0, verbatim_tokens - used),
+        "dropped": sorted(dropped),
+    }
@@ -0,0 +1,215 @@
+"""
+Token-budget context packer.
+
+Instead of trimming chat history by message count (or not at all), fit the
+prompt to a token budget and keep the most useful parts:
+
+    1. system prompt + new user turn      (always)
+    2. the latest `keep_recent_turns` user/assistant pairs
+    3. retrieved chunks in rank order     (up to `chunk_share` of what's left)
+    4. older history, newest first        (stops at the first turn that won't fit)
+    5. any remaining chunks               (if room is left)
+
+Token counts go through shared.token_counter, so history messages that are
+re-sent every turn are only tokenized once.
+"""
+
+from .token_counter import MAX_CONTEXT_WINDOW, count_tokens_many
+
+TOKENS_PER_MESSAGE = 3      # chat-format wrapper around each message
+TOKENS_PER_REPLY = 3        # priming for the assistant's reply
+
+DEFAULT_MAX_INPUT_TOKENS = 16_000   # practical cap; long prompts are slow and expensive
+DEFAULT_CONTEXT_WINDOW = 128_000    # for models missing from MAX_CONTEXT_WINDOW
+
+DEFAULT_CONTEXT_TEMPLATE = "Context:\n{context}"
+
+
+def context_budget(model: str, reserve_output: int = 1024, max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS) -> int:
+    """
+    Input-token budget for `model`: its context window minus room for the
+    reply, capped at `max_input_tokens` (None = use the whole window).
+    """
+    window = MAX_CONTEXT_WINDOW.get(model)
+    if window is None:
+        known = [name for name in MAX_CONTEXT_WINDOW if model.startswith(name)]
+        window = MAX_CONTEXT_WINDOW[max(known, key=len)] if known else DEFAULT_CONTEXT_WINDOW
+
+    budget = window - reserve_output
+    if max_input_tokens is not None:
+        budget = min(budget, max_input_tokens)
+    return budget
+
+
+def _group_turns(history: list[dict]) -> list[list[int]]:
+    """Indices of history grouped into turns (a user message plus the replies after it)."""
+    turns = []
+    for i, msg in enumerate(history):
+        if msg["role"] == "user" or not turns:
+            turns.append([i])
+        else:
+            turns[-1].append(i)
+    return turns
+
+
+def pack_context(
+    system_prompt: str | None,
+    user_message: str,
+    history: list[dict] = (),
+    chunks: list[str] = (),
+    model: str = "gpt-4.1-nano",
+    budget: int = None,
+    keep_recent_turns: int = 1,
+    chunk_share: float = 0.5,
+    context_template: str = DEFAULT_CONTEXT_TEMPLATE,
+    chunk_separator: str = "\n\n",
+) -> dict:
+    """
+    Build the message list for one request within a token budget.
+
+    Args:
+        system_prompt:     Instructions (None/"" for no system message).
+        user_message:      The new user turn.
+        history:           Earlier messages, oldest first, without the system prompt.
+        chunks:            Retrieved context, most relevant first.
+        model:             Used for tokenization and the default budget.
+        budget:            Max input tokens (default: context_budget(model)).
+        keep_recent_turns: Latest turns kept before any chunk is considered.
+        chunk_share:       Max fraction of the free budget chunks get before history.
+        context_template:  How kept chunks become a system message ("{context}").
+
+    Returns:
+        {
+            messages: list[dict],      # ready for chat.completions.create
+            budget: int,
+            used_tokens: int,
+            breakdown: {system, user, chunks, history, overhead},
+            dropped: {history: [indices], chunks: [indices],
+                      history_tokens: int, chunk_tokens: int}
+        }
+
+    Raises:
+        ValueError: if the system prompt and user turn alone exceed the budget.
+    """
+    if budget is None:
+        budget = context_budget(model)
+
+    history = list(history)
+    chunks = list(chunks)
+
+    texts = [system_prompt or "", user_message] + [m["content"] or "" for m in history] + chunks
+    counts = count_tokens_many(texts, model)
+    system_tokens = counts[0] + TOKENS_PER_MESSAGE if system_prompt else 0
+    user_tokens = counts[1] + TOKENS_PER_MESSAGE
+    history_tokens = [c + TOKENS_PER_MESSAGE for c in counts[2:2 + len(history)]]
+    chunk_tokens = counts[2 + len(history):]
+
+    template_tokens = count_tokens_many([context_template.format(context="")], model)[0] + TOKENS_PER_MESSAGE
+    separator_tokens = count_tokens_many([chunk_separator], model)[0]
+
+    used = system_tokens + user_tokens + TOKENS_PER_REPLY
+    if used > budget:
+        raise ValueError(f"System prompt and user message need {used} tokens; budget is {budget}")
+
+    turns = _group_turns(history)
+    turn_tokens = [sum(history_tokens[i] for i in turn) for turn in turns]
+    kept_turns = set()
+    kept_chunks = []
+    chunk_total = 0
+
+    def try_chunk(i, limit):
+        nonlocal used, chunk_total
+        cost = chunk_tokens[i] + (template_tokens if not kept_chunks else separator_tokens)
+        if used + cost > limit:
+            return False
+        kept_chunks.append(i)
+        used += cost
+        chunk_total += cost
+        return True
+
+    # 2. Most recent turns
+    next_turn = len(turns) - 1
+    while next_turn >= 0 and len(kept_turns) < keep_recent_turns:
+        if used + turn_tokens[next_turn] > budget:
+            break
+        kept_turns.add(next_turn)
+        used += turn_tokens[next_turn]
+        next_turn -= 1
+
+    # 3. Chunks, capped so they can't starve the conversation
+    chunk_limit = used + int((budget - used) * chunk_share)
+    for i in range(len(chunks)):
+        try_chunk(i, chunk_limit)
+
+    # 4. Older history, newest first, contiguous
+    while next_turn >= 0 and len(kept_turns) == len(turns) - 1 - next_turn:
+        if used + turn_tokens[next_turn] > budget:
+            break
+        kept_turns.add(next_turn)
+        used += turn_tokens[next_turn]
+        next_turn -= 1
+
+    # 5. Leftover room goes to the chunks that didn't fit the cap
+    for i in range(len(chunks)):
+        if i not in kept_chunks:
+            try_chunk(i, budget)
+    kept_chunks.sort()
+
+    # Assemble
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    if kept_chunks:
+        context = chunk_separator.join(chunks[i] for i in kept_chunks)
+        messages.append({"role": "system", "content": context_template.format(context=context)})
+
+    kept_history = sorted(i for t in kept_turns for i in turns[t])
+    messages.extend(history[i] for i in kept_history)
+    messages.append({"role": "user", "content": user_message})
+
+    kept_history_set = set(kept_history)
+    dropped_history = [i for i in range(len(history)) if i not in kept_history_set]
+    dropped_chunks = [i for i in range(len(chunks)) if i not in kept_chunks]
+
+    return {
+        "messages": messages,
+        "budget": budget,
+        "used_tokens": used,
+        "breakdown": {
+            "system": system_tokens,
+            "user": user_tokens,
+            "chunks": chunk_total,
+            "history": sum(history_tokens[i] for i in kept_history),
+            "overhead": TOKENS_PER_REPLY,
+        },
+        "dropped": {
+            "history": dropped_history,
+            "chunks": dropped_chunks,
+            "history_tokens": sum(history_tokens[i] for i in dropped_history),
+            "chunk_tokens": sum(chunk_tokens[i] for i in dropped_chunks),
+        },
+    }
+
+
+def trim_messages(messages: list[dict], model: str = "gpt-4.1-nano", budget: int = None, **kwargs) -> list[dict]:
+    """
+    Drop-in for chat loops that keep one growing `messages` list.
+
+    Expects [system?, ...history..., latest user message] and returns the
+    list to send, trimmed to the budget. `messages` itself is not modified.
+    """
+    system_prompt = None
+    start = 0
+    if messages and messages[0]["role"] in ("system", "developer"):
+        system_prompt = messages[0]["content"]
+        start = 1
+
+    packed = pack_context(
+        system_prompt,
+        messages[-1]["content"],
+        history=messages[start:-1],
+        model=model,
+        budget=budget,
+        **kwargs,
+    )
+    return packed["messages"]
@@ -0,0 +1,144 @@
+"""
+On-disk cache of parsed document elements.
+
+Parsing (partition() especially, PDFs most of all) is the slowest part of a
+re-ingest, and it's wasted work when the file hasn't changed. Parsed elements
+are cached under a key made from the file's content hash and the parser
+version, so:
+
+- renaming or touching a file still hits the cache
+- editing a file, or changing a reader (bump PARSER_VERSION), misses it
+
+Entries are small zlib-compressed binary files in CACHE_DIR
+(.cache/elements by default, override with ELEMENT_CACHE_DIR):
+
+    b"ELC1"                                         magic + format version
+    u8 type count, then per type: u8 length + utf-8 name
+    u32 element count, then per element:
+        u8 type index | i32 page (-1 = None) | u32 length + utf-8 text
+"""
+
+import hashlib
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.getenv("ELEMENT_CACHE_DIR", ".cache/elements"))
+MAGIC = b"ELC1"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+cache_stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+_ELEMENT = struct.Struct("<BiI")
+
+
+def file_digest(file_path) -> str:
+    """blake2b of the file's bytes (read in 1 MB blocks)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(file_path, parser_version: str) -> str:
+    return f"{file_digest(file_path)}_{hashlib.blake2b(parser_version.encode(), digest_size=4).hexdigest()}"
+
+
+def encode_elements(elements: list[dict]) -> bytes:
+    types = sorted({el.get("type") or "Text" for el in elements})
+    type_index = {name: i for i, name in enumerate(types)}
+
+    parts = [MAGIC, struct.pack("<B", len(types))]
+    for name in types:
+        raw = name.encode("utf-8")
+        parts.append(struct.pack("<B", len(raw)) + raw)
+
+    parts.append(struct.pack("<I", len(elements)))
+    for el in elements:
+        text = el["text"].encode("utf-8")
+        page = el["page"] if isinstance(el["page"], int) else -1
+        parts.append(_ELEMENT.pack(type_index[el.get("type") or "Text"], page, len(text)))
+        parts.append(text)
+
+    return zlib.compress(b"".join(parts), 1)
+
+
+def decode_elements(blob: bytes) -> list[dict]:
+    data = zlib.decompress(blob)
+    if data[:4] != MAGIC:
+        raise ValueError("not an element cache entry")
+
+    pos = 4
+    (type_count,) = struct.unpack_from("<B", data, pos)
+    pos += 1
+    types = []
+    for _ in range(type_count):
+        (length,) = struct.unpack_from("<B", data, pos)
+        pos += 1
+        types.append(data[pos:pos + length].decode("utf-8"))
+        pos += length
+
+    (count,) = struct.unpack_from("<I", data, pos)
+    pos += 4
+    elements = []
+    for _ in range(count):
+        type_i, page, length = _ELEMENT.unpack_from(data, pos)
+        pos += _ELEMENT.size
+        elements.append({
+            "text": data[pos:pos + length].decode("utf-8"),
+            "page": None if page == -1 else page,
+            "type": types[type_i],
+        })
+        pos += length
+    return elements
+
+
+def load_cached(key: str) -> list[dict] | None:
+    """Cached elements for `key`, or None on a miss (or an unreadable entry)."""
+    path = CACHE_DIR / f"{key}.elc"
+    try:
+        blob = path.read_bytes()
+    except FileNotFoundError:
+        cache_stats["misses"] += 1
+        return None
+
+    try:
+        elements = decode_elements(blob)
+    except Exception as e:
+        logger.warning(f"Ignoring corrupt element cache entry {path.name}: {e}")
+        cache_stats["errors"] += 1
+        cache_stats["misses"] += 1
+        return None
+
+    cache_stats["hits"] += 1
+    return elements
+
+
+def save_cached(key: str, elements: list[dict]) -> None:
+    """Write an entry atomically (a crash never leaves half a file behind)."""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = CACHE_DIR / f"{key}.elc"
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_bytes(encode_elements(elements))
+        os.replace(tmp, path)
+        cache_stats["writes"] += 1
+    except OSError as e:
+        # A read-only or full disk shouldn't break ingestion
+        logger.warning(f"Could not write element cache: {e}")
+        cache_stats["errors"] += 1
+
+
+def clear_element_cache() -> int:
+    """Delete every cached entry. Returns how many were removed."""
+    removed = 0
+    if CACHE_DIR.exists():
+        for path in CACHE_DIR.glob("*.elc"):
+            path.unlink()
+            removed += 1
+    return removed
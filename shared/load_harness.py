@@ -0,0 +1,339 @@
+"""
+Load-generation harness for chat completions.
+
+Modes:
+- constant: open-loop, requests start at a fixed RPS whether or not earlier
+            ones have finished (what real traffic looks like)
+- ramp:     open-loop, RPS grows linearly from start_rps to end_rps
+- closed:   N workers, each sends its next request as soon as the last returns
+
+Every run produces a JSON report with success / 429 / error counts, latency
+and time-to-first-token percentiles and a latency histogram.
+
+Try it against the local stub server:
+    python -m shared.load_harness
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+
+from openai import RateLimitError
+
+from .rate_limits import setup_async_api
+
+logger = logging.getLogger(__name__)
+
+# Upper edges (ms) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+# =============================================================================
+# Single request
+# =============================================================================
+
+async def timed_request(client, model: str, messages: list[dict], max_tokens: int, stream: bool = True) -> dict:
+    """Send one request and record how it went (never raises)."""
+    start = time.perf_counter()
+    ttft = None
+    status = "success"
+    error = None
+
+    try:
+        if stream:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            async for chunk in response:
+                if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+                    ttft = time.perf_counter() - start
+        else:
+            await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+            )
+    except RateLimitError:
+        status = "rate_limited"
+    except Exception as e:
+        status = "error"
+        error = type(e).__name__
+
+    return {
+        "start": start,
+        "latency": time.perf_counter() - start,
+        "ttft": ttft,
+        "status": status,
+        "error": error,
+    }
+
+
+# =============================================================================
+# Arrival schedules
+# =============================================================================
+
+def constant_schedule(rps: float, duration: float) -> list[float]:
+    """Start offsets (seconds) for a constant arrival rate."""
+    if rps <= 0 or duration <= 0:
+        raise ValueError(f"constant mode needs rps > 0 and duration > 0 (got rps={rps}, duration={duration})")
+    return [i / rps for i in range(int(rps * duration))]
+
+
+def ramp_schedule(start_rps: float, end_rps: float, duration: float) -> list[float]:
+    """
+    Start offsets for a rate that grows linearly from start_rps to end_rps.
+
+    Solves N(t) = start_rps*t + k*t^2 = i for each request i, where
+    k = (end_rps - start_rps) / (2 * duration). Either end may be 0 rps,
+    not both.
+    """
+    if start_rps < 0 or end_rps < 0 or max(start_rps, end_rps) <= 0 or duration <= 0:
+        raise ValueError(
+            f"ramp mode needs rates >= 0 with one > 0, and duration > 0 "
+            f"(got start_rps={start_rps}, end_rps={end_rps}, duration={duration})"
+        )
+    k = (end_rps - start_rps) / (2 * duration)
+    total = int(start_rps * duration + k * duration ** 2)
+
+    offsets = []
+    for i in range(total):
+        if k == 0:
+            offsets.append(i / start_rps)
+        else:
+            offsets.append((-start_rps + math.sqrt(start_rps ** 2 + 4 * k * i)) / (2 * k))
+    return offsets
+
+
+async def run_open_loop(client, offsets: list[float], **request_kwargs) -> list[dict]:
+    """Fire one request at each offset without waiting on earlier ones."""
+    loop_start = time.perf_counter()
+    tasks = []
+
+    for offset in offsets:
+        delay = loop_start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed_request(client, **request_kwargs)))
+
+    return await asyncio.gather(*tasks)
+
+
+async def run_closed_loop(client, concurrency: int, duration: float = None, total_requests: int = None, **request_kwargs) -> list[dict]:
+    """Keep `concurrency` requests in flight until the duration or request budget runs out."""
+    if duration is None and total_requests is None:
+        raise ValueError("closed mode needs a duration or total_requests")
+
+    # duration=0 / total_requests=0 are real limits (nothing is sent), not "unset"
+    deadline = time.perf_counter() + duration if duration is not None else None
+    remaining = [total_requests] if total_requests is not None else None
+    results = []
+
+    async def worker():
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            results.append(await timed_request(client, **request_kwargs))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Linear-interpolated percentile (pct in 0-100). None for empty input."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_stats(values: list[float]) -> dict:
+    """p50/p95/p99/min/max/mean in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ms = [v * 1000 for v in values]
+    return {
+        "count": len(ms),
+        "min": round(min(ms), 2),
+        "mean": round(sum(ms) / len(ms), 2),
+        "p50": round(percentile(ms, 50), 2),
+        "p95": round(percentile(ms, 95), 2),
+        "p99": round(percentile(ms, 99), 2),
+        "max": round(max(ms), 2),
+    }
+
+
+def latency_histogram(values: list[float]) -> dict:
+    """Count latencies into HISTOGRAM_BUCKETS_MS ("le_<ms>" keys, plus "inf")."""
+    buckets = {f"le_{edge}": 0 for edge in HISTOGRAM_BUCKETS_MS}
+    buckets["inf"] = 0
+    for v in values:
+        ms = v * 1000
+        for edge in HISTOGRAM_BUCKETS_MS:
+            if ms <= edge:
+                buckets[f"le_{edge}"] += 1
+                break
+        else:
+            buckets["inf"] += 1
+    return buckets
+
+
+def summarize(results: list[dict], wall_time: float, settings: dict) -> dict:
+    """Turn raw request records into the report dict."""
+    successes = [r for r in results if r["status"] == "success"]
+    errors_by_type = {}
+    for r in results:
+        if r["status"] == "error":
+            errors_by_type[r["error"]] = errors_by_type.get(r["error"], 0) + 1
+
+    return {
+        "settings": settings,
+        "wall_time_s": round(wall_time, 3),
+        "requests": {
+            "total": len(results),
+            "success": len(successes),
+            "rate_limited": sum(1 for r in results if r["status"] == "rate_limited"),
+            "error": sum(errors_by_type.values()),
+            "errors_by_type": errors_by_type,
+        },
+        "achieved_rps": round(len(results) / wall_time, 2) if wall_time else 0.0,
+        "latency_ms": latency_stats([r["latency"] for r in successes]),
+        "ttft_ms": latency_stats([r["ttft"] for r in successes if r["ttft"] is not None]),
+        "latency_histogram_ms": latency_histogram([r["latency"] for r in successes]),
+    }
+
+
+def write_report(report: dict, report_path: str = None) -> str:
+    """Save the report as JSON. Defaults to logs/load_<mode>_<timestamp>.json."""
+    if report_path is None:
+        Path("logs").mkdir(exist_ok=True)
+        report_path = f"logs/load_{report['settings']['mode']}_{datetime.now():%Y%m%d_%H%M%S}.json"
+
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return str(report_path)
+
+
+def print_report(report: dict) -> None:
+    req = report["requests"]
+    lat = report["latency_ms"]
+    ttft = report["ttft_ms"]
+
+    print(f"\n{'='*60}")
+    print(f"📈 Load test: {report['settings']['mode']}")
+    print(f"{'='*60}")
+    print(f"  Requests: {req['total']} in {report['wall_time_s']}s ({report['achieved_rps']} rps)")
+    print(f"  ✅ Success: {req['success']} | ⏳ 429: {req['rate_limited']} | ❌ Error: {req['error']}")
+    if lat["count"]:
+        print(f"  Latency ms: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']}")
+    if ttft["count"]:
+        print(f"  TTFT ms:    p50={ttft['p50']} p95={ttft['p95']} p99={ttft['p99']}")
+
+
+# =============================================================================
+# Entry point
+# =============================================================================
+
+async def run_load_async(
+    mode: str = "constant",
+    rps: float = 5,
+    duration: float = 10,
+    start_rps: float = 1,
+    end_rps: float = 10,
+    concurrency: int = 10,
+    total_requests: int = None,
+    model: str = "gpt-4.1-nano",
+    prompt: str = "Say hi.",
+    max_tokens: int = 5,
+    stream: bool = True,
+    base_url: str = None,
+) -> dict:
+    """Async version of run_load (use this inside a running event loop)."""
+    # No SDK retries: a 429 should be counted, not hidden
+    client = setup_async_api(base_url=base_url, max_retries=0)
+    request_kwargs = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "stream": stream,
+    }
+    settings = {"mode": mode, "model": model, "stream": stream, "base_url": base_url}
+
+    logger.info(f"Starting {mode} load test against {base_url or 'OpenAI'}")
+    start = time.perf_counter()
+
+    try:
+        if mode == "constant":
+            settings.update(rps=rps, duration=duration)
+            results = await run_open_loop(client, constant_schedule(rps, duration), **request_kwargs)
+        elif mode == "ramp":
+            settings.update(start_rps=start_rps, end_rps=end_rps, duration=duration)
+            results = await run_open_loop(client, ramp_schedule(start_rps, end_rps, duration), **request_kwargs)
+        elif mode == "closed":
+            settings.update(concurrency=concurrency, duration=duration, total_requests=total_requests)
+            results = await run_closed_loop(
+                client, concurrency,
+                duration=None if total_requests is not None else duration,
+                total_requests=total_requests,
+                **request_kwargs,
+            )
+        else:
+            raise ValueError(f"Unknown mode: {mode}. Use 'constant', 'ramp' or 'closed'")
+    finally:
+        await client.close()
+
+    report = summarize(results, time.perf_counter() - start, settings)
+    logger.info(f"Load test done: {report['requests']}")
+    return report
+
+
+def run_load(report_path: str = None, **kwargs) -> dict:
+    """
+    Run a load test and write its JSON report.
+
+    Args:
+        report_path: Where to save the report (default: logs/load_<mode>_<timestamp>.json)
+        **kwargs:    See run_load_async - mode, rps, duration, start_rps,
+                     end_rps, concurrency, total_requests, model, prompt,
+                     max_tokens, stream, base_url
+
+    Returns:
+        The report dict (also has "report_path" set).
+    """
+    report = asyncio.run(run_load_async(**kwargs))
+    report["report_path"] = write_report(report, report_path)
+    return report
+
+
+if __name__ == "__main__":
+    from .stub_server import start_stub_server
+
+    server = start_stub_server(port=0, latency=0.05, rate_limit_rate=0.05)
+
+    for settings in [
+        {"mode": "constant", "rps": 20, "duration": 5},
+        {"mode": "ramp", "start_rps": 5, "end_rps": 40, "duration": 5},
+        {"mode": "closed", "concurrency": 10, "duration": 5},
+    ]:
+        report = run_load(base_url=server.base_url, **settings)
+        print_report(report)
+        print(f"  Report: {report['report_path']}")
+
+    server.shutdown()
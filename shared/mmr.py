@@ -0,0 +1,78 @@
+"""
+Maximal Marginal Relevance (MMR) reranking.
+
+Top-k by similarity alone often returns several near-identical chunks
+(the same paragraph from overlapping chunks, or the same page twice).
+MMR picks results one at a time, trading relevance to the query against
+similarity to what's already picked:
+
+    score(d) = lambda * sim(query, d) - (1 - lambda) * max(sim(d, picked))
+
+lambda = 1.0 is plain top-k, lower values favour diversity.
+
+Everything runs in NumPy on the candidate embeddings Chroma already stored
+(include=["embeddings"]) - no re-embedding. The query side comes from the
+distances Chroma returns, so the query isn't embedded twice either.
+
+    idx = mmr_select(relevance, embeddings, k=5, lambda_mult=0.5)
+"""
+
+import numpy as np
+
+DEFAULT_LAMBDA = 0.5
+DEFAULT_FETCH_K = 20
+
+
+def distances_to_similarity(distances, space: str = "l2") -> np.ndarray:
+    """
+    Chroma distances -> cosine similarity.
+
+    space: the collection's "hnsw:space" ("l2" is Chroma's default).
+           For l2 this assumes unit-length embeddings (true for OpenAI's):
+           squared L2 = 2 - 2 * cos.
+    """
+    d = np.asarray(distances, dtype=np.float32)
+    if space == "cosine":
+        return 1.0 - d
+    if space == "ip":
+        return -d
+    return 1.0 - d / 2.0
+
+
+def mmr_select(relevance, embeddings, k: int, lambda_mult: float = DEFAULT_LAMBDA) -> list[int]:
+    """
+    Indices of the k candidates MMR picks, in pick order.
+
+    Args:
+        relevance:   Query similarity per candidate (higher = more relevant).
+        embeddings:  Candidate embeddings, one row per candidate.
+        k:           How many to pick.
+        lambda_mult: 1.0 = relevance only, 0.0 = diversity only.
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    k = min(k, n)
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, 1e-12)
+    pairwise = vectors @ vectors.T            # n x n cosine similarities
+
+    first = int(np.argmax(relevance))
+    picked = [first]
+    available = np.ones(n, dtype=bool)
+    available[first] = False
+    max_sim = pairwise[first].copy()           # similarity to the closest picked result
+
+    weighted = lambda_mult * relevance
+    penalty = 1.0 - lambda_mult
+    while len(picked) < k:
+        scores = np.where(available, weighted - penalty * max_sim, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(max_sim, pairwise[best], out=max_sim)
+
+    return picked
@@ -0,0 +1,163 @@
+"""
+SQLite-backed parent chunk store for parent/child retrieval.
+
+Parent/child retrieval searches small child chunks, then sends their larger
+parent chunks to the model. Keeping every parent in one dict (saved with
+json.dump, loaded with json.load) makes startup time and memory grow with
+the corpus. ParentStore keeps them in SQLite instead:
+
+- opening is constant time (nothing is read until a query needs it)
+- get_many() fetches only the parent ids a query's children point to
+- put() writes incrementally during ingest; commit() once per document
+- a rebuild goes into a separate file and publish() swaps it in atomically,
+  so a failed ingest never leaves readers with an empty store
+
+    store = ParentStore("parent_store.db")
+    store.put(parent_id, chunk.page_content, chunk.metadata)
+    store.commit()
+    parents = store.get_many(["id1", "id2"])   # {id: {"content", "metadata"}}
+
+An existing parent_store.json can be moved over once with import_json().
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on ? parameters per statement is 999 on older builds
+_MAX_PARAMS = 900
+
+
+class ParentStore:
+    """
+    Key-value store of parent chunks: id -> {"content", "metadata"}.
+
+    Args:
+        path: SQLite file (created if missing).
+    """
+
+    def __init__(self, path="parent_store.db"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parents ("
+            "parent_id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    # ── Writes (ingest) ──
+
+    def put(self, parent_id: str, content: str, metadata: dict = None) -> None:
+        """Add or replace one parent. Not durable until commit()."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO parents (parent_id, content, metadata) VALUES (?, ?, ?)",
+                (parent_id, content, json.dumps(metadata or {}, default=str)),
+            )
+
+    def commit(self) -> None:
+        with self._lock:
+            self._db.commit()
+
+    def clear(self) -> None:
+        """Delete every parent (before a full re-ingest)."""
+        with self._lock:
+            self._db.execute("DELETE FROM parents")
+            self._db.commit()
+
+    def import_json(self, json_path) -> int:
+        """Copy a parent_store.json ({id: {"content", "metadata"}}) in. Returns parents imported."""
+        with open(json_path, "r") as f:
+            parents = json.load(f)
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO parents (parent_id, content, metadata) VALUES (?, ?, ?)",
+                (
+                    (pid, p["content"], json.dumps(p.get("metadata") or {}, default=str))
+                    for pid, p in parents.items()
+                ),
+            )
+            self._db.commit()
+        logger.info(f"Imported {len(parents)} parents from {json_path}")
+        return len(parents)
+
+    def _sidecars(self, path: Path) -> list[Path]:
+        return [Path(f"{path}-wal"), Path(f"{path}-shm")]
+
+    def publish(self, path) -> None:
+        """Close this store and atomically move it to `path`, replacing what's there."""
+        target = Path(path)
+        with self._lock:
+            self._db.commit()
+            # Fold the WAL into the main file so the single os.replace moves everything
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.close()
+            self._db = None
+            for sidecar in self._sidecars(target) + self._sidecars(self.path):
+                sidecar.unlink(missing_ok=True)
+            os.replace(self.path, target)
+        logger.info(f"Published parent store {self.path} -> {target}")
+        self.path = target
+
+    def discard(self) -> None:
+        """Close this store and delete its files (an abandoned rebuild)."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            for file in [self.path] + self._sidecars(self.path):
+                file.unlink(missing_ok=True)
+
+    # ── Reads (chat) ──
+
+    def get_many(self, parent_ids: list[str]) -> dict:
+        """{id: {"content", "metadata"}} for the ids that exist (missing ids are left out)."""
+        found = {}
+        ids = list(dict.fromkeys(parent_ids))
+        with self._lock:
+            for start in range(0, len(ids), _MAX_PARAMS):
+                batch = ids[start:start + _MAX_PARAMS]
+                rows = self._db.execute(
+                    f"SELECT parent_id, content, metadata FROM parents "
+                    f"WHERE parent_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for parent_id, content, metadata in rows:
+                    found[parent_id] = {"content": content, "metadata": json.loads(metadata)}
+        return found
+
+    def get(self, parent_id: str) -> dict | None:
+        return self.get_many([parent_id]).get(parent_id)
+
+    def __contains__(self, parent_id: str) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM parents WHERE parent_id = ?", (parent_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        """Number of parents (a table count - not free on big stores)."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
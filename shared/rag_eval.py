@@ -0,0 +1,494 @@
+"""
+Offline RAG evaluation and latency benchmark.
+
+Runs a labeled question set against a corpus for every combination of:
+
+- chunking strategy (fixed, overlap, sentence, paragraph)
+- index backend     (numpy brute force; chroma if it's installed)
+- n_results         (k = 1, 3, 5, 10 by default)
+
+and reports retrieval quality and per-stage latency:
+
+- recall@k: share of a question's relevant passages found in the top k
+- hit@k:    share of questions with at least one relevant passage in the top k
+- MRR:      mean of 1 / rank of the first relevant chunk (0 if none in top k)
+- embed / search / generate latency percentiles (ms)
+
+Everything is local: queries and chunks are embedded with
+HashingEmbeddingFunction (no API calls) and answers come from the stub
+server, so runs are free, repeatable and comparable. Each run is saved as
+JSON (logs/rag_eval_<timestamp>.json); compare_reports() diffs two runs.
+
+Questions file (see day10-rag-advanced/eval_questions.json):
+
+    {"corpus": "day10-rag-advanced/documents", "files": "*.txt",
+     "questions": [{"question": "...",
+                    "relevant": [{"source": "033429.txt", "evidence": "text from the document"}]}]}
+
+Relevance doesn't depend on chunk ids (they change with the strategy): a
+chunk is relevant when it comes from the passage's source and contains most
+of its evidence text.
+
+    python -m shared.rag_eval
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from openai import OpenAI
+
+from .chunking_strategies import fixed_size_chunks, overlap_chunks, paragraph_chunks, sentence_chunks_legacy
+from .context_assembly import assemble_context
+from .load_harness import latency_stats
+from .read_document import read_document
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUESTIONS = Path(__file__).resolve().parent.parent / "day10-rag-advanced" / "eval_questions.json"
+DEFAULT_K_VALUES = (1, 3, 5, 10)
+EVIDENCE_COVERAGE = 0.6     # share of the evidence's word triples a chunk must contain
+
+# sentence_chunks needs nltk's punkt download; the legacy splitter is offline
+STRATEGIES = {
+    "fixed": lambda text: fixed_size_chunks(text, chunk_size=100),
+    "overlap": lambda text: overlap_chunks(text, chunk_size=100, overlap=20),
+    "sentence": sentence_chunks_legacy,
+    "paragraph": paragraph_chunks,
+}
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9$.,%'-]*[a-z0-9%]|[a-z0-9]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it its of on or "
+    "that the their they this to was were what when where which who why will with".split()
+)
+
+
+# =============================================================================
+# Local embeddings
+# =============================================================================
+
+class HashingEmbeddingFunction:
+    """
+    Offline embedding function: hashed word unigrams + bigrams, log-scaled, L2-normalized.
+
+    Not semantic like a real model, but deterministic, free and fast - good
+    enough to compare chunking strategies and backends against each other.
+    Callable like a Chroma embedding function: ef(["text", ...]) -> vectors.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self._buckets = {}     # feature -> (index, sign)
+
+    def _bucket(self, feature: str):
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            bucket = self._buckets[feature] = (h % self.dim, 1.0 if (h >> 63) & 1 else -1.0)
+        return bucket
+
+    def embed(self, text: str) -> np.ndarray:
+        words = [w for w in _TOKEN.findall(text.lower()) if w not in _STOPWORDS]
+        counts = {}
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, n in counts.items():
+            index, sign = self._bucket(feature)
+            vector[index] += sign * (1.0 + np.log(n))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def __call__(self, input: list[str]) -> list[np.ndarray]:
+        return [self.embed(text) for text in input]
+
+
+# =============================================================================
+# Index backends
+# =============================================================================
+
+class NumpyIndex:
+    """Exact cosine search over a matrix of unit vectors."""
+
+    name = "numpy"
+
+    def __init__(self, embeddings: list[np.ndarray]):
+        self._matrix = np.stack(embeddings)
+
+    def search(self, query_embedding: np.ndarray, k: int) -> list[int]:
+        scores = self._matrix @ query_embedding
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])].tolist()
+
+
+class ChromaIndex:
+    """Chroma HNSW (cosine) over precomputed embeddings, in memory."""
+
+    name = "chroma"
+
+    def __init__(self, embeddings: list[np.ndarray]):
+        import chromadb
+
+        client = chromadb.Client()
+        self._collection = client.create_collection(
+            name=f"rag_eval_{uuid.uuid4().hex[:8]}",
+            metadata={"hnsw:space": "cosine"},
+        )
+        ids = [str(i) for i in range(len(embeddings))]
+        for start in range(0, len(ids), 5000):
+            self._collection.add(
+                ids=ids[start:start + 5000],
+                embeddings=[e.tolist() for e in embeddings[start:start + 5000]],
+            )
+
+    def search(self, query_embedding: np.ndarray, k: int) -> list[int]:
+        results = self._collection.query(query_embeddings=[query_embedding.tolist()], n_results=k, include=[])
+        return [int(i) for i in results["ids"][0]]
+
+
+def available_backends() -> dict:
+    backends = {"numpy": NumpyIndex}
+    try:
+        import chromadb
+        if callable(getattr(chromadb, "Client", None)):
+            backends["chroma"] = ChromaIndex
+    except ImportError:
+        pass
+    return backends
+
+
+# =============================================================================
+# Corpus, labels and scoring
+# =============================================================================
+
+def _words(text: str) -> list[str]:
+    return " ".join(text.split()).lower().split(" ")
+
+
+def _triples(words: list[str]) -> set:
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def load_questions(path=DEFAULT_QUESTIONS) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for q in data["questions"]:
+        for passage in q["relevant"]:
+            passage["_triples"] = _triples(_words(passage["evidence"]))
+    return data
+
+
+def load_corpus(corpus_dir, pattern: str = "*.txt") -> dict:
+    """{filename: text} for the files matching `pattern`."""
+    files = sorted(p for p in Path(corpus_dir).glob(pattern) if p.is_file())
+    corpus = {}
+    for path in files:
+        try:
+            corpus[path.name] = read_document(str(path))
+        except Exception as e:
+            logger.warning(f"Skipping {path.name}: {e}")
+    return corpus
+
+
+def _digest(parts) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def relevant_passages(chunk: dict, question: dict) -> set:
+    """Indices of the question's passages this chunk covers."""
+    covered = set()
+    chunk_triples = None
+    for i, passage in enumerate(question["relevant"]):
+        if passage["source"] != chunk["source"]:
+            continue
+        if chunk_triples is None:
+            chunk_triples = _triples(_words(chunk["content"]))
+        if len(passage["_triples"] & chunk_triples) >= EVIDENCE_COVERAGE * len(passage["_triples"]):
+            covered.add(i)
+    return covered
+
+
+def score_ranking(ranked: list[dict], question: dict) -> dict:
+    """recall, hit and reciprocal rank for one ranked chunk list."""
+    found = set()
+    first_hit = None
+    for rank, chunk in enumerate(ranked, 1):
+        passages = relevant_passages(chunk, question)
+        if passages and first_hit is None:
+            first_hit = rank
+        found |= passages
+    return {
+        "recall": len(found) / len(question["relevant"]),
+        "hit": 1.0 if found else 0.0,
+        "rr": 1.0 / first_hit if first_hit else 0.0,
+    }
+
+
+# =============================================================================
+# Evaluation
+# =============================================================================
+
+def _chunk_corpus(corpus: dict, strategy) -> list[dict]:
+    chunks = []
+    for source, text in corpus.items():
+        pieces = [c for c in strategy(text) if c.strip()]
+        for i, piece in enumerate(pieces):
+            chunks.append({"content": piece, "source": source, "chunk_index": i, "total_chunks": len(pieces)})
+    return chunks
+
+
+def _generate(client, model: str, question: str, ranked: list[dict]) -> tuple[float, int]:
+    """One answer call (the stub by default). Returns (seconds, prompt tokens)."""
+    context = assemble_context(ranked, budget_tokens=3000)["context"]
+    start = time.perf_counter()
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": "Answer ONLY from the provided sources. Cite them as [Source N]."},
+            {"role": "user", "content": f"Context from documents:\n\n{context}\n\n---\n\nQuestion: {question}"},
+        ],
+        temperature=0.1,
+    )
+    return time.perf_counter() - start, response.usage.prompt_tokens
+
+
+def evaluate(
+    questions_path=DEFAULT_QUESTIONS,
+    corpus_dir=None,
+    strategies: list[str] = None,
+    backends: list[str] = None,
+    k_values=DEFAULT_K_VALUES,
+    generate: bool = True,
+    base_url: str = None,
+    model: str = "gpt-4o-mini",
+    embedding_dim: int = 1024,
+) -> dict:
+    """
+    Run the benchmark and return the report dict.
+
+    Args:
+        questions_path: Labeled questions JSON.
+        corpus_dir:     Documents folder (default: the one named in the questions file,
+                        relative to the repo root).
+        strategies:     Names from STRATEGIES (default: all).
+        backends:       "numpy" and/or "chroma" (default: all available).
+        k_values:       n_results values to score.
+        generate:       Also time an answer call per question and k.
+        base_url:       OpenAI-compatible server for answers (default: a local stub server).
+        model:          Model name sent with answer calls.
+        embedding_dim:  HashingEmbeddingFunction size.
+    """
+    data = load_questions(questions_path)
+    questions = data["questions"]
+    repo_root = Path(__file__).resolve().parent.parent
+    corpus_dir = Path(corpus_dir) if corpus_dir else repo_root / data["corpus"]
+    corpus = load_corpus(corpus_dir, data.get("files", "*.txt"))
+
+    strategies = strategies or list(STRATEGIES)
+    known_backends = available_backends()
+    backends = backends or list(known_backends)
+    missing = [b for b in backends if b not in known_backends]
+    if missing:
+        raise ValueError(f"Backend(s) not available: {missing}. Available: {list(known_backends)}")
+    k_values = sorted(k_values)
+
+    server = None
+    client = None
+    if generate:
+        if base_url is None:
+            from .stub_server import start_stub_server
+            server = start_stub_server(port=0, latency=0.0, token_delay=0.0)
+            base_url = server.base_url
+        client = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+
+    ef = HashingEmbeddingFunction(embedding_dim)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {
+            "strategies": strategies,
+            "backends": backends,
+            "k_values": k_values,
+            "generate": generate,
+            "model": model,
+            "base_url": base_url if server is None else "stub",
+            "embedding": f"hashing-{embedding_dim}",
+            "evidence_coverage": EVIDENCE_COVERAGE,
+        },
+        "corpus": {
+            "path": str(corpus_dir),
+            "files": len(corpus),
+            "chars": sum(len(t) for t in corpus.values()),
+            "digest": _digest(f"{name}\0{text}" for name, text in corpus.items()),
+        },
+        "questions": {
+            "path": str(questions_path),
+            "count": len(questions),
+            "digest": _digest(json.dumps(q["question"]) + json.dumps(
+                [(p["source"], p["evidence"]) for p in q["relevant"]]) for q in questions),
+        },
+        "strategies": {},
+        "results": [],
+    }
+
+    try:
+        # Query embeddings don't depend on the strategy: time them once per question
+        embed_times = []
+        query_embeddings = []
+        for q in questions:
+            start = time.perf_counter()
+            query_embeddings.append(ef.embed(q["question"]))
+            embed_times.append(time.perf_counter() - start)
+
+        for strategy_name in strategies:
+            start = time.perf_counter()
+            chunks = _chunk_corpus(corpus, STRATEGIES[strategy_name])
+            chunk_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            chunk_embeddings = ef([c["content"] for c in chunks])
+            index_embed_time = time.perf_counter() - start
+
+            report["strategies"][strategy_name] = {
+                "chunks": len(chunks),
+                "avg_chunk_chars": round(sum(len(c["content"]) for c in chunks) / max(len(chunks), 1), 1),
+                "chunk_s": round(chunk_time, 3),
+                "embed_s": round(index_embed_time, 3),
+                "build_s": {},
+            }
+
+            for backend_name in backends:
+                start = time.perf_counter()
+                index = known_backends[backend_name](chunk_embeddings)
+                report["strategies"][strategy_name]["build_s"][backend_name] = round(time.perf_counter() - start, 3)
+
+                for k in k_values:
+                    search_times, generate_times, prompt_tokens = [], [], []
+                    scores = []
+                    for q, embedding in zip(questions, query_embeddings):
+                        start = time.perf_counter()
+                        ids = index.search(embedding, k)
+                        search_times.append(time.perf_counter() - start)
+
+                        ranked = [chunks[i] for i in ids]
+                        scores.append(score_ranking(ranked, q))
+
+                        if client is not None:
+                            seconds, tokens = _generate(client, model, q["question"], ranked)
+                            generate_times.append(seconds)
+                            prompt_tokens.append(tokens)
+
+                    n = len(scores)
+                    result = {
+                        "strategy": strategy_name,
+                        "backend": backend_name,
+                        "k": k,
+                        "recall": round(sum(s["recall"] for s in scores) / n, 4),
+                        "hit_rate": round(sum(s["hit"] for s in scores) / n, 4),
+                        "mrr": round(sum(s["rr"] for s in scores) / n, 4),
+                        "latency_ms": {
+                            "embed": latency_stats(embed_times),
+                            "search": latency_stats(search_times),
+                            "generate": latency_stats(generate_times),
+                        },
+                    }
+                    if prompt_tokens:
+                        result["avg_prompt_tokens"] = round(sum(prompt_tokens) / len(prompt_tokens), 1)
+                    report["results"].append(result)
+                    logger.info(f"{strategy_name}/{backend_name}/k={k}: recall={result['recall']} mrr={result['mrr']}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    return report
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+def write_report(report: dict, report_path: str = None) -> str:
+    """Save the report as JSON. Defaults to logs/rag_eval_<timestamp>.json."""
+    if report_path is None:
+        Path("logs").mkdir(exist_ok=True)
+        report_path = f"logs/rag_eval_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return str(report_path)
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'='*78}")
+    print(f"🧪 RAG eval: {report['questions']['count']} questions, {report['corpus']['files']} files "
+          f"({report['settings']['embedding']})")
+    print(f"{'='*78}")
+    print(f"  {'strategy':<10} {'backend':<7} {'k':>3} {'recall':>7} {'hit':>6} {'mrr':>6} "
+          f"{'search p50':>11} {'gen p50':>8} {'tokens':>7}")
+    for r in report["results"]:
+        search = r["latency_ms"]["search"].get("p50", "-")
+        generate = r["latency_ms"]["generate"].get("p50", "-")
+        print(f"  {r['strategy']:<10} {r['backend']:<7} {r['k']:>3} {r['recall']:>7.3f} {r['hit_rate']:>6.3f} "
+              f"{r['mrr']:>6.3f} {search:>11} {generate:>8} {r.get('avg_prompt_tokens', '-'):>7}")
+
+
+def compare_reports(old: dict, new: dict) -> list[dict]:
+    """
+    Per-configuration deltas (new - old) for recall, hit_rate, mrr and p50 latencies.
+
+    Only configurations present in both are compared. Set "comparable" is
+    False when the corpus or question set differ.
+    """
+    def key(r):
+        return (r["strategy"], r["backend"], r["k"])
+
+    old_results = {key(r): r for r in old["results"]}
+    comparable = (old["corpus"]["digest"] == new["corpus"]["digest"]
+                  and old["questions"]["digest"] == new["questions"]["digest"])
+    if not comparable:
+        logger.warning("Reports use a different corpus or question set")
+
+    deltas = []
+    for r in new["results"]:
+        before = old_results.get(key(r))
+        if before is None:
+            continue
+        delta = {"strategy": r["strategy"], "backend": r["backend"], "k": r["k"], "comparable": comparable}
+        for metric in ("recall", "hit_rate", "mrr"):
+            delta[metric] = round(r[metric] - before[metric], 4)
+        for stage in ("embed", "search", "generate"):
+            a = before["latency_ms"][stage].get("p50")
+            b = r["latency_ms"][stage].get("p50")
+            delta[f"{stage}_p50_ms"] = round(b - a, 2) if a is not None and b is not None else None
+        deltas.append(delta)
+    return deltas
+
+
+def run_eval(report_path: str = None, **kwargs) -> dict:
+    """
+    Run evaluate() and write its JSON report.
+
+    Returns:
+        The report dict (also has "report_path" set).
+    """
+    report = evaluate(**kwargs)
+    report["report_path"] = write_report(report, report_path)
+    return report
+
+
+if __name__ == "__main__":
+    report = run_eval()
+    print_report(report)
+    print(f"\n  Report: {report['report_path']}")
@@ -1,10 +1,12 @@
-import os,time, asyncio, logging
+import os,time, logging
 from openai import AsyncOpenAI, RateLimitError, APIConnectionError
 from dotenv import load_dotenv
 
 from .refactored_chatbot import  (load_config, setup_api)
 from .logging_config import  setup_logging
 
+logger = logging.getLogger(__name__)
+
 def call_with_retry():
     """Retry connection setup"""
 
@@ -46,58 +48,18 @@ def response_with_retry(client, messages, config):
             logger.error(f"Some error : {e} happened")
             return None
 
-def spam_api():
-    client = setup_api()
-    config = load_config()
-    
-    for i in range(1000):
-        print(f"Request {i}")
-        messages = [{"role": "user", "content": "I'm gonna ragebait you so hard"}]  # Simple, fixed message
-        
-        # Use your retry function here
-        reply = response_with_retry(client, messages, config)
+def setup_async_api(base_url=None, max_retries=2):
+    """
+    Async client for concurrent calls.
 
-def setup_async_api():
+    Pass base_url to point at another OpenAI-compatible server
+    (e.g. shared.stub_server); a placeholder key is used if none is set.
+    """
     load_dotenv()
-    config = load_config()
-    # Assuming your load_config returns a dict with api_key, or you set it via env vars
-    # You might need to adjust how you get the key depending on your config structure
-    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) 
-
-async def single_request(client, index):
-    """Sends one request but doesn't wait for others to finish."""
-    try:
-        print(f"Firing request {index}...")
-        
-        # We use 'await' here, which lets Python switch to sending other requests 
-        # while this one is travelling across the internet.
-        response = await client.chat.completions.create(
-            model="gpt-4.1-nano", # Use a cheap model for testing!
-            messages=[{"role": "user", "content": "Say hi."}],
-            max_tokens=5
-        )
-        print(f"Request {index} Success!")
-        
-    except RateLimitError:
-        print(f"!!! RATE LIMIT HIT on Request {index} !!!")
-    except Exception as e:
-        print(f"Request {index} failed with: {e}")
-
-async def spam_api_concurrently():
-    client = setup_async_api()
-    
-    number_of_requests = 451 
-    
-    tasks = []
-    for i in range(number_of_requests):
-        tasks.append(single_request(client, i))
-
-    print(f"Starting {number_of_requests} simultaneous requests...")
-    
-    # 3. asyncio.gather launches them all at roughly the same time
-    await asyncio.gather(*tasks)
-    
-    await client.close()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key and base_url:
+        api_key = "stub"
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries)
 
 if __name__ == "__main__":
     log_file= setup_logging()
@@ -1,3 +1,13 @@
+import csv
+import io
+import json
+import logging
+import re
+from pathlib import Path
+
+from .element_cache import cache_key, load_cached, save_cached
+
+logger = logging.getLogger(__name__)
 
 # def read_document(file_path: str) -> str:
 #     """Read document with intelligent spacing based on element types."""
@@ -26,8 +36,213 @@
 #     # Join regular elements with paragraph breaks
 #     return '\n\n'.join(parts)
 
+# =============================================================================
+# Reader registry
+# =============================================================================
+# unstructured's partition() is slow to import and has real per-file overhead.
+# Simple formats are read directly instead; everything else (and anything a
+# fast reader can't handle) still goes through partition().
+#
+# Every reader returns elements shaped like partition()'s output:
+#     [{"text": str, "page": int | None, "type": "Title" | "NarrativeText" | ...}]
+
+READERS = {}
+
+# Part of the element cache key: bump whenever a reader's output changes
+PARSER_VERSION = "1"
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+")
+LATIN_CODEPAGES = {
+    "cp1250", "cp1252", "cp1254", "cp1257", "latin_1", "iso8859_2",
+    "iso8859_9", "iso8859_15", "mac_latin2", "mac_roman",
+}
+
+
+class FastReaderFallback(Exception):
+    """Raised by a fast reader when partition() should handle the file instead."""
+
+
+def register_reader(*extensions):
+    """Decorator: use `fn(path) -> elements` for files with these extensions."""
+    def decorator(fn):
+        for ext in extensions:
+            READERS[ext.lower()] = fn
+        return fn
+    return decorator
+
+
+def decode_bytes(data: bytes) -> str:
+    """UTF-8 (with or without BOM) first, then charset detection, then latin-1."""
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        pass
+
+    from charset_normalizer import from_bytes
+    best = from_bytes(data).best()
+    if best is None:
+        return data.decode("latin-1")
+
+    # Short Western-European text is often misread as another 8-bit
+    # codepage (café -> cafi); Windows-1252 is by far the likeliest of them.
+    if best.encoding in LATIN_CODEPAGES:
+        try:
+            return data.decode("cp1252")
+        except UnicodeDecodeError:
+            pass
+    return str(best)
+
+
+def _read_text(path: Path) -> str:
+    with open(path, "rb", buffering=1024 * 1024) as f:
+        return decode_bytes(f.read()).replace("\r\n", "\n")
+
+
+def _paragraph_elements(text: str, page=None, el_type: str = "NarrativeText") -> list[dict]:
+    return [
+        {"text": para.strip(), "page": page, "type": el_type}
+        for para in PARAGRAPH_BREAK.split(text)
+        if para.strip()
+    ]
+
+
+@register_reader(".txt", ".text", ".log")
+def read_text_elements(path: Path) -> list[dict]:
+    """Paragraphs of a plain-text file. Form feeds (\\f) start a new page."""
+    text = _read_text(path)
+    if "\f" not in text:
+        return _paragraph_elements(text)
+
+    elements = []
+    for page, page_text in enumerate(text.split("\f"), 1):
+        elements.extend(_paragraph_elements(page_text, page))
+    return elements
+
+
+@register_reader(".md", ".markdown")
+def read_markdown_elements(path: Path) -> list[dict]:
+    """Headings become Title elements, other blocks NarrativeText."""
+    elements = []
+    for block in PARAGRAPH_BREAK.split(_read_text(path)):
+        lines = []
+        for line in block.strip().splitlines():
+            if MARKDOWN_HEADING.match(line):
+                if lines:
+                    elements.append({"text": "\n".join(lines), "page": None, "type": "NarrativeText"})
+                    lines = []
+                elements.append({"text": MARKDOWN_HEADING.sub("", line).strip(), "page": None, "type": "Title"})
+            elif line.strip():
+                lines.append(line)
+        if lines:
+            elements.append({"text": "\n".join(lines), "page": None, "type": "NarrativeText"})
+    return elements
+
+
+@register_reader(".csv", ".tsv")
+def read_csv_elements(path: Path) -> list[dict]:
+    """The whole file as one Table element, one row per line."""
+    text = _read_text(path)
+    delimiter = "\t" if path.suffix.lower() == ".tsv" else ","
+    rows = csv.reader(io.StringIO(text), delimiter=delimiter)
+    table = "\n".join(" ".join(cell.strip() for cell in row) for row in rows if any(row))
+    return [{"text": table, "page": None, "type": "Table"}] if table else []
+
+
+@register_reader(".json")
+def read_json_elements(path: Path) -> list[dict]:
+    """One element per top-level item (list entry or object key)."""
+    try:
+        data = json.loads(_read_text(path))
+    except json.JSONDecodeError as e:
+        raise FastReaderFallback(f"invalid JSON: {e}")
+
+    if isinstance(data, list):
+        items = data
+    elif isinstance(data, dict):
+        items = [{key: value} for key, value in data.items()]
+    else:
+        items = [data]
+
+    return [
+        {"text": item if isinstance(item, str) else json.dumps(item, ensure_ascii=False, indent=1), "page": None, "type": "Text"}
+        for item in items
+        if item not in ("", None)
+    ]
+
+
+@register_reader(".pdf")
+def read_pdf_elements(path: Path) -> list[dict]:
+    """Text layer of each page via pypdf. Scanned PDFs (no text) go to partition()."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise FastReaderFallback("pypdf is not installed")
+
+    elements = []
+    try:
+        for page, pdf_page in enumerate(PdfReader(path).pages, 1):
+            elements.extend(_paragraph_elements(pdf_page.extract_text() or "", page))
+    except Exception as e:
+        # Damaged or unusual PDFs raise all sorts of pypdf errors; partition() may still cope
+        raise FastReaderFallback(f"pypdf failed: {e}")
+
+    if not elements:
+        raise FastReaderFallback("no text layer")
+    return elements
+
+
+def partition_elements(file_path: str) -> list[dict]:
+    """The slow path: unstructured's partition(), converted to element dicts."""
+    from unstructured.partition.auto import partition
+
+    return [
+        {
+            "text": str(el),
+            "page": getattr(getattr(el, "metadata", None), "page_number", None),
+            "type": type(el).__name__,
+        }
+        for el in partition(filename=str(file_path))
+    ]
+
+
+def read_elements(file_path: str, fast: bool = True, cache: bool = True) -> list[dict]:
+    """
+    Parse a document into [{"text", "page", "type"}] elements.
+
+    Args:
+        file_path: Document to read.
+        fast:      Use the registered fast reader for this extension if there
+                   is one. False forces unstructured's partition().
+        cache:     Reuse elements parsed earlier from identical file content
+                   (see shared.element_cache).
+    """
+    path = Path(file_path)
+    reader = READERS.get(path.suffix.lower()) if fast else None
+
+    key = None
+    if cache:
+        key = cache_key(path, f"{PARSER_VERSION}:{reader.__name__ if reader else 'partition'}")
+        elements = load_cached(key)
+        if elements is not None:
+            logger.debug(f"Element cache hit: {path.name}")
+            return elements
+
+    elements = None
+    if reader is not None:
+        try:
+            elements = reader(path)
+        except FastReaderFallback as e:
+            logger.info(f"Fast reader skipped {path.name} ({e}); using partition")
+    if elements is None:
+        elements = partition_elements(file_path)
+
+    if key is not None:
+        save_cached(key, elements)
+    return elements
+
+
 def read_document(file_path: str) -> str:
-    from unstructured.partition.auto import partition 
-    elements = partition(filename=file_path)
+    elements = read_elements(file_path)
 
-    return '\n\n'.join([str(el) for el in elements]) 
\ No newline at end of file
+    return '\n\n'.join([el["text"] for el in elements]) 
\ No newline at end of file
@@ -4,6 +4,9 @@ from dotenv import load_dotenv
 import json
 from pathlib import Path
 
+from shared.chat_log import ChatLogWriter
+from shared.summary_memory import SummaryMemory
+
 
 def load_config():
         current_dir = Path(__file__).parent
@@ -21,13 +24,14 @@ def load_config():
             print("WARNING: 'config.json' is corrupted. Using an empty config.")
             config = {} # Also a safe fallback
         return config
-def setup_api():
+def setup_api(http_client=None):
+    # http_client: optional httpx.Client, e.g. Cassette.httpx_client() for record/replay
     load_dotenv()
     try:
         api_key=os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("API key missing")
-        client=openai.Client(api_key=api_key)
+        client=openai.Client(api_key=api_key, http_client=http_client)
         
 
     except Exception as e:
@@ -42,10 +46,9 @@ def get_user_file():
     return input("\nWhat file do you want: ").strip()
 
 def save_chat_log(messages, filename):
+    # One-shot dump at the end; for a crash-safe running log use ChatLogWriter
     with open(f"{filename}_processed.txt","w")as f:
-        for msg in messages:
-            f.write(f"{msg['role']}: {msg['content']}\n")
-            f.write("-" * 50 + "\n")
+        f.write("".join(f"{msg['role']}: {msg['content']}\n" + "-" * 50 + "\n" for msg in messages))
 
 
 def get_ai_response(client, messages, config):
@@ -64,20 +67,27 @@ def display_response(reply):
 
 def main():
     client= setup_api()
-    messages=[{"role":"system", "content":"You are a diva"}]
+    # Recent turns verbatim, older ones folded into a summary in the background
+    memory=SummaryMemory(client, system_prompt="You are a diva", model=config.get("model", "gpt-4.1-nano"))
+    # Every message is appended to disk as it happens, so a crash doesn't lose the session
+    chat_log=ChatLogWriter()
+    chat_log.write_many(memory.transcript)
 
     
     while True:
         user_input=get_user_input()
         if user_input=="quit":
-            messages.append({"role":"user", "content": user_input})
-            save_chat_log(messages, filename='words')
+            chat_log.close()
+            print(f"Chat log saved to {chat_log.path}")
+            memory.close()
             break
-        messages.append({"role":"user", "content": user_input})
+        memory.add_user(user_input)
+        chat_log.write(memory.transcript[-1])
         
-        reply= get_ai_response(client, messages, config)
+        reply= get_ai_response(client, memory.messages(), config)
 
-        messages.append({"role":"assistant", "content":reply})
+        memory.add_assistant(reply)
+        chat_log.write(memory.transcript[-1])
         
 
         display_response(reply)
@@ -0,0 +1,130 @@
+"""
+Retrieval result cache.
+
+People repeat and lightly rephrase questions all the time, and every search
+re-embeds the question and queries the vector store. RetrievalCache keeps
+recent results keyed by:
+
+    (collection, collection version, normalized query, n_results, filters)
+
+- normalized: case, whitespace and trailing punctuation don't matter
+- LRU: at most `max_entries` results are kept
+- TTL: entries older than `ttl` seconds are ignored
+- version: ingest calls bump_collection_version(collection), so results
+  from before new documents were added are never served
+
+Usage:
+    cache = RetrievalCache()
+    chunks = cache.get(collection, question, n_results)
+    if chunks is None:
+        chunks = ...search...
+        cache.put(collection, question, n_results, chunks, elapsed)
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, single spaces, no surrounding quotes or trailing ?!."""
+    return " ".join(query.lower().split()).strip(" ?.!\"'")
+
+
+def _collection_name(collection) -> str:
+    return getattr(collection, "name", None) or str(id(collection))
+
+
+def collection_version(collection) -> int:
+    return _versions.get(_collection_name(collection), 0)
+
+
+def bump_collection_version(collection) -> int:
+    """Call after adding/deleting documents: cached results for it go stale."""
+    with _versions_lock:
+        name = _collection_name(collection)
+        _versions[name] = _versions.get(name, 0) + 1
+        return _versions[name]
+
+
+class RetrievalCache:
+    """
+    LRU + TTL cache of search results.
+
+    Args:
+        max_entries: Results kept (least recently used evicted first).
+        ttl:         Seconds a result stays valid (None = until evicted).
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (stored_at, results)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "miss_time": 0.0}
+
+    def _key(self, collection, query: str, n_results: int, where: dict = None):
+        filters = json.dumps(where, sort_keys=True) if where else ""
+        return (
+            _collection_name(collection),
+            collection_version(collection),
+            normalize_query(query),
+            n_results,
+            filters,
+        )
+
+    def get(self, collection, query: str, n_results: int, where: dict = None):
+        """Cached results, or None on a miss."""
+        key = self._key(collection, query, n_results, where)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.stats["stale"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return list(entry[1])
+
+    def put(self, collection, query: str, n_results: int, results: list, elapsed: float = 0.0, where: dict = None) -> None:
+        """Store results. `elapsed` (the search time) feeds the saved-latency estimate."""
+        key = self._key(collection, query, n_results, where)
+        with self._lock:
+            self.stats["miss_time"] += elapsed
+            # Entries for older versions of this collection can never hit again
+            for old in [k for k in self._entries if k[0] == key[0] and k[1] != key[1]]:
+                del self._entries[old]
+
+            self._entries[key] = (time.time(), list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def summary(self) -> dict:
+        """Hit rate and estimated time saved (hits x average miss latency)."""
+        hits, misses = self.stats["hits"], self.stats["misses"]
+        avg_miss = self.stats["miss_time"] / misses if misses else 0.0
+        return {
+            "lookups": hits + misses,
+            "hits": hits,
+            "misses": misses,
+            "stale": self.stats["stale"],
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "saved_s": round(hits * avg_miss, 3),
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,102 @@
+"""
+Fast path for query rewriting.
+
+rewrite_query() makes an LLM call every turn - even the first one, when there
+is no conversation to resolve the question against. memoized_rewrite() wraps
+that call and only makes it when it can matter:
+
+1. no history (system prompt only)        -> the query is used as-is
+2. no pronouns / follow-up markers        -> the query is used as-is
+   (shared.speculative_retrieval.needs_rewrite)
+3. same recent history + same question    -> the earlier rewrite is reused
+4. otherwise                              -> rewrite_fn() is called
+
+    def rewrite_query(messages, current_query, client):
+        return memoized_rewrite(messages[-6:], current_query,
+                                lambda: _rewrite_with_llm(messages, current_query, client))
+
+speculative_retrieve() already makes check 2 itself, so callers that use
+it pass check_standalone=False. They can also pass cached_rewrite() as its
+`cached` lookup, which keeps memo hits out of its rewrite-time average.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .retrieval_cache import normalize_query
+from .speculative_retrieval import needs_rewrite, stats as speculative_stats
+
+REWRITE_MEMO_SIZE = 256
+
+rewrite_stats = {"llm_calls": 0, "skipped_no_history": 0, "skipped_standalone": 0, "memo_hits": 0}
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def history_key(history: list[dict]) -> str:
+    """Stable hash of the (role, content) pairs in `history`."""
+    pairs = [(m["role"], m["content"]) for m in history]
+    return hashlib.sha1(json.dumps(pairs, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _memo_key(history: list[dict], query: str):
+    turns = [m for m in history if m["role"] != "system"]
+    return (history_key(turns), normalize_query(query)) if turns else None
+
+
+def cached_rewrite(history: list[dict], query: str) -> str | None:
+    """The memoized rewrite of `query` after `history`, or None (no LLM call either way)."""
+    key = _memo_key(history, query)
+    if key is None:
+        return None
+    with _memo_lock:
+        if key not in _memo:
+            return None
+        _memo.move_to_end(key)
+        rewrite_stats["memo_hits"] += 1
+        return _memo[key]
+
+
+def memoized_rewrite(history: list[dict], query: str, rewrite_fn, check_standalone: bool = True) -> str:
+    """
+    The query to search with: `query` itself, a memoized rewrite, or
+    rewrite_fn() (called with no arguments) when neither will do.
+
+    Args:
+        history:          Recent messages the rewrite would see (system messages ignored).
+        query:            The user's latest message.
+        rewrite_fn:       Makes the actual rewrite call.
+        check_standalone: False when the caller already ran needs_rewrite()
+                          (speculative_retrieve does), so skips aren't counted twice.
+    """
+    key = _memo_key(history, query)
+    if key is None:
+        rewrite_stats["skipped_no_history"] += 1
+        return query
+    if check_standalone and not needs_rewrite(query, has_history=True):
+        rewrite_stats["skipped_standalone"] += 1
+        return query
+
+    rewritten = cached_rewrite(history, query)
+    if rewritten is not None:
+        return rewritten
+
+    rewritten = rewrite_fn()
+    rewrite_stats["llm_calls"] += 1
+
+    with _memo_lock:
+        _memo[key] = rewritten
+        while len(_memo) > REWRITE_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return rewritten
+
+
+def rewrite_calls_avoided() -> int:
+    """Rewrite calls not made, whether skipped here or by speculative_retrieve."""
+    return (
+        rewrite_stats["skipped_no_history"] + rewrite_stats["skipped_standalone"]
+        + rewrite_stats["memo_hits"] + speculative_stats["skipped"]
+    )
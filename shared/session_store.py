@@ -0,0 +1,229 @@
+"""
+Bounded chat-history store for RunnableWithMessageHistory.
+
+The usual `store = {}` + InMemoryChatMessageHistory pattern keeps every
+session forever, so a long-running multi-user process grows without limit.
+SessionHistoryStore caps it:
+
+- max_sessions: least-recently-used sessions are evicted past this
+- ttl:          sessions idle for longer than this (seconds) are evicted
+- max_messages: each history keeps only its latest messages
+- spill_path:   evicted sessions go to a SQLite file instead of being lost,
+                and come back transparently the next time they're used
+
+Usage:
+    store = SessionHistoryStore(max_sessions=1000, ttl=1800, max_messages=40)
+    chatbot = RunnableWithMessageHistory(chain, store.get_session_history, ...)
+    print(store.metrics())
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class CappedChatMessageHistory(InMemoryChatMessageHistory):
+    """In-memory history that keeps only the latest `max_messages` (0 = no cap)."""
+
+    max_messages: int = 0
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.messages.append(message)
+        if self.max_messages and len(self.messages) > self.max_messages:
+            del self.messages[:-self.max_messages]
+            # Don't leave the history starting mid-turn with an AI reply
+            while self.messages and self.messages[0].type != "human":
+                self.messages.pop(0)
+
+
+def _message_size(message: BaseMessage) -> int:
+    content = message.content
+    return len(content) if isinstance(content, str) else len(json.dumps(content))
+
+
+class SessionHistoryStore:
+    """
+    LRU + idle-TTL store of per-session chat histories.
+
+    Args:
+        max_sessions: Sessions kept in memory (oldest-used evicted first).
+        ttl:          Idle seconds before a session is evicted (None = never).
+        max_messages: Messages kept per session (0 = no cap).
+        spill_path:   SQLite file for evicted sessions (None = drop them).
+        spill_ttl:    Seconds a spilled session is kept on disk (None = forever).
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 1800,
+        max_messages: int = 50,
+        spill_path: str = None,
+        spill_ttl: float = 7 * 24 * 3600,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.spill_ttl = spill_ttl
+
+        self._sessions = OrderedDict()      # session_id -> (history, last_used), LRU order
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "created": 0,
+            "evicted_lru": 0,
+            "evicted_ttl": 0,
+            "spilled": 0,
+            "restored": 0,
+        }
+
+        self._db = None
+        if spill_path:
+            Path(spill_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(spill_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, messages TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # ── RunnableWithMessageHistory factory ──
+
+    def get_session_history(self, session_id: str) -> CappedChatMessageHistory:
+        """History for `session_id` - from memory, the spill file, or new."""
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._stats["hits"] += 1
+                history = entry[0]
+                self._sessions.move_to_end(session_id)
+            else:
+                self._stats["misses"] += 1
+                history = self._restore(session_id)
+                if history is None:
+                    history = CappedChatMessageHistory(max_messages=self.max_messages)
+                    self._stats["created"] += 1
+
+            self._sessions[session_id] = (history, now)
+            while len(self._sessions) > self.max_sessions:
+                old_id, (old_history, _) = self._sessions.popitem(last=False)
+                self._evict(old_id, old_history, "evicted_lru")
+            return history
+
+    __call__ = get_session_history
+
+    # ── Eviction and spill ──
+
+    def _evict_expired(self, now: float) -> None:
+        """Drop idle sessions. LRU order means expired ones are all at the front."""
+        if self.ttl is None:
+            return
+        while self._sessions:
+            session_id, (history, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self._evict(session_id, history, "evicted_ttl")
+
+    def _evict(self, session_id: str, history: CappedChatMessageHistory, reason: str) -> None:
+        self._stats[reason] += 1
+        logger.debug(f"Session {session_id} {reason.replace('_', ' by ')}")
+        if self._db is not None:
+            self._spill(session_id, history)
+
+    def _spill(self, session_id: str, history: CappedChatMessageHistory) -> None:
+        if not history.messages:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, messages, updated) VALUES (?, ?, ?)",
+            (session_id, json.dumps(messages_to_dict(history.messages)), time.time()),
+        )
+        self._db.commit()
+        self._stats["spilled"] += 1
+
+    def _restore(self, session_id: str) -> CappedChatMessageHistory | None:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT messages, updated FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._db.commit()
+        if self.spill_ttl is not None and time.time() - row[1] > self.spill_ttl:
+            return None
+
+        self._stats["restored"] += 1
+        history = CappedChatMessageHistory(max_messages=self.max_messages)
+        history.add_messages(messages_from_dict(json.loads(row[0])))
+        return history
+
+    def prune_spill(self) -> int:
+        """Delete spilled sessions older than spill_ttl. Returns how many went."""
+        if self._db is None or self.spill_ttl is None:
+            return 0
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM sessions WHERE updated < ?", (time.time() - self.spill_ttl,)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    # ── Housekeeping ──
+
+    def clear(self, session_id: str = None) -> None:
+        """Forget one session (memory and disk), or all of them."""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+                if self._db is not None:
+                    self._db.execute("DELETE FROM sessions")
+                    self._db.commit()
+            else:
+                self._sessions.pop(session_id, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                    self._db.commit()
+
+    def metrics(self) -> dict:
+        """Session/message counts, approximate content size and eviction counters."""
+        with self._lock:
+            self._evict_expired(time.time())
+            histories = [history for history, _ in self._sessions.values()]
+            spilled_now = 0
+            if self._db is not None:
+                spilled_now = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+            return {
+                "sessions": len(histories),
+                "messages": sum(len(h.messages) for h in histories),
+                "content_chars": sum(_message_size(m) for h in histories for m in h.messages),
+                "spilled_sessions": spilled_now,
+                **self._stats,
+            }
+
+    def close(self) -> None:
+        """Spill everything still in memory (if spilling) and close the file."""
+        with self._lock:
+            if self._db is None:
+                return
+            while self._sessions:
+                session_id, (history, _) = self._sessions.popitem(last=False)
+                self._spill(session_id, history)
+            self._db.close()
+            self._db = None
@@ -0,0 +1,235 @@
+"""
+Speculative retrieval: search while the query is being rewritten.
+
+The usual conversational RAG turn is strictly sequential:
+
+    rewrite query (LLM call) -> vector search -> answer
+
+Most of the time the raw question already retrieves the right chunks, so
+this module starts a search on the raw query while the rewrite runs, then
+searches again on the rewritten query (only if it actually changed) and
+merges both candidate lists. A cheap check skips the rewrite completely
+for questions that are obviously standalone.
+
+    result = speculative_retrieve(
+        user_input,
+        rewrite=lambda q: rewrite_query(messages, q, client),
+        retrieve=lambda q: query_rag(q, collection, n_results=5),
+        has_history=len(messages) > 1,
+        k=5,
+    )
+    result["results"], result["search_query"], result["timings"]
+
+When rewrites are memoized, pass the memo lookup as `cached` (see
+shared.rewrite_memo.cached_rewrite): a hit is used without calling
+`rewrite`, and it isn't counted in the rewrite-time average that the
+"saved" estimate for skipped rewrites is based on.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .retrieval_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Words that usually point back at earlier turns ("what about it?")
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|he|she|him|her|his|"
+    r"there|above|previous|same|else|more|another|again|former|latter)\b",
+    re.IGNORECASE,
+)
+FOLLOW_UP_STARTS = ("and ", "but ", "also ", "so ", "or ", "what about", "how about", "why", "continue", "go on")
+MIN_STANDALONE_WORDS = 4
+
+stats = {"rewrites": 0, "cached": 0, "skipped": 0, "raw_reused": 0, "rewrite_time": 0.0}
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+
+
+def needs_rewrite(query: str, has_history: bool = True) -> bool:
+    """
+    Cheap standalone-question check. False means the query can be searched
+    as-is; True means it may lean on the conversation and should be rewritten.
+    """
+    if not has_history:
+        return False
+    q = query.strip().lower()
+    if len(q.split()) < MIN_STANDALONE_WORDS:
+        return True
+    if q.startswith(FOLLOW_UP_STARTS):
+        return True
+    return bool(FOLLOW_UP_PATTERN.search(q))
+
+
+def merge_candidates(primary: list, secondary: list, k: int = None, key=None) -> list:
+    """
+    primary first, then anything from secondary not already in it.
+
+    key: maps a candidate to its identity (default: the candidate itself,
+         e.g. a chunk string; use lambda d: d.page_content for Documents).
+    """
+    key = key or (lambda c: c)
+    seen = set()
+    merged = []
+    for candidate in list(primary) + list(secondary):
+        ident = key(candidate)
+        if ident in seen:
+            continue
+        seen.add(ident)
+        merged.append(candidate)
+    return merged[:k] if k else merged
+
+
+def _same_query(a: str, b: str) -> bool:
+    return normalize_query(a) == normalize_query(b)
+
+
+def _estimated_rewrite_time() -> float:
+    return stats["rewrite_time"] / stats["rewrites"] if stats["rewrites"] else 0.0
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _finish(query, rewritten, raw, raw_time, new, new_time, rewrite_time, start, k, key) -> dict:
+    """Pick/merge results and work out what the overlap saved."""
+    if rewritten is None:
+        # Skipped: saved a whole rewrite call (estimated from past ones)
+        results, search_query, saved = raw, query, _estimated_rewrite_time()
+        stats["skipped"] += 1
+    elif new is None:
+        # Rewrite didn't change the query: the raw search already ran during it
+        results, search_query, saved = raw, rewritten, raw_time
+        stats["raw_reused"] += 1
+    else:
+        results = merge_candidates(new, raw or [], k, key)
+        search_query, saved = rewritten, 0.0
+
+    total = time.perf_counter() - start
+    timings = {
+        "rewrite": rewrite_time,
+        "raw_search": raw_time,
+        "rewritten_search": new_time,
+        "total": total,
+        "saved": saved,
+    }
+    return {
+        "search_query": search_query,
+        "results": results[:k] if k else results,
+        "rewritten": rewritten is not None,
+        "timings": timings,
+    }
+
+
+def _cached_rewrite(cached, query):
+    """(rewrite, 0.0) from the `cached` lookup, or None on a miss."""
+    rewritten = cached(query) if cached else None
+    if rewritten is None:
+        return None
+    stats["cached"] += 1
+    return rewritten, 0.0
+
+
+def _record_rewrite(rewrite_time: float) -> None:
+    stats["rewrites"] += 1
+    stats["rewrite_time"] += rewrite_time
+
+
+def speculative_retrieve(query: str, rewrite, retrieve, has_history: bool = True, k: int = None, key=None,
+                         cached=None) -> dict:
+    """
+    Retrieve for `query`, overlapping the search with the query rewrite.
+
+    Args:
+        query:       The user's raw message.
+        rewrite:     fn(query) -> standalone query (usually an LLM call).
+        retrieve:    fn(query) -> ranked candidates.
+        has_history: False on the first turn (nothing to resolve against).
+        k:           Max candidates returned after merging.
+        key:         Candidate identity for de-duplication (see merge_candidates).
+        cached:      fn(query) -> an already known rewrite, or None. Hits skip
+                     `rewrite` and stay out of the rewrite-time average.
+
+    Returns:
+        {search_query, results, rewritten: bool,
+         timings: {rewrite, raw_search, rewritten_search, total, saved}}
+    """
+    start = time.perf_counter()
+
+    if not needs_rewrite(query, has_history):
+        raw, raw_time = _timed(retrieve, query)
+        return _finish(query, None, raw, raw_time, None, 0.0, 0.0, start, k, key)
+
+    raw_future = _pool.submit(_timed, retrieve, query)
+    hit = _cached_rewrite(cached, query)
+    if hit is not None:
+        rewritten, rewrite_time = hit
+    else:
+        rewritten, rewrite_time = _timed(rewrite, query)
+        _record_rewrite(rewrite_time)
+
+    new, new_time = None, 0.0
+    if not _same_query(rewritten, query):
+        new, new_time = _timed(retrieve, rewritten)
+
+    try:
+        raw, raw_time = raw_future.result()
+    except Exception as e:
+        if new is None:
+            raise
+        logger.warning(f"Speculative search on the raw query failed: {e}")
+        raw, raw_time = [], 0.0
+
+    return _finish(query, rewritten, raw, raw_time, new, new_time, rewrite_time, start, k, key)
+
+
+async def _atimed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start
+
+
+async def speculative_retrieve_async(query: str, rewrite, retrieve, has_history: bool = True, k: int = None, key=None,
+                                     cached=None) -> dict:
+    """
+    Async version of speculative_retrieve: `rewrite` and `retrieve` are
+    coroutine functions (`cached` stays a plain function).
+    """
+    start = time.perf_counter()
+
+    if not needs_rewrite(query, has_history):
+        raw, raw_time = await _atimed(retrieve(query))
+        return _finish(query, None, raw, raw_time, None, 0.0, 0.0, start, k, key)
+
+    raw_task = asyncio.create_task(_atimed(retrieve(query)))
+    hit = _cached_rewrite(cached, query)
+    if hit is not None:
+        rewritten, rewrite_time = hit
+    else:
+        try:
+            rewritten, rewrite_time = await _atimed(rewrite(query))
+        except BaseException:
+            raw_task.cancel()
+            raise
+        _record_rewrite(rewrite_time)
+
+    new, new_time = None, 0.0
+    if not _same_query(rewritten, query):
+        new, new_time = await _atimed(retrieve(rewritten))
+
+    try:
+        raw, raw_time = await raw_task
+    except Exception as e:
+        if new is None:
+            raise
+        logger.warning(f"Speculative search on the raw query failed: {e}")
+        raw, raw_time = [], 0.0
+
+    return _finish(query, rewritten, raw, raw_time, new, new_time, rewrite_time, start, k, key)
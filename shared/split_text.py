@@ -1,11 +1,79 @@
+import codecs
+import mmap
+import os
+from contextlib import contextmanager
 from pathlib import Path
 
+WINDOW_BYTES = 1024 * 1024   # bytes decoded per window by iter_text_windows
+
+
+class TextReadError(Exception):
+    """A text file couldn't be read: missing, unreadable or not valid UTF-8."""
+
+
+@contextmanager
+def _mapped(file_path):
+    """mmap of the file (None if it's empty), with errors as TextReadError."""
+    try:
+        f = open(file_path, "rb")
+    except OSError as e:
+        raise TextReadError(f"Can't open '{file_path}': {e}") from e
+
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def iter_text_windows(file_path, window_bytes=WINDOW_BYTES):
+    """
+    Decoded text of a file, one window at a time, via mmap.
+
+    The file is never read into one big buffer: each window is decoded
+    from the mapping, and a UTF-8 character split across a window edge is
+    carried over to the next window (incremental decoder).
+
+    Raises:
+        TextReadError: file missing/unreadable, or invalid UTF-8 (with offset).
+    """
+    with _mapped(file_path) as mm:
+        if mm is None:
+            return
+        size = len(mm)
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        for offset in range(0, size, window_bytes):
+            end = min(offset + window_bytes, size)
+            try:
+                text = decoder.decode(mm[offset:end], final=end == size)
+            except UnicodeDecodeError as e:
+                raise TextReadError(
+                    f"'{file_path}' is not valid UTF-8 near byte {offset + e.start}"
+                ) from e
+            if text:
+                yield text
+
+
+def iter_words(file_path, window_bytes=WINDOW_BYTES):
+    """Whitespace-separated words of a file, streamed (same as text.split())."""
+    carry = ""
+    for window in iter_text_windows(file_path, window_bytes):
+        text = carry + window
+        words = text.split()
+        # The last word may continue in the next window
+        carry = words.pop() if words and not text[-1].isspace() else ""
+        yield from words
+    if carry:
+        yield carry
+
 
 def split_into_chunks(text, chunk_size=100):
     #Split text into word-based chunks for vector embeddings
+    #text can also be an iterator of words, e.g. iter_words(file_path)
 
 
-    words=text.split()
+    words=text.split() if isinstance(text, str) else text
     chunks=[]
     current_chunk= []
 
@@ -20,15 +88,20 @@ def split_into_chunks(text, chunk_size=100):
     return chunks
 
 def text_handler(file_path):
-    try:
-        with open(f"{file_path}", "r", encoding="utf-8") as f:
-            text=f.read()
-        return text
-    except FileNotFoundError:
-        print(f"File not in '{file_path}'")
-        
-    except Exception as e:
-        print(f"Some Error occured: {e}")
+    """
+    Whole file as one string, decoded straight from an mmap (no bytes copy).
+    For files too big to hold as one string use iter_text_windows / iter_words.
+
+    Raises:
+        TextReadError: instead of printing and returning None.
+    """
+    with _mapped(file_path) as mm:
+        if mm is None:
+            return ""
+        try:
+            return str(mm, "utf-8-sig")
+        except UnicodeDecodeError as e:
+            raise TextReadError(f"'{file_path}' is not valid UTF-8 near byte {e.start}") from e
         
 
 if __name__=="__main__":
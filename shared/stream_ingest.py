@@ -0,0 +1,74 @@
+"""
+Streaming document ingest for LangChain loaders.
+
+`loader.load()` parses every page into memory before the first chunk is
+split or embedded - for a whole book that's a lot of memory and a long wait
+before anything is searchable. stream_ingest() walks `loader.lazy_load()`
+instead and handles a small window of pages at a time:
+
+    pages 1-8  -> split -> embed + add to the vector store
+    pages 9-16 -> split -> embed + add ...
+
+Only one window is ever held in memory, and the first pages are searchable
+while later ones are still being parsed. Chunks come out the same as with
+split_documents(loader.load()): splitters work page by page either way.
+
+Usage:
+    vector_store = Chroma(collection_name="docs", embedding_function=embeddings)
+    stats = stream_ingest(PyPDFLoader(path), splitter, vector_store)
+"""
+
+import logging
+import time
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_PAGES = 8
+
+
+def iter_page_windows(loader, window_pages: int = DEFAULT_WINDOW_PAGES):
+    """Yield lists of up to `window_pages` Documents from loader.lazy_load()."""
+    pages = loader.lazy_load()
+    while window := list(islice(pages, window_pages)):
+        yield window
+
+
+def stream_ingest(loader, splitter, vector_store, window_pages: int = DEFAULT_WINDOW_PAGES, on_window=None) -> dict:
+    """
+    Load, split, embed and store a document one page window at a time.
+
+    Args:
+        loader:       Any LangChain loader with lazy_load() (e.g. PyPDFLoader).
+        splitter:     Text splitter with split_documents().
+        vector_store: Store with add_documents() (embeds on add).
+        window_pages: Pages handled per window.
+        on_window:    Optional callback(stats) after each window is stored.
+
+    Returns:
+        {pages, chunks, windows, first_searchable_s, total_s}
+    """
+    start = time.perf_counter()
+    stats = {"pages": 0, "chunks": 0, "windows": 0, "first_searchable_s": None, "total_s": 0.0}
+
+    for window in iter_page_windows(loader, window_pages):
+        chunks = splitter.split_documents(window)
+        if chunks:
+            vector_store.add_documents(chunks)
+
+        stats["pages"] += len(window)
+        stats["chunks"] += len(chunks)
+        stats["windows"] += 1
+        if chunks and stats["first_searchable_s"] is None:
+            stats["first_searchable_s"] = time.perf_counter() - start
+        logger.debug(f"Window {stats['windows']}: {len(window)} pages, {len(chunks)} chunks")
+
+        if on_window is not None:
+            on_window(stats)
+
+    stats["total_s"] = time.perf_counter() - start
+    logger.info(
+        f"Streamed {stats['pages']} pages -> {stats['chunks']} chunks in {stats['total_s']:.1f}s "
+        f"(first searchable after {stats['first_searchable_s'] or 0:.1f}s)"
+    )
+    return stats
@@ -0,0 +1,173 @@
+"""
+Local OpenAI-compatible stub server.
+
+Speaks just enough of /v1/chat/completions (plain and streaming) to exercise
+clients, load tests and retry logic without spending tokens:
+
+    python -m shared.stub_server
+    OPENAI_BASE_URL=http://127.0.0.1:8000/v1 python your_script.py
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Request handler; behaviour comes from ``self.server.settings``."""
+
+    def log_message(self, format, *args):
+        # Keep the console quiet under load
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str, error_type: str, code: str) -> None:
+        self._send_json(status, {
+            "error": {"message": message, "type": error_type, "param": None, "code": code}
+        })
+
+    def do_POST(self):
+        settings = self.server.settings
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_error(400, "Invalid JSON body", "invalid_request_error", "bad_json")
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_error(404, f"Unknown route: {self.path}", "invalid_request_error", "not_found")
+            return
+
+        roll = random.random()
+        if roll < settings["rate_limit_rate"]:
+            self._send_error(429, "Rate limit reached (stub)", "requests", "rate_limit_exceeded")
+            return
+        if roll < settings["rate_limit_rate"] + settings["error_rate"]:
+            self._send_error(500, "Internal error (stub)", "server_error", "server_error")
+            return
+
+        time.sleep(settings["latency"])
+
+        model = body.get("model", "stub-model")
+        words = settings["reply"].split(" ")
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        if max_tokens:
+            words = words[:max_tokens]
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+        }
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            self._stream(completion_id, created, model, words, usage, body)
+            return
+
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id, created, model, words, usage, body) -> None:
+        settings = self.server.settings
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(delta, finish_reason=None, chunk_usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+            }
+            if chunk_usage is not None:
+                chunk["usage"] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for i, word in enumerate(words):
+            time.sleep(settings["token_delay"])
+            event({"content": word if i == 0 else " " + word})
+        event({}, finish_reason="stop")
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event(None, chunk_usage=usage)
+
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_stub_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    latency: float = 0.05,
+    token_delay: float = 0.005,
+    rate_limit_rate: float = 0.0,
+    error_rate: float = 0.0,
+    reply: str = "Hi there from the local stub server.",
+) -> ThreadingHTTPServer:
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        host, port:      Where to listen. Use port=0 to pick a free port.
+        latency:         Seconds to wait before the first byte of each response.
+        token_delay:     Seconds between streamed words.
+        rate_limit_rate: Fraction of requests answered with HTTP 429.
+        error_rate:      Fraction of requests answered with HTTP 500.
+        reply:           Assistant text returned for every request.
+
+    Returns:
+        The running server. ``server.base_url`` is ready to pass to the
+        OpenAI client; call ``server.shutdown()`` when done.
+    """
+    server = ThreadingHTTPServer((host, port), _StubHandler)
+    server.daemon_threads = True
+    server.settings = {
+        "latency": latency,
+        "token_delay": token_delay,
+        "rate_limit_rate": rate_limit_rate,
+        "error_rate": error_rate,
+        "reply": reply,
+    }
+    server.base_url = f"http://{host}:{server.server_address[1]}/v1"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    server = start_stub_server()
+    print(f"Stub server listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,220 @@
+"""
+Rolling summary memory for chat loops.
+
+Sending the whole `messages` list every turn makes each request slower and
+more expensive than the last. SummaryMemory keeps the last `keep_turns`
+turns verbatim and folds older ones into a running summary written by a
+cheap model on a background thread, so the user never waits for it.
+What gets sent is always capped at `max_tokens`; a system prompt too big
+for the cap on its own (a whole file, say) is cut to fit instead of failing.
+
+Usage (anywhere get_ai_response is called):
+    memory = SummaryMemory(client, system_prompt="You are a diva")
+    chat_log = ChatLogWriter()
+    chat_log.write_many(memory.transcript)
+    memory.add_user(user_input)
+    chat_log.write(memory.transcript[-1])        # full, untrimmed history
+    reply = get_ai_response(client, memory.messages(), config)
+    memory.add_assistant(reply)
+    chat_log.write(memory.transcript[-1])
+    ...
+    chat_log.close()
+    memory.close()
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .context_packer import TOKENS_PER_MESSAGE, TOKENS_PER_REPLY, context_budget, pack_context
+from .token_counter import count_tokens, get_encoder
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = "Summarize this conversation concisely. Capture key topics and facts. Keep it under 200 words."
+
+
+class SummaryMemory:
+    """
+    Last N turns verbatim + a background-maintained summary of the rest.
+
+    Args:
+        client:             OpenAI client used for summarization.
+        system_prompt:      Instructions sent first on every request.
+        keep_turns:         User/assistant turns always kept verbatim.
+        model:              Chat model (for tokenization of the ceiling).
+        max_tokens:         Hard ceiling on the tokens sent per request
+                            (None = context_budget(model)).
+        summary_model:      Cheap model that writes the summary.
+        summary_max_tokens: Max length of the summary itself.
+    """
+
+    def __init__(
+        self,
+        client,
+        system_prompt: str = None,
+        keep_turns: int = 4,
+        model: str = "gpt-4.1-nano",
+        max_tokens: int = 4000,
+        summary_model: str = "gpt-4.1-nano",
+        summary_max_tokens: int = 300,
+    ):
+        self.client = client
+        self.system_prompt = system_prompt
+        self.keep_turns = keep_turns
+        self.model = model
+        self.max_tokens = max_tokens
+        self.summary_model = summary_model
+        self.summary_max_tokens = summary_max_tokens
+
+        self.summary = ""
+        self.transcript = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        self.stats = {"summaries": 0, "failed": 0, "summary_time": 0.0}
+
+        self._recent = []       # turns kept verbatim: list of message lists
+        self._pending = []      # turns waiting to be folded
+        self._folding = []      # turns the in-flight summary is folding
+        self._future = None
+        self._lock = threading.RLock()   # done-callbacks may run inline under it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+
+    # ── Adding messages ──
+
+    def add(self, message: dict) -> None:
+        self.transcript.append(message)
+        with self._lock:
+            if message["role"] == "user" or not self._recent:
+                self._recent.append([message])
+            else:
+                self._recent[-1].append(message)
+
+            # The turn in progress doesn't count towards keep_turns
+            while len(self._recent) > self.keep_turns + 1:
+                self._pending.append(self._recent.pop(0))
+            self._maybe_start_fold()
+
+    def add_user(self, content: str) -> None:
+        self.add({"role": "user", "content": content})
+
+    def add_assistant(self, content: str) -> None:
+        self.add({"role": "assistant", "content": content})
+
+    # ── Building the request ──
+
+    def messages(self) -> list[dict]:
+        """
+        Messages to send now: system prompt + latest finished summary +
+        verbatim turns, trimmed oldest-first to max_tokens. Never waits for
+        a summary in flight - turns it is folding are still sent verbatim.
+        """
+        with self._lock:
+            summary = self.summary
+            turns = self._folding + self._pending + self._recent
+
+        history = [msg for turn in turns for msg in turn]
+        if not history or history[-1]["role"] != "user":
+            raise ValueError("messages() expects the latest message to be the user's")
+
+        summary_part = f"\n\nSummary of the earlier conversation:\n{summary}" if summary else ""
+        system = f"{self.system_prompt or ''}{summary_part}".strip()
+
+        budget = self.max_tokens if self.max_tokens is not None else context_budget(self.model)
+        try:
+            packed = self._pack(system, history, budget)
+        except ValueError:
+            # The system prompt and question alone are over budget: cut the
+            # prompt (not the summary) to fit
+            prompt = self._truncate_prompt(summary_part, history[-1]["content"], budget)
+            packed = self._pack(f"{prompt}{summary_part}".strip(), history, budget)
+        if packed["dropped"]["history"]:
+            logger.debug(f"Memory ceiling dropped {len(packed['dropped']['history'])} messages")
+        return packed["messages"]
+
+    def _pack(self, system: str, history: list[dict], budget: int) -> dict:
+        return pack_context(
+            system or None,
+            history[-1]["content"],
+            history=history[:-1],
+            model=self.model,
+            budget=budget,
+            keep_recent_turns=self.keep_turns,
+        )
+
+    def _truncate_prompt(self, summary_part: str, user_message: str, budget: int) -> str:
+        """The start of the system prompt that fits in `budget` next to the summary and `user_message`."""
+        encoder = get_encoder(self.model)
+        tokens = encoder.encode_ordinary(self.system_prompt or "")
+        room = (budget - count_tokens(summary_part, self.model) - count_tokens(user_message, self.model)
+                - 2 * TOKENS_PER_MESSAGE - TOKENS_PER_REPLY
+                - 8)   # re-encoding the cut text can come out a token or two longer
+        logger.warning(f"System prompt is {len(tokens)} tokens; truncating it to {max(room, 0)} to fit {budget}")
+        return encoder.decode(tokens[:room]) if room > 0 else ""
+        if packed["dropped"]["history"]:
+            logger.debug(f"Memory ceiling dropped {len(packed['dropped']['history'])} messages")
+        return packed["messages"]
+
+    # ── Background summarization ──
+
+    def _maybe_start_fold(self) -> None:
+        """Start folding pending turns if nothing is in flight (caller holds the lock)."""
+        if self._future is not None or not self._pending:
+            return
+        self._folding = self._pending
+        self._pending = []
+        self._future = self._executor.submit(self._summarize, self.summary, self._folding)
+        self._future.add_done_callback(self._fold_done)
+
+    def _summarize(self, old_summary: str, turns: list[list[dict]]) -> str:
+        new_messages = "\n".join(
+            f"{msg['role'].capitalize()}: {msg['content']}"
+            for turn in turns for msg in turn
+        )
+        start = time.time()
+        response = self.client.chat.completions.create(
+            model=self.summary_model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Previous summary: {old_summary or 'No previous summary.'}\n\n"
+                                            f"New messages:\n{new_messages}\n\nUpdated summary:"},
+            ],
+            max_tokens=self.summary_max_tokens,
+            temperature=0,
+        )
+        self.stats["summary_time"] += time.time() - start
+        return response.choices[0].message.content
+
+    def _fold_done(self, future) -> None:
+        if future.cancelled():      # close() while a fold was queued
+            return
+        with self._lock:
+            try:
+                self.summary = future.result()
+                self.stats["summaries"] += 1
+                logger.info(f"Memory summarized {len(self._folding)} turns ({len(self.summary)} chars)")
+                retry_now = True
+            except Exception as e:
+                # Keep the turns; the next add() retries the fold
+                self.stats["failed"] += 1
+                logger.warning(f"Summarization failed, will retry next turn: {e}")
+                self._pending = self._folding + self._pending
+                retry_now = False
+            self._folding = []
+            self._future = None
+            if retry_now:
+                self._maybe_start_fold()
+
+    def wait(self, timeout: float = None) -> None:
+        """Block until no summary is in flight (for scripts and shutdown)."""
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            future = self._future
+            if future is None:
+                return
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            wait([future], remaining)
+            if deadline is not None and time.time() >= deadline:
+                return
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
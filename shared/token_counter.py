@@ -0,0 +1,146 @@
+"""
+Token counting with cached tiktoken encoders.
+
+- Each model's encoding is resolved once and kept in a module-level registry
+  (tiktoken.encoding_for_model is not free, and raises for models it hasn't
+  heard of yet - those fall back via FALLBACK_ENCODINGS).
+- Repeated strings (system prompts, few-shot examples) hit a small LRU memo.
+- count_tokens_many() tokenizes a list in one multithreaded batch.
+"""
+
+import threading
+from collections import OrderedDict
+
+import tiktoken
+
+# Model-name prefix → encoding, for models tiktoken doesn't know.
+# Longest matching prefix wins; non-OpenAI models get an approximation.
+FALLBACK_ENCODINGS = {
+    "gpt-5": "o200k_base",
+    "gpt-4.1": "o200k_base",
+    "gpt-4o": "o200k_base",
+    "o1": "o200k_base",
+    "o3": "o200k_base",
+    "o4": "o200k_base",
+    "gpt-4": "cl100k_base",
+    "gpt-3.5": "cl100k_base",
+    "text-embedding": "cl100k_base",
+    "claude": "cl100k_base",
+    "gemini": "cl100k_base",
+}
+DEFAULT_ENCODING = "o200k_base"
+
+MAX_CONTEXT_WINDOW = {
+    "gpt-5": 400_000,
+    "gpt-5.1": 400_000,
+    "gpt-5-mini": 400_000,
+    "gpt-5-nano": 400_000,
+    "gpt-5-pro": 400_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4.1-mini": 1_000_000,
+    "gpt-4.1-nano": 1_000_000,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+}
+
+MEMO_SIZE = 2048          # strings remembered
+MEMO_MAX_CHARS = 20_000   # longer strings aren't worth pinning in memory
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+memo_stats = {"hits": 0, "misses": 0}
+
+
+def _resolve_encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+
+    for prefix in sorted(FALLBACK_ENCODINGS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return tiktoken.get_encoding(FALLBACK_ENCODINGS[prefix])
+    return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+def get_encoder(model: str = "gpt-5-nano") -> tiktoken.Encoding:
+    """Encoding for `model`, resolved on first use and cached after that."""
+    encoder = _encoders.get(model)
+    if encoder is None:
+        with _encoders_lock:
+            encoder = _encoders.get(model)
+            if encoder is None:
+                encoder = _resolve_encoding(model)
+                _encoders[model] = encoder
+    return encoder
+
+
+def _memo_get(key):
+    with _memo_lock:
+        count = _memo.get(key)
+        if count is None:
+            memo_stats["misses"] += 1
+            return None
+        _memo.move_to_end(key)
+        memo_stats["hits"] += 1
+        return count
+
+
+def _memo_put(key, count: int) -> None:
+    with _memo_lock:
+        _memo[key] = count
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def count_tokens(text: str, model: str = "gpt-5-nano") -> int:
+    """Number of tokens in `text` for `model` (special tokens counted as plain text)."""
+    encoder = get_encoder(model)
+    if len(text) > MEMO_MAX_CHARS:
+        return len(encoder.encode_ordinary(text))
+
+    key = (encoder.name, text)
+    count = _memo_get(key)
+    if count is None:
+        count = len(encoder.encode_ordinary(text))
+        _memo_put(key, count)
+    return count
+
+
+def count_tokens_many(texts: list[str], model: str = "gpt-5-nano", num_threads: int = 8) -> list[int]:
+    """
+    Token counts for many strings at once.
+
+    Memoized strings are answered from the cache; the rest go through
+    tiktoken's encode_ordinary_batch on `num_threads` threads.
+    """
+    encoder = get_encoder(model)
+    counts = [None] * len(texts)
+    todo = []
+
+    for i, text in enumerate(texts):
+        if len(text) <= MEMO_MAX_CHARS:
+            counts[i] = _memo_get((encoder.name, text))
+        if counts[i] is None:
+            todo.append(i)
+
+    if todo:
+        batches = encoder.encode_ordinary_batch([texts[i] for i in todo], num_threads=num_threads)
+        for i, tokens in zip(todo, batches):
+            counts[i] = len(tokens)
+            if len(texts[i]) <= MEMO_MAX_CHARS:
+                _memo_put((encoder.name, texts[i]), counts[i])
+
+    return counts
+
+
+def clear_token_cache() -> None:
+    """Forget memoized counts (encoders stay loaded)."""
+    with _memo_lock:
+        _memo.clear()
+        memo_stats["hits"] = 0
+        memo_stats["misses"] = 0
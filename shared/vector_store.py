@@ -1,7 +1,7 @@
 import chromadb
 import os
 from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
-from shared.split_text import text_handler, split_into_chunks
+from shared.split_text import iter_words, split_into_chunks
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,8 +21,8 @@ def initialize_chroma_collection(collection_name):
     return collection
 
 def ingest_document(file, collection):
-    text=text_handler(file)
-    chunks=split_into_chunks(text)
+    # Stream words from an mmap instead of loading the whole file first
+    chunks=split_into_chunks(iter_words(file))
     collection.add(
         documents= chunks,
         ids=[f"chunk_{i}" for i in range(len(chunks))]
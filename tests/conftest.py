@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    """
+    Count one token per byte instead of loading tiktoken's BPE files, which
+    are downloaded on first use and so fail (or hang) without network.
+    """
+    try:
+        import tiktoken
+        from shared import token_counter
+    except ImportError:
+        return
+    encoding = tiktoken.Encoding(
+        name="test_bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(token_counter, "_encoders", {})
+    monkeypatch.setattr(token_counter, "_resolve_encoding", lambda model: encoding)
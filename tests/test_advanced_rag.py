@@ -0,0 +1,131 @@
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("chromadb")
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "day10-rag-advanced"))
+import advanced_rag  # noqa: E402
+from shared import SemanticAnswerCache  # noqa: E402
+from shared.rag_eval import HashingEmbeddingFunction  # noqa: E402
+
+
+class FakeCollection:
+    """Returns fixed candidates, closest first, like collection.query does."""
+
+    name = "fake"
+    metadata = None
+
+    def __init__(self, candidates):
+        self.candidates = candidates    # [(id, distance, embedding)]
+
+    def query(self, n_results, include, where=None, **search):
+        rows = sorted(self.candidates, key=lambda c: c[1])[:n_results]
+        results = {
+            "ids": [[r[0] for r in rows]],
+            "documents": [[f"text of {r[0]}" for r in rows]],
+            "metadatas": [[{"source": "a.txt", "chunk_index": i, "total_chunks": 10} for i, _ in enumerate(rows)]],
+            "distances": [[r[1] for r in rows]],
+        }
+        if "embeddings" in include:
+            results["embeddings"] = [np.array([r[2] for r in rows], dtype=np.float32)]
+        return results
+
+
+def test_trim_at_distance_gap_ignores_mmr_order():
+    retrieved = [{"distance": d} for d in (0.30, 0.95, 0.32, 1.00)]
+    kept = advanced_rag.trim_at_distance_gap(retrieved, gap=0.25)
+    assert [r["distance"] for r in kept] == [0.30, 0.32]
+
+
+def test_prepare_answer_with_mmr_and_distance_gap(monkeypatch):
+    same = [1.0, 0.0, 0.0]
+    collection = FakeCollection([
+        ("close", 0.30, same),
+        ("close_dup", 0.31, same),
+        ("close_other", 0.34, [0.8, 0.6, 0.0]),
+        ("far", 0.95, [0.0, 0.0, 1.0]),      # diverse: MMR picks it second
+    ])
+    monkeypatch.setattr(advanced_rag, "embed_query", lambda collection, text: [1.0, 0.0, 0.0])
+
+    picked = advanced_rag.retrieve("q", collection, n_results=3, mmr=True, fetch_k=4, lambda_mult=0.3)
+    assert picked[1]["id"] == "far"
+
+    prepared = advanced_rag._prepare_answer(
+        "q", collection, n_results=3, context_tokens=3000, mmr=True, use_cache=False,
+        min_confidence=0.25, max_best_distance=1.4, distance_gap=0.25,
+    )
+    assert prepared["result"] is None
+    ids = [r["id"] for r in prepared["retrieved"]]
+    assert "far" not in ids
+    assert ids[0] == "close"
+    assert prepared["confidence"] == advanced_rag.retrieval_confidence(prepared["retrieved"])
+
+
+class HashingEF(HashingEmbeddingFunction):
+    """Offline embeddings, with the name() Chroma asks embedding functions for."""
+
+    @staticmethod
+    def name():
+        return "hashing"
+
+
+@pytest.fixture
+def collection(tmp_path, monkeypatch):
+    """A fresh in-memory Chroma collection; stats and element caches go to tmp_path."""
+    chromadb = pytest.importorskip("chromadb")
+    monkeypatch.setattr(sys.modules["shared.collection_stats"], "STATS_DIR", tmp_path / "stats")
+    monkeypatch.setattr(sys.modules["shared.element_cache"], "CACHE_DIR", tmp_path / "elements")
+    monkeypatch.setattr(advanced_rag, "count_tokens_many", lambda texts: [len(t.split()) for t in texts])
+    return chromadb.EphemeralClient().create_collection(
+        name=f"test_{uuid.uuid4().hex[:8]}", embedding_function=HashingEF()
+    )
+
+
+POLICY = (
+    "Refunds are issued within 30 days of purchase when the item is unused.\n\n"
+    "Shipping is free for orders over fifty dollars within the country.\n"
+)
+
+
+def test_ingest_file_updates_collection_stats(tmp_path, collection):
+    doc = tmp_path / "policy.txt"
+    doc.write_text(POLICY)
+
+    assert advanced_rag.ingest_file(str(doc), collection, strategy="paragraph") == 2
+    stats = advanced_rag.get_collection_stats(collection)
+    assert stats["total_chunks"] == collection.count() == 2
+    assert stats["sources"] == ["policy.txt"]
+    assert stats["by_type"] == {".txt": 2}
+    assert stats["total_tokens"] == len(POLICY.split())
+
+    # Re-ingesting replaces the file's chunks instead of counting them twice
+    doc.write_text(POLICY.split("\n\n")[0])
+    assert advanced_rag.ingest_file(str(doc), collection, strategy="paragraph") == 1
+    stats = advanced_rag.get_collection_stats(collection)
+    assert stats["total_chunks"] == collection.count() == 1
+    assert stats["by_source"] == {"policy.txt": 1}
+
+
+def test_reingest_invalidates_cached_answers(tmp_path, collection, monkeypatch):
+    cache = SemanticAnswerCache(threshold=0.95)
+    monkeypatch.setattr(advanced_rag, "answer_cache", cache)
+    doc = tmp_path / "policy.txt"
+    doc.write_text(POLICY)
+    advanced_rag.ingest_file(str(doc), collection, strategy="paragraph")
+
+    embedding = HashingEF()(["how do refunds work?"])[0]
+    chunk_ids = collection.get(include=[])["ids"]
+    cache.store("how do refunds work?", embedding, chunk_ids, {"answer": "30 days", "tokens_used": 50})
+    assert cache.lookup(embedding, chunk_ids)["answer"] == "30 days"
+
+    doc.write_text(POLICY.replace("30 days", "14 days"))
+    advanced_rag.ingest_file(str(doc), collection, strategy="paragraph")
+
+    assert collection.get(include=[])["ids"] == chunk_ids     # same ids, new text
+    assert cache.lookup(embedding, chunk_ids) is None
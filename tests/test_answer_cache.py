@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from shared.answer_cache import SemanticAnswerCache  # noqa: E402
+
+
+def test_paraphrase_with_same_chunks_hits():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store("how do refunds work?", [1.0, 0.0], ["a", "b"], {"answer": "30 days", "tokens_used": 40})
+
+    assert cache.lookup([0.99, 0.05], ["b", "a"])["answer"] == "30 days"
+    assert cache.lookup([0.99, 0.05], ["a"]) is None          # different context
+    assert cache.lookup([0.0, 1.0], ["a", "b"]) is None       # different question
+    assert cache.summary()["tokens_saved"] == 40
+
+
+def test_invalidate_chunks_drops_dependent_answers():
+    cache = SemanticAnswerCache()
+    cache.store("q1", [1.0, 0.0], ["a"], {"answer": "1"})
+    cache.store("q2", [0.0, 1.0], ["b"], {"answer": "2"})
+
+    assert cache.invalidate_chunks(["a", "zzz"]) == 1
+    assert cache.lookup([1.0, 0.0], ["a"]) is None
+    assert cache.lookup([0.0, 1.0], ["b"])["answer"] == "2"
+
+
+def test_lru_and_ttl(monkeypatch):
+    cache = SemanticAnswerCache(max_entries=1, ttl=5)
+    cache.store("q1", [1.0, 0.0], ["a"], {"answer": "1"})
+    cache.store("q2", [0.0, 1.0], ["b"], {"answer": "2"})
+    assert cache.lookup([1.0, 0.0], ["a"]) is None
+    assert cache.summary()["entries"] == 1
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 6)
+    assert cache.lookup([0.0, 1.0], ["b"]) is None
@@ -0,0 +1,53 @@
+import json
+
+from shared.chat_log import ChatLogWriter, replay_chat_log
+
+MESSAGES = [
+    {"role": "system", "content": "be brief"},
+    {"role": "user", "content": "héllo"},
+    {"role": "assistant", "content": "hi"},
+]
+
+
+def test_write_and_replay(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    with ChatLogWriter(path, fsync_interval=60) as log:
+        log.write_many(MESSAGES[:2])
+        log.write(MESSAGES[2])
+        # Flushed on every write, before any fsync or close
+        assert [json.loads(line)["content"] for line in path.read_text(encoding="utf-8").splitlines()] == [
+            "be brief", "héllo", "hi",
+        ]
+    assert replay_chat_log(path) == MESSAGES
+
+
+def test_appends_to_an_existing_log(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    with ChatLogWriter(path) as log:
+        log.write(MESSAGES[0])
+    with ChatLogWriter(path) as log:
+        log.write(MESSAGES[1])
+    assert replay_chat_log(path) == MESSAGES[:2]
+
+
+def test_rotation_keeps_order(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    messages = [{"role": "user", "content": f"message {i}"} for i in range(20)]
+    with ChatLogWriter(path, max_bytes=200, backup_count=50) as log:
+        for message in messages:
+            log.write(message)
+
+    assert (tmp_path / "chat.jsonl.1").exists()
+    assert replay_chat_log(path) == messages
+    current = replay_chat_log(path, include_rotated=False)
+    assert 0 < len(current) < len(messages)
+    assert current == messages[-len(current):]
+
+
+def test_replay_skips_a_torn_last_line(tmp_path):
+    path = tmp_path / "chat.jsonl"
+    with ChatLogWriter(path) as log:
+        log.write_many(MESSAGES)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"ts": 1, "role": "user", "cont')
+    assert replay_chat_log(path) == MESSAGES
@@ -0,0 +1,41 @@
+from shared.context_assembly import assemble_context, merge_chunks
+
+WORDS = [f"w{i}" for i in range(30)]
+
+
+def item(source, index, start, end, page=None):
+    return {"source": source, "chunk_index": index, "content": " ".join(WORDS[start:end]), "page": page}
+
+
+def test_overlapping_neighbours_merge_without_repeating_words():
+    blocks = merge_chunks([item("a.txt", 0, 0, 12), item("a.txt", 1, 6, 20)])
+    assert len(blocks) == 1
+    assert blocks[0]["text"] == " ".join(WORDS[0:20])
+    assert (blocks[0]["first"], blocks[0]["last"], blocks[0]["members"]) == (0, 1, [0, 1])
+
+
+def test_other_sources_and_contained_chunks():
+    blocks = merge_chunks([item("a.txt", 0, 0, 12), item("b.txt", 0, 0, 12), item("a.txt", 5, 2, 8)])
+    assert [b["source"] for b in blocks] == ["a.txt", "b.txt"]
+    assert blocks[0]["members"] == [0, 2]        # chunk 5's text is already in chunk 0
+
+
+def test_bridging_chunk_joins_two_blocks():
+    blocks = merge_chunks([item("a.txt", 3, 0, 8), item("a.txt", 5, 16, 24), item("a.txt", 4, 8, 16)])
+    assert len(blocks) == 1
+    # No shared words to cut, so neighbours are joined on a new line
+    assert blocks[0]["text"] == "\n".join(" ".join(WORDS[i:i + 8]) for i in (0, 8, 16))
+    assert sorted(blocks[0]["members"]) == [0, 1, 2]
+
+
+def test_assemble_context_numbers_sources_and_respects_budget():
+    items = [item("a.txt", 0, 0, 12, page=1), item("a.txt", 1, 6, 20, page=2), item("b.txt", 0, 20, 30)]
+    full = assemble_context(items, budget_tokens=None)
+    assert full["context"].startswith("[Source 1: a.txt, page 1, 2]\n")
+    assert "[Source 2: b.txt]" in full["context"]
+    assert full["citations"] == {1: [0, 1], 2: [2]}
+    assert full["saved_tokens"] > 0
+
+    first_only = assemble_context(items, budget_tokens=full["used_tokens"] - 1)
+    assert first_only["citations"] == {1: [0, 1]}
+    assert first_only["dropped"] == [2]
@@ -0,0 +1,56 @@
+import pytest
+
+from shared.context_packer import TOKENS_PER_MESSAGE, TOKENS_PER_REPLY, context_budget, pack_context, trim_messages
+
+
+def turn(n):
+    return [{"role": "user", "content": f"question {n}"}, {"role": "assistant", "content": f"answer {n}"}]
+
+
+def test_context_budget_caps_and_reserves_output():
+    assert context_budget("gpt-4.1-nano") == 16_000
+    assert context_budget("gpt-4.1-nano", max_input_tokens=None) == 1_000_000 - 1024
+    assert context_budget("gpt-4.1-nano-2025-04-14", max_input_tokens=None) == 1_000_000 - 1024
+
+
+def test_everything_fits():
+    history = turn(1) + turn(2)
+    packed = pack_context("be brief", "question 3", history=history, chunks=["chunk a"], budget=1000)
+    assert [m["content"] for m in packed["messages"][2:-1]] == [m["content"] for m in history]
+    assert packed["messages"][0] == {"role": "system", "content": "be brief"}
+    assert "chunk a" in packed["messages"][1]["content"]
+    assert packed["dropped"] == {"history": [], "chunks": [], "history_tokens": 0, "chunk_tokens": 0}
+    assert packed["used_tokens"] <= packed["budget"]
+
+
+def test_oldest_history_goes_first():
+    history = turn(1) + turn(2) + turn(3)
+    fixed = len("be brief") + len("question 4") + 2 * TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+    turn_tokens = len("question 3") + len("answer 3") + 2 * TOKENS_PER_MESSAGE
+    packed = pack_context("be brief", "question 4", history=history, budget=fixed + 2 * turn_tokens)
+
+    assert packed["dropped"]["history"] == [0, 1]
+    assert [m["content"] for m in packed["messages"][1:]] == [
+        "question 2", "answer 2", "question 3", "answer 3", "question 4",
+    ]
+    assert packed["used_tokens"] == packed["budget"]
+
+
+def test_chunks_cannot_starve_recent_turns():
+    history = turn(1)
+    big_chunk = "x" * 500
+    packed = pack_context(None, "question 2", history=history, chunks=[big_chunk], budget=200)
+    assert packed["dropped"]["chunks"] == [0]
+    assert packed["dropped"]["history"] == []
+
+
+def test_over_budget_prompt_raises():
+    with pytest.raises(ValueError):
+        pack_context("s" * 100, "question", budget=50)
+
+
+def test_trim_messages_keeps_system_and_latest_user():
+    messages = [{"role": "system", "content": "be brief"}] + turn(1) + turn(2) + [{"role": "user", "content": "q3"}]
+    trimmed = trim_messages(messages, budget=60)
+    assert trimmed == [messages[0]] + turn(2) + [messages[-1]]
+    assert len(messages) == 6      # not modified
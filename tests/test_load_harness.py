@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from shared.load_harness import constant_schedule, percentile, ramp_schedule, run_closed_loop  # noqa: E402
+
+
+class FakeClient:
+    """Answers every (non-streaming) request immediately."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return SimpleNamespace()
+
+
+REQUEST = {"model": "gpt-4.1-nano", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 5, "stream": False}
+
+
+def test_constant_schedule():
+    assert constant_schedule(4, 1) == [0.0, 0.25, 0.5, 0.75]
+    with pytest.raises(ValueError):
+        constant_schedule(0, 1)
+
+
+def test_ramp_schedule():
+    flat = ramp_schedule(2, 2, 2)
+    assert flat == [0.0, 0.5, 1.0, 1.5]
+
+    from_zero = ramp_schedule(0, 10, 2)
+    assert len(from_zero) == 10                      # average 5 rps for 2s
+    assert from_zero == sorted(from_zero) and from_zero[-1] < 2
+    assert from_zero[1] - from_zero[0] > from_zero[-1] - from_zero[-2]   # speeding up
+
+
+@pytest.mark.parametrize("start, end, duration", [(0, 0, 5), (-1, 5, 5), (1, 5, 0)])
+def test_ramp_schedule_rejects_bad_settings(start, end, duration):
+    with pytest.raises(ValueError):
+        ramp_schedule(start, end, duration)
+
+
+def test_closed_loop_zero_duration_sends_nothing():
+    client = FakeClient()
+    assert asyncio.run(run_closed_loop(client, concurrency=3, duration=0, **REQUEST)) == []
+    assert client.calls == 0
+
+
+def test_closed_loop_request_budget():
+    client = FakeClient()
+    results = asyncio.run(run_closed_loop(client, concurrency=3, total_requests=7, **REQUEST))
+    assert len(results) == 7 and client.calls == 7
+    assert {r["status"] for r in results} == {"success"}
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
@@ -0,0 +1,29 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from shared.mmr import distances_to_similarity, mmr_select  # noqa: E402
+
+
+def test_distances_to_similarity():
+    assert distances_to_similarity([0.0, 2.0]).tolist() == [1.0, 0.0]
+    assert distances_to_similarity([0.25], space="cosine").tolist() == [0.75]
+    assert distances_to_similarity([-0.5], space="ip").tolist() == [0.5]
+
+
+def test_lambda_one_is_plain_top_k():
+    relevance = [0.9, 0.8, 0.7]
+    embeddings = [[1, 0], [1, 0], [0, 1]]
+    assert mmr_select(relevance, embeddings, k=3, lambda_mult=1.0) == [0, 1, 2]
+
+
+def test_near_duplicates_give_way_to_diverse_results():
+    relevance = [0.9, 0.89, 0.6]
+    embeddings = [[1, 0], [0.999, 0.01], [0, 1]]
+    assert mmr_select(relevance, embeddings, k=2, lambda_mult=0.5) == [0, 2]
+
+
+def test_edge_cases():
+    assert mmr_select([], [], k=3) == []
+    assert mmr_select([0.5], [[1, 0]], k=0) == []
+    assert mmr_select([0.5, 0.9], [[1, 0], [0, 1]], k=5) == [1, 0]
@@ -0,0 +1,63 @@
+import json
+
+from shared.parent_store import ParentStore
+
+
+def test_put_get_many(tmp_path):
+    with ParentStore(tmp_path / "parents.db") as store:
+        store.put("p1", "first parent", {"source": "a.txt"})
+        store.put("p2", "second parent")
+        store.commit()
+
+        assert store.get_many(["p2", "missing", "p1", "p1"]) == {
+            "p2": {"content": "second parent", "metadata": {}},
+            "p1": {"content": "first parent", "metadata": {"source": "a.txt"}},
+        }
+        assert "p1" in store and "missing" not in store
+        assert len(store) == 2
+        assert store.get("missing") is None
+
+
+def test_get_many_batches_past_the_parameter_limit(tmp_path):
+    with ParentStore(tmp_path / "parents.db") as store:
+        for i in range(2000):
+            store.put(f"p{i}", str(i))
+        store.commit()
+        assert len(store.get_many([f"p{i}" for i in range(2000)])) == 2000
+
+
+def test_import_json(tmp_path):
+    legacy = tmp_path / "parent_store.json"
+    legacy.write_text(json.dumps({"p1": {"content": "old", "metadata": {"page": 2}}}))
+    with ParentStore(tmp_path / "parents.db") as store:
+        assert store.import_json(legacy) == 1
+        assert store.get("p1") == {"content": "old", "metadata": {"page": 2}}
+
+
+def test_publish_replaces_the_live_store(tmp_path):
+    live_path = tmp_path / "parents.db"
+    with ParentStore(live_path) as live:
+        live.put("old", "old parent")
+
+    build = ParentStore(tmp_path / "parents.db.building")
+    build.put("new", "new parent")
+    build.publish(live_path)
+
+    assert build.path == live_path
+    assert not (tmp_path / "parents.db.building").exists()
+    with ParentStore(live_path) as live:
+        assert live.get_many(["old", "new"]) == {"new": {"content": "new parent", "metadata": {}}}
+
+
+def test_discard_keeps_the_live_store(tmp_path):
+    live_path = tmp_path / "parents.db"
+    with ParentStore(live_path) as live:
+        live.put("old", "old parent")
+
+    build = ParentStore(tmp_path / "parents.db.building")
+    build.put("new", "new parent")
+    build.discard()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["parents.db"]
+    with ParentStore(live_path) as live:
+        assert "old" in live and "new" not in live
@@ -0,0 +1,76 @@
+import json
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("openai")
+
+from shared.rag_eval import (  # noqa: E402
+    HashingEmbeddingFunction,
+    NumpyIndex,
+    compare_reports,
+    evaluate,
+    load_questions,
+    score_ranking,
+)
+
+DOCS = {
+    "refunds.txt": "Refunds are issued within thirty days of purchase when the item is unused and in its box.",
+    "shipping.txt": "Shipping is free for orders over fifty dollars and takes three to five business days.",
+}
+
+
+@pytest.fixture
+def questions_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys.modules["shared.element_cache"], "CACHE_DIR", tmp_path / "elements")
+    corpus = tmp_path / "docs"
+    corpus.mkdir()
+    for name, text in DOCS.items():
+        (corpus / name).write_text(text)
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps({
+        "corpus": str(corpus),
+        "files": "*.txt",
+        "questions": [
+            {"question": "How long do refunds take?",
+             "relevant": [{"source": "refunds.txt", "evidence": "issued within thirty days of purchase"}]},
+            {"question": "When is shipping free?",
+             "relevant": [{"source": "shipping.txt", "evidence": "free for orders over fifty dollars"}]},
+        ],
+    }))
+    return path
+
+
+def test_hashing_embeddings_are_deterministic_unit_vectors():
+    ef = HashingEmbeddingFunction(dim=64)
+    a, b = ef(["refund policy", "refund policy"])
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert not np.any(HashingEmbeddingFunction(dim=64).embed("the of and"))   # stopwords only
+
+
+def test_numpy_index_ranks_by_cosine():
+    index = NumpyIndex([np.array([1.0, 0.0]), np.array([0.6, 0.8]), np.array([0.0, 1.0])])
+    assert index.search(np.array([0.0, 1.0]), k=2) == [2, 1]
+    assert index.search(np.array([1.0, 0.0]), k=10) == [0, 1, 2]
+
+
+def test_score_ranking(questions_path):
+    question = load_questions(questions_path)["questions"][0]
+    relevant = {"source": "refunds.txt", "content": DOCS["refunds.txt"]}
+    wrong_source = {"source": "shipping.txt", "content": DOCS["refunds.txt"]}
+
+    assert score_ranking([wrong_source, relevant], question) == {"recall": 1.0, "hit": 1.0, "rr": 0.5}
+    assert score_ranking([wrong_source], question) == {"recall": 0.0, "hit": 0.0, "rr": 0.0}
+
+
+def test_evaluate_and_compare(questions_path):
+    report = evaluate(questions_path, strategies=["paragraph"], backends=["numpy"], k_values=[1, 2], generate=False)
+
+    assert report["corpus"]["files"] == 2
+    assert [(r["k"], r["recall"], r["mrr"]) for r in report["results"]] == [(1, 1.0, 1.0), (2, 1.0, 1.0)]
+
+    deltas = compare_reports(report, report)
+    assert all(d["comparable"] and d["recall"] == 0 and d["mrr"] == 0 for d in deltas)
+    assert len(deltas) == 2
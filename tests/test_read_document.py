@@ -0,0 +1,13 @@
+import pytest
+
+pytest.importorskip("pypdf")
+
+from shared.read_document import FastReaderFallback, read_pdf_elements  # noqa: E402
+
+
+def test_corrupt_pdf_falls_back_to_partition(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R\ngarbage")
+
+    with pytest.raises(FastReaderFallback):
+        read_pdf_elements(path)
@@ -0,0 +1,47 @@
+import time
+from types import SimpleNamespace
+
+from shared.retrieval_cache import RetrievalCache, bump_collection_version, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  What is the   Refund policy?? ") == "what is the refund policy"
+
+
+def test_hit_ignores_case_spacing_and_punctuation():
+    cache = RetrievalCache()
+    collection = SimpleNamespace(name="cache_hits")
+    cache.put(collection, "What is the refund policy?", 5, ["chunk"], elapsed=0.2)
+
+    assert cache.get(collection, "what is the  refund policy", 5) == ["chunk"]
+    assert cache.get(collection, "what is the refund policy", 3) is None
+    assert cache.get(collection, "what is the refund policy", 5, where={"source": "a.txt"}) is None
+    assert cache.summary()["hits"] == 1
+    assert cache.summary()["saved_s"] == 0.1     # 1 hit x (0.2s over 2 misses)
+
+
+def test_bumping_the_version_invalidates():
+    cache = RetrievalCache()
+    collection = SimpleNamespace(name="cache_versions")
+    cache.put(collection, "q", 5, ["old"])
+    bump_collection_version(collection)
+
+    assert cache.get(collection, "q", 5) is None
+    cache.put(collection, "q", 5, ["new"])
+    assert cache.get(collection, "q", 5) == ["new"]
+    assert cache.summary()["entries"] == 1
+
+
+def test_lru_and_ttl(monkeypatch):
+    cache = RetrievalCache(max_entries=2, ttl=10)
+    collection = SimpleNamespace(name="cache_lru")
+    for q in ("a", "b"):
+        cache.put(collection, q, 1, [q])
+    cache.get(collection, "a", 1)
+    cache.put(collection, "c", 1, ["c"])
+    assert cache.get(collection, "b", 1) is None    # least recently used
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get(collection, "a", 1) is None
+    assert cache.stats["stale"] == 1
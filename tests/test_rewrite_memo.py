@@ -0,0 +1,64 @@
+from collections import OrderedDict
+
+import pytest
+
+from shared import rewrite_memo, speculative_retrieval
+from shared.rewrite_memo import cached_rewrite, memoized_rewrite, rewrite_calls_avoided, rewrite_stats
+from shared.speculative_retrieval import speculative_retrieve
+
+HISTORY = [
+    {"role": "system", "content": "You answer questions."},
+    {"role": "user", "content": "Tell me about the refund policy"},
+    {"role": "assistant", "content": "Refunds take 30 days."},
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(rewrite_memo, "_memo", OrderedDict())
+    for counters in (rewrite_stats, speculative_retrieval.stats):
+        for name, value in counters.items():
+            monkeypatch.setitem(counters, name, type(value)())
+
+
+def run(query, llm_calls):
+    def rewrite(q):
+        return memoized_rewrite(HISTORY, q, lambda: llm_calls.append(q) or "refund policy exceptions",
+                                check_standalone=False)
+
+    return speculative_retrieve(
+        query, rewrite=rewrite, retrieve=lambda q: [q], has_history=True, k=5,
+        cached=lambda q: cached_rewrite(HISTORY, q),
+    )
+
+
+def test_memoized_rewrite_skips_standalone_questions():
+    calls = []
+    query = "what is the shipping policy for orders"
+    assert memoized_rewrite(HISTORY, query, lambda: calls.append(1)) == query
+    assert memoized_rewrite(HISTORY, "and exceptions?", lambda: "refund exceptions") == "refund exceptions"
+    assert calls == []
+    assert rewrite_stats["skipped_standalone"] == 1
+    assert rewrite_stats["llm_calls"] == 1
+
+
+def test_speculative_retrieve_owns_the_standalone_check():
+    calls = []
+    result = run("what is the shipping policy for orders", calls)
+    assert not result["rewritten"]
+    assert calls == []
+    assert speculative_retrieval.stats["skipped"] == 1
+    assert rewrite_stats["skipped_standalone"] == 0
+    assert rewrite_calls_avoided() == 1
+
+
+def test_memo_hits_stay_out_of_rewrite_time_average():
+    calls = []
+    for _ in range(3):
+        assert run("and exceptions?", calls)["search_query"] == "refund policy exceptions"
+
+    assert calls == ["and exceptions?"]
+    assert speculative_retrieval.stats["rewrites"] == 1
+    assert speculative_retrieval.stats["cached"] == 2
+    assert rewrite_stats["memo_hits"] == 2
+    assert rewrite_calls_avoided() == 2
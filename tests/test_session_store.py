@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+from shared.session_store import CappedChatMessageHistory, SessionHistoryStore  # noqa: E402
+
+
+def chat(history, n):
+    history.add_message(HumanMessage(content=f"question {n}"))
+    history.add_message(AIMessage(content=f"answer {n}"))
+
+
+def test_capped_history_starts_on_a_human_turn():
+    history = CappedChatMessageHistory(max_messages=3)
+    chat(history, 1)
+    chat(history, 2)
+    assert [m.content for m in history.messages] == ["question 2", "answer 2"]
+
+
+def test_lru_eviction_spills_and_restores(tmp_path):
+    store = SessionHistoryStore(max_sessions=1, spill_path=str(tmp_path / "spill.db"))
+    chat(store.get_session_history("alice"), 1)
+    store.get_session_history("bob")          # evicts alice to disk
+
+    assert store.metrics()["spilled_sessions"] == 1
+    restored = store.get_session_history("alice")
+    assert [m.content for m in restored.messages] == ["question 1", "answer 1"]
+
+    metrics = store.metrics()
+    assert metrics["evicted_lru"] == 2
+    assert metrics["restored"] == 1
+    store.close()
+
+
+def test_idle_sessions_expire(monkeypatch):
+    store = SessionHistoryStore(ttl=10)
+    chat(store.get_session_history("alice"), 1)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert store.get_session_history("alice").messages == []
+    assert store.metrics()["evicted_ttl"] == 1
+
+
+def test_same_history_object_while_cached():
+    store = SessionHistoryStore()
+    assert store("alice") is store.get_session_history("alice")
+    store.clear("alice")
+    assert store.metrics()["sessions"] == 0
@@ -0,0 +1,28 @@
+from shared.summary_memory import SummaryMemory
+
+
+def test_messages_keep_recent_turns_verbatim():
+    memory = SummaryMemory(None, system_prompt="be brief", keep_turns=4)
+    memory.add_user("question 1")
+    memory.add_assistant("answer 1")
+    memory.add_user("question 2")
+    try:
+        assert [m["content"] for m in memory.messages()] == ["be brief", "question 1", "answer 1", "question 2"]
+    finally:
+        memory.close()
+
+
+def test_oversized_system_prompt_is_truncated_not_fatal():
+    memory = SummaryMemory(None, system_prompt="word " * 1000, max_tokens=500)
+    memory.summary = "they asked about refunds"
+    memory.add_user("what is this file about?")
+    try:
+        messages = memory.messages()
+    finally:
+        memory.close()
+
+    system = messages[0]["content"]
+    assert system.startswith("word word")
+    assert system.endswith("Summary of the earlier conversation:\nthey asked about refunds")
+    assert len(system) < 500
+    assert messages[-1] == {"role": "user", "content": "what is this file about?"}